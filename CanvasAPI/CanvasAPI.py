@@ -1,5 +1,5 @@
 from RequestsPlus import *
-from .models import CanvasObject
+from .models import *
 
 import logging
 logger = logging.getLogger(__name__)
@@ -14,7 +14,8 @@ class CanvasAPI(RequestsPlus):
         COURSES_USERS = '/courses/{courseID}/users'
         COURSES_PAGES_BY_NAME = '/courses/{courseID}/pages/{pageName}'
 
-    def __init__(self, apiBaseURL, contentType=MIME_TYPE_JSON, authZToken=None, authZType=AUTHZ_TYPE_BEARER):
+    def __init__(self, apiBaseURL, contentType=MIME_TYPE_JSON, authZToken=None, authZType=AUTHZ_TYPE_BEARER,
+                 pagePrefetchWorkers=4, cache=None, throttle=None, transport=None, asyncWorkers=16, profiler=None):
         """
         Set up CanvasAPI with the required authorization information
 
@@ -26,11 +27,25 @@ class CanvasAPI(RequestsPlus):
         :type authZToken: str
         :param authZType: Type part of "Authotization" request header
         :type authZType: str
+        :param pagePrefetchWorkers: Maximum number of pages requested at the same time when prefetching pages
+        :type pagePrefetchWorkers: int
+        :param cache: (optional) Persistent cache for GET responses
+        :type cache: HTTPCache
+        :param throttle: (optional) Paces requests by the rate limit Canvas reports, and retries failed ones
+        :type throttle: AdaptiveThrottle
+        :param transport: (optional) Sends the requests, instead of a new RequestsTransport
+        :type transport: RequestsTransport
+        :param asyncWorkers: Most requests from the awaitable methods in flight at the same time
+        :type asyncWorkers: int
+        :param profiler: (optional) Records the duration and size of each request
+        :type profiler: profiling.RunProfiler
         :rtype: CanvasAPI
         """
 
         super(CanvasAPI, self).__init__(
-            apiBaseURL, contentType=contentType, authZToken=authZToken, authZType=authZType
+            apiBaseURL, contentType=contentType, authZToken=authZToken, authZType=authZType,
+            pagePrefetchWorkers=pagePrefetchWorkers, cache=cache, throttle=throttle,
+            transport=transport, asyncWorkers=asyncWorkers, profiler=profiler
         )
 
     def jsonObjectHook(self, jsonObject):
@@ -54,13 +69,13 @@ class CanvasAPI(RequestsPlus):
 
     def getOutcomeObject(self, outcomeID):
         """
-        Get Canvas Outcome object as CanvasObject parsed from JSON
+        Get Canvas Outcome object as Outcome record parsed from JSON
 
         :param outcomeID: ID number of the Canvas Outcome object to be retrieved
         :type outcomeID: int
         :return: An object representing the first Canvas Outcome contained
             in the API response, otherwise :class:`None<None>`
-        :rtype: CanvasObject
+        :rtype: Outcome
         """
         assert type(outcomeID) is int
 
@@ -68,7 +83,7 @@ class CanvasAPI(RequestsPlus):
         outcomeResponse = self.getOutcome(outcomeID)
         if outcomeResponse.ok:
             outcomeObjects = self.responseCollection(outcomeResponse) \
-                .jsonObjects(object_hook=self.jsonObjectHook)
+                .jsonRecords(Outcome.fromJSON)
 
             outcomeObjectCount = len(outcomeObjects)
 
@@ -100,26 +115,48 @@ class CanvasAPI(RequestsPlus):
 
         return response
 
-    def getCoursesOutcomeGroupLinksObjects(self, courseID):
+    def getCoursesOutcomeGroupLinksObjects(self, courseID, prefetchPages=False):
         """
-        Get Canvas Outcome Group objects as CanvasObjects parsed from JSON
+        Get Canvas Outcome Group objects as OutcomeLink records parsed from JSON
 
         :param courseID: ID number of the Canvas Course object to find Outcome Group objects
         :type courseID: int
+        :param prefetchPages: Request all remaining pages at the same time, when their URIs can be computed
+        :type prefetchPages: bool
         :return: An object representing the Canvas Outcome Groups contained
             in the API response, otherwise :class:`None<None>`
-        :rtype: CanvasObject
+        :rtype: list of OutcomeLink
         """
         assert type(courseID) is int
 
         courseOutcomeGroupLinks = None
         response = self.getCoursesOutcomeGroupLinks(courseID)
         if response.ok:
-            courseOutcomeGroupLinks = self.responseCollection(response).collectAllResponsePages() \
-                .jsonObjects(object_hook=self.jsonObjectHook)
+            courseOutcomeGroupLinks = self.responseCollection(response).collectAllResponsePages(
+                prefetchPages=prefetchPages, maxWorkers=self.pagePrefetchWorkers) \
+                .jsonRecords(OutcomeLink.fromJSON)
 
         return courseOutcomeGroupLinks
 
+    def iterCoursesOutcomeGroupLinksObjects(self, courseID):
+        """
+        Get Canvas Outcome Group objects as OutcomeLink records parsed from JSON,
+        one page at a time.  Pages are released as soon as they are parsed,
+        and the remaining pages are not requested if the caller stops early.
+
+        :param courseID: ID number of the Canvas Course object to find Outcome Group objects
+        :type courseID: int
+        :return: Generator of objects representing the Canvas Outcome Groups contained
+            in the API response
+        :rtype: collections.abc.Iterator of OutcomeLink
+        """
+        assert type(courseID) is int
+
+        response = self.getCoursesOutcomeGroupLinks(courseID)
+        if response.ok:
+            yield from self.responseCollection(response) \
+                .iterJsonRecords(OutcomeLink.fromJSON)
+
     def getCoursesAssignments(self, courseID):
         """
         Get Canvas Assignments objects as requests Response object.  May be one of multiple pages.
@@ -136,26 +173,48 @@ class CanvasAPI(RequestsPlus):
 
         return response
 
-    def getCoursesAssignmentsObjects(self, courseID):
+    def getCoursesAssignmentsObjects(self, courseID, prefetchPages=False):
         """
-        Get Canvas Assignment objects as CanvasObjects parsed from JSON
+        Get Canvas Assignment objects as Assignment records parsed from JSON
 
         :param courseID: ID number of the Canvas Course object to find Assignment objects
         :type courseID: int
+        :param prefetchPages: Request all remaining pages at the same time, when their URIs can be computed
+        :type prefetchPages: bool
         :return: An object representing the Canvas Assignments contained
             in the API response, otherwise :class:`None<None>`
-        :rtype: CanvasObject
+        :rtype: list of Assignment
         """
         assert type(courseID) is int
 
         coursesAssignments = None
         response = self.getCoursesAssignments(courseID)
         if response.ok:
-            coursesAssignments = self.responseCollection(response).collectAllResponsePages() \
-                .jsonObjects(object_hook=self.jsonObjectHook)
+            coursesAssignments = self.responseCollection(response).collectAllResponsePages(
+                prefetchPages=prefetchPages, maxWorkers=self.pagePrefetchWorkers) \
+                .jsonRecords(Assignment.fromJSON)
 
         return coursesAssignments
 
+    def iterCoursesAssignmentsObjects(self, courseID):
+        """
+        Get Canvas Assignment objects as Assignment records parsed from JSON,
+        one page at a time.  Pages are released as soon as they are parsed,
+        and the remaining pages are not requested if the caller stops early.
+
+        :param courseID: ID number of the Canvas Course object to find Assignment objects
+        :type courseID: int
+        :return: Generator of objects representing the Canvas Assignments contained
+            in the API response
+        :rtype: collections.abc.Iterator of Assignment
+        """
+        assert type(courseID) is int
+
+        response = self.getCoursesAssignments(courseID)
+        if response.ok:
+            yield from self.responseCollection(response) \
+                .iterJsonRecords(Assignment.fromJSON)
+
     def getCoursesUsers(self, courseID, enrollmentType=None, **kwargs):
         """
         Get Canvas Users objects as requests Response object.  May be one of multiple pages.
@@ -180,28 +239,52 @@ class CanvasAPI(RequestsPlus):
 
         return response
 
-    def getCoursesUsersObjects(self, courseID, enrollmentType=None, **kwargs):
+    def getCoursesUsersObjects(self, courseID, enrollmentType=None, prefetchPages=False, **kwargs):
         """
-        Get Canvas User objects as CanvasObjects parsed from JSON
+        Get Canvas User objects as User records parsed from JSON
 
         :param courseID: ID number of the Canvas Course object to find User objects
         :type courseID: int
         :param enrollmentType:
         :type enrollmentType: str
+        :param prefetchPages: Request all remaining pages at the same time, when their URIs can be computed
+        :type prefetchPages: bool
         :return: An object representing the Canvas Users contained
             in the API response, otherwise :class:`None<None>`
-        :rtype: CanvasObject
+        :rtype: list of User
         """
         assert type(courseID) is int
 
         coursesUsers = None
         response = self.getCoursesUsers(courseID, enrollmentType=enrollmentType, **kwargs)
         if response.ok:
-            coursesUsers = self.responseCollection(response).collectAllResponsePages() \
-                .jsonObjects(object_hook=self.jsonObjectHook)
+            coursesUsers = self.responseCollection(response).collectAllResponsePages(
+                prefetchPages=prefetchPages, maxWorkers=self.pagePrefetchWorkers) \
+                .jsonRecords(User.fromJSON)
 
         return coursesUsers
 
+    def iterCoursesUsersObjects(self, courseID, enrollmentType=None, **kwargs):
+        """
+        Get Canvas User objects as User records parsed from JSON,
+        one page at a time.  Pages are released as soon as they are parsed,
+        and the remaining pages are not requested if the caller stops early.
+
+        :param courseID: ID number of the Canvas Course object to find User objects
+        :type courseID: int
+        :param enrollmentType:
+        :type enrollmentType: str
+        :return: Generator of objects representing the Canvas Users contained
+            in the API response
+        :rtype: collections.abc.Iterator of User
+        """
+        assert type(courseID) is int
+
+        response = self.getCoursesUsers(courseID, enrollmentType=enrollmentType, **kwargs)
+        if response.ok:
+            yield from self.responseCollection(response) \
+                .iterJsonRecords(User.fromJSON)
+
     def getCoursesPagesByName(self, courseID, pageName, **kwargs):
         """
         Get Canvas Users objects as requests Response object.  May be one of multiple pages.
@@ -221,17 +304,19 @@ class CanvasAPI(RequestsPlus):
 
         return response
 
-    def getCoursesPagesByNameObjects(self, courseID, pageName, **kwargs):
+    def getCoursesPagesByNameObjects(self, courseID, pageName, prefetchPages=False, **kwargs):
         """
-        Get Canvas User objects as CanvasObjects parsed from JSON
+        Get Canvas Page objects as Page records parsed from JSON
 
         :param courseID: ID number of the Canvas Course object to find User objects
         :type courseID: int
         :param enrollmentType:
         :type enrollmentType: str
+        :param prefetchPages: Request all remaining pages at the same time, when their URIs can be computed
+        :type prefetchPages: bool
         :return: An object representing the Canvas Users contained
             in the API response, otherwise :class:`None<None>`
-        :rtype: CanvasObject
+        :rtype: list of Page
         """
         assert isinstance(courseID, int)
         assert isinstance(pageName, str)
@@ -239,8 +324,9 @@ class CanvasAPI(RequestsPlus):
         coursesPages = None
         response = self.getCoursesPagesByName(courseID, pageName, **kwargs)
         if response.ok:
-            coursesPages = self.responseCollection(response).collectAllResponsePages() \
-                .jsonObjects(object_hook=self.jsonObjectHook)
+            coursesPages = self.responseCollection(response).collectAllResponsePages(
+                prefetchPages=prefetchPages, maxWorkers=self.pagePrefetchWorkers) \
+                .jsonRecords(Page.fromJSON)
 
         return coursesPages
 
@@ -262,13 +348,13 @@ class CanvasAPI(RequestsPlus):
 
     def getCourseObject(self, courseID):
         """
-        Get Canvas Course object as CanvasObject parsed from JSON
+        Get Canvas Course object as Course record parsed from JSON
 
         :param courseID: ID number of the Canvas Course object to find User objects
         :type courseID: int
         :return: An object representing the Canvas Users contained
             in the API response, otherwise :class:`None<None>`
-        :rtype: CanvasObject
+        :rtype: Course
         """
         assert type(courseID) is int
 
@@ -276,7 +362,7 @@ class CanvasAPI(RequestsPlus):
         response = self.getCourse(courseID)
         if response.ok:
             courseObjects = self.responseCollection(response) \
-                .jsonObjects(object_hook=self.jsonObjectHook)
+                .jsonRecords(Course.fromJSON)
 
             courseCount = len(courseObjects)
 
@@ -291,3 +377,88 @@ class CanvasAPI(RequestsPlus):
                 course = courseObjects.pop()
 
         return course
+
+    # Awaitable counterparts of the methods above, for use on an asyncio event loop
+
+    async def getOutcomeObjectAsync(self, outcomeID):
+        """
+        Like `getOutcomeObject()`, but awaitable.
+
+        :rtype: Outcome
+        """
+        return await self.runAsync(self.getOutcomeObject, outcomeID)
+
+    async def getCoursesOutcomeGroupLinksObjectsAsync(self, courseID, prefetchPages=False):
+        """
+        Like `getCoursesOutcomeGroupLinksObjects()`, but awaitable.
+
+        :rtype: list of OutcomeLink
+        """
+        return await self.runAsync(self.getCoursesOutcomeGroupLinksObjects, courseID, prefetchPages=prefetchPages)
+
+    async def aiterCoursesOutcomeGroupLinksObjects(self, courseID):
+        """
+        Like `iterCoursesOutcomeGroupLinksObjects()`, but an async generator.
+
+        :rtype: collections.abc.AsyncIterator of OutcomeLink
+        """
+        response = await self.runAsync(self.getCoursesOutcomeGroupLinks, courseID)
+        if response.ok:
+            async for outcomeLink in self.responseCollection(response).aiterJsonRecords(OutcomeLink.fromJSON):
+                yield outcomeLink
+
+    async def getCoursesAssignmentsObjectsAsync(self, courseID, prefetchPages=False):
+        """
+        Like `getCoursesAssignmentsObjects()`, but awaitable.
+
+        :rtype: list of Assignment
+        """
+        return await self.runAsync(self.getCoursesAssignmentsObjects, courseID, prefetchPages=prefetchPages)
+
+    async def aiterCoursesAssignmentsObjects(self, courseID):
+        """
+        Like `iterCoursesAssignmentsObjects()`, but an async generator.
+
+        :rtype: collections.abc.AsyncIterator of Assignment
+        """
+        response = await self.runAsync(self.getCoursesAssignments, courseID)
+        if response.ok:
+            async for assignment in self.responseCollection(response).aiterJsonRecords(Assignment.fromJSON):
+                yield assignment
+
+    async def getCoursesUsersObjectsAsync(self, courseID, enrollmentType=None, prefetchPages=False, **kwargs):
+        """
+        Like `getCoursesUsersObjects()`, but awaitable.
+
+        :rtype: list of User
+        """
+        return await self.runAsync(self.getCoursesUsersObjects, courseID, enrollmentType=enrollmentType,
+                                   prefetchPages=prefetchPages, **kwargs)
+
+    async def aiterCoursesUsersObjects(self, courseID, enrollmentType=None, **kwargs):
+        """
+        Like `iterCoursesUsersObjects()`, but an async generator.
+
+        :rtype: collections.abc.AsyncIterator of User
+        """
+        response = await self.runAsync(self.getCoursesUsers, courseID, enrollmentType=enrollmentType, **kwargs)
+        if response.ok:
+            async for user in self.responseCollection(response).aiterJsonRecords(User.fromJSON):
+                yield user
+
+    async def getCoursesPagesByNameObjectsAsync(self, courseID, pageName, prefetchPages=False, **kwargs):
+        """
+        Like `getCoursesPagesByNameObjects()`, but awaitable.
+
+        :rtype: list of Page
+        """
+        return await self.runAsync(self.getCoursesPagesByNameObjects, courseID, pageName,
+                                   prefetchPages=prefetchPages, **kwargs)
+
+    async def getCourseObjectAsync(self, courseID):
+        """
+        Like `getCourseObject()`, but awaitable.
+
+        :rtype: Course
+        """
+        return await self.runAsync(self.getCourseObject, courseID)
@@ -31,3 +31,113 @@ class CanvasObject(Namespace):
         :rtype: str
         """
         return '"{}" ({})'.format(self.title or self.name, self.id)
+
+
+class CanvasRecord(object):
+    """
+    A compact alternative to :class:`CanvasObject` for the Canvas
+    entities kartograafr uses.  Only the fields named in a subclass's
+    ``__slots__`` are kept from the JSON; everything else (e.g., permissions)
+    is dropped.  Like :class:`CanvasObject`, reading a field that isn't
+    available returns ``None`` rather than raising ``AttributeError``.
+
+    Subclasses may name record classes in ``_NESTED`` to convert nested JSON
+    objects (or lists of them) for those fields.
+    """
+    __slots__ = ()
+    _NESTED = {}
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    @classmethod
+    def fromJSON(cls, jsonObject):
+        """
+        Make a record from a JSON object that was parsed into a dictionary.
+
+        :param jsonObject: Canvas entity parsed from JSON
+        :type jsonObject: dict
+        :return: A record holding only the fields of this record type
+        :rtype: CanvasRecord
+        """
+        record = cls.__new__(cls)
+        for name in cls.__slots__:
+            value = jsonObject.get(name)
+            if value is not None and name in cls._NESTED:
+                recordType = cls._NESTED[name]
+                if type(value) is list:
+                    value = [recordType.fromJSON(item) for item in value]
+                else:
+                    value = recordType.fromJSON(value)
+            setattr(record, name, value)
+        return record
+
+    def __getattr__(self, name):
+        """
+        Only called when normal attribute lookup fails, so reading the
+        fields of a record is as fast as any other slotted object.
+
+        :param name: Name of the attribute to retrieve
+        :type name: str
+        :return: None
+        :rtype: None
+        """
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return None
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __hash__(self):
+        # Equal records have equal IDs, so records can be kept in sets and used as keys, as objects could before.
+        return hash((type(self), self.id))
+
+    def __repr__(self):
+        return '{}({})'.format(self.__class__.__name__,
+                               ', '.join('{}={!r}'.format(name, getattr(self, name)) for name in self.__slots__))
+
+    def __str__(self):
+        """
+        :return: A string representation of this Canvas record, of the form: "Title/Name" (ID)
+        :rtype: str
+        """
+        return '"{}" ({})'.format(self.title or self.name, self.id)
+
+
+class Course(CanvasRecord):
+    __slots__ = ('id', 'name', 'enrollment_term_id')
+
+
+class RubricCriterion(CanvasRecord):
+    __slots__ = ('id', 'outcome_id')
+
+
+class Assignment(CanvasRecord):
+    __slots__ = ('id', 'name', 'course_id', 'unlock_at', 'due_at', 'lock_at', 'rubric')
+    _NESTED = {'rubric': RubricCriterion}
+
+
+class Enrollment(CanvasRecord):
+    __slots__ = ('type', 'role', 'enrollment_state')
+
+
+class User(CanvasRecord):
+    __slots__ = ('id', 'name', 'login_id', 'enrollments')
+    _NESTED = {'enrollments': Enrollment}
+
+
+class Outcome(CanvasRecord):
+    __slots__ = ('id', 'title')
+
+
+class OutcomeLink(CanvasRecord):
+    __slots__ = ('outcome',)
+    _NESTED = {'outcome': Outcome}
+
+
+class Page(CanvasRecord):
+    __slots__ = ('title', 'body')
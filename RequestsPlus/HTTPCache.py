@@ -0,0 +1,197 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from url_normalize import url_normalize
+
+HTTP_HEADER_ETAG = 'ETag'
+HTTP_HEADER_LAST_MODIFIED = 'Last-Modified'
+HTTP_HEADER_IF_NONE_MATCH = 'If-None-Match'
+HTTP_HEADER_IF_MODIFIED_SINCE = 'If-Modified-Since'
+HTTP_STATUS_NOT_MODIFIED = 304
+
+
+class HTTPCache(object):
+    """
+    The :class:`HTTPCache<RequestsPlus.HTTPCache>` object, a persistent cache
+    of GET response bodies stored in an SQLite database.
+
+    Only URLs matching a pattern in the TTL table are cached.  A cached
+    response younger than its TTL is reused without a request.  An older one
+    is revalidated by sending its ETag and Last-Modified values with the
+    request, and reused if the server answers "304 Not Modified".
+    """
+
+    NEXT_LINK = 'next'  #: Relation of the link to a response's following page
+
+    _CACHED_HEADERS = ('Content-Type', 'Link', HTTP_HEADER_ETAG, HTTP_HEADER_LAST_MODIFIED)
+
+    def __init__(self, databasePath, ttlTable=None):
+        """
+        :param databasePath: Path of the SQLite database file, created if necessary
+        :type databasePath: str
+        :param ttlTable: Pairs of URL regular expression and TTL in seconds.  The first
+            pattern found in a URL decides its TTL.  A TTL of 0 means always revalidate.
+        :type ttlTable: list of (str, int)
+        """
+        self._ttlTable = [(re.compile(pattern), ttl) for (pattern, ttl) in (ttlTable or [])]
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(databasePath, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, url TEXT, headers TEXT, content BLOB, storedAt REAL)'
+            )
+
+        self.hits = 0  #: Responses reused without a request
+        self.revalidations = 0  #: Responses reused after a "304 Not Modified"
+        self.misses = 0  #: Responses requested because none could be reused, whether stored or not
+
+    @staticmethod
+    def makeKey(url, params=None):
+        """
+        :param url: URL of the request
+        :type url: str
+        :param params: Params sent with the request
+        :type params: dict or None
+        :return: Key identifying the request, independent of param order
+        :rtype: str
+        """
+        key = url_normalize(url)
+        if params:
+            key += '?' + urlencode(sorted(params.items()), doseq=True)
+        return key
+
+    def getTTL(self, url):
+        """
+        :param url: URL of the request
+        :type url: str
+        :return: TTL in seconds for the URL, or None if it shouldn't be cached
+        :rtype: int or None
+        """
+        for (pattern, ttl) in self._ttlTable:
+            if pattern.search(url):
+                return ttl
+        return None
+
+    def lookup(self, key):
+        """
+        :param key: Key from `makeKey()`
+        :type key: str
+        :return: The cached entry for key as a dictionary, or None
+        :rtype: dict or None
+        """
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT url, headers, content, storedAt FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        (url, headers, content, storedAt) = row
+        return {'key': key, 'url': url, 'headers': json.loads(headers), 'content': content, 'storedAt': storedAt}
+
+    def isFresh(self, entry):
+        """
+        :param entry: Entry from `lookup()`
+        :type entry: dict
+        :return: Whether the entry may be reused without revalidation
+        :rtype: bool
+        """
+        ttl = self.getTTL(entry['url'])
+        return ttl is not None and time.time() - entry['storedAt'] < ttl
+
+    @staticmethod
+    def conditionalHeaders(entry):
+        """
+        :param entry: Entry from `lookup()`
+        :type entry: dict
+        :return: Request headers to revalidate the entry
+        :rtype: dict
+        """
+        headers = CaseInsensitiveDict(entry['headers'])
+        conditionalHeaders = {}
+        if HTTP_HEADER_ETAG in headers:
+            conditionalHeaders[HTTP_HEADER_IF_NONE_MATCH] = headers[HTTP_HEADER_ETAG]
+        if HTTP_HEADER_LAST_MODIFIED in headers:
+            conditionalHeaders[HTTP_HEADER_IF_MODIFIED_SINCE] = headers[HTTP_HEADER_LAST_MODIFIED]
+        return conditionalHeaders
+
+    def store(self, key, response):
+        """
+        :param key: Key from `makeKey()`
+        :type key: str
+        :param response: Successful response to be cached
+        :type response: requests.Response
+        """
+        headers = {name: response.headers[name] for name in self._CACHED_HEADERS if name in response.headers}
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO responses (key, url, headers, content, storedAt) VALUES (?, ?, ?, ?, ?)',
+                (key, response.url, json.dumps(headers), response.content, time.time())
+            )
+
+    def refresh(self, entry):
+        """
+        Restart the TTL of an entry the server confirmed is unchanged.
+
+        :param entry: Entry from `lookup()`
+        :type entry: dict
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                'UPDATE responses SET storedAt = ? WHERE key = ?', (time.time(), entry['key'])
+            )
+            self.revalidations += 1
+
+    def countHit(self):
+        with self._lock:
+            self.hits += 1
+
+    def countMiss(self):
+        with self._lock:
+            self.misses += 1
+
+    @staticmethod
+    def makeResponse(entry, request):
+        """
+        :param entry: Entry from `lookup()`
+        :type entry: dict
+        :param request: The request the response answers, needed to follow pagination links
+        :type request: requests.PreparedRequest
+        :return: Response object rebuilt from the entry
+        :rtype: requests.Response
+        """
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.url = entry['url']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response._content = entry['content']
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.request = request
+        return response
+
+    def stats(self):
+        """
+        :return: Hit, revalidation and miss counts, plus the ratio of reused responses
+        :rtype: dict
+        """
+        with self._lock:
+            total = self.hits + self.revalidations + self.misses
+            return {
+                'hits': self.hits,
+                'revalidations': self.revalidations,
+                'misses': self.misses,
+                'hitRatio': (self.hits + self.revalidations) / total if total else 0.0,
+            }
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
@@ -3,40 +3,73 @@
 import logging
 logger = logging.getLogger(__name__)
 
+import time
+
 import requests
 from url_normalize import url_normalize
 
 import util
 from .ResponseCollection import *
+from .HTTPCache import HTTP_STATUS_NOT_MODIFIED
+from .Transport import AsyncioTransport, RequestsTransport
 
 HTTP_HEADER_AUTHORIZATION = 'Authorization'
 AUTHZ_TYPE_BEARER = 'Bearer'
 MIME_TYPE_JSON = 'application/json'
 HTTP_HEADER_CONTENT_TYPE = 'Content-type'
+# Methods that can safely be sent again after a server error or a lost connection
+IDEMPOTENT_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'))
 
 
 class RequestsPlus(util.UtilMixin, object):
-    def __init__(self, apiBaseURL, contentType=MIME_TYPE_JSON, authZToken=None, authZType=AUTHZ_TYPE_BEARER):
+    def __init__(self, apiBaseURL, contentType=MIME_TYPE_JSON, authZToken=None, authZType=AUTHZ_TYPE_BEARER,
+                 pagePrefetchWorkers=4, cache=None, throttle=None, transport=None, asyncWorkers=16, profiler=None):
         self._name = self.__class__.__name__
         self.apiBaseURL = apiBaseURL
         self.contentType = contentType
         self.authZToken = authZToken
         self.authZType = authZType
-        self.session = requests.Session()
-        self.session.headers.update(self._prepareHeaders())
+        self.pagePrefetchWorkers = pagePrefetchWorkers
+        self.cache = cache  # type: HTTPCache
+        self.throttle = throttle  # type: AdaptiveThrottle
+        self.profiler = profiler  # type: profiling.RunProfiler
+        self.transport = transport or RequestsTransport()  # type: RequestsTransport
+        self.transport.session.headers.update(self._prepareHeaders())
+        self.asyncTransport = AsyncioTransport(self.transport, maxWorkers=asyncWorkers)
+
+    @property
+    def session(self):
+        """
+        :return: The session of the transport requests are sent with
+        :rtype: requests.Session
+        """
+        return self.transport.session
 
-    @staticmethod
-    def responseCollection(response):
+    def responseCollection(self, response):
         """
         Convenience method to make a ResponseCollection
-        object for a response.
+        object for a response.  Requests for more pages
+        are throttled and retried like any other, and are
+        sent over the same pooled connections.
 
         :param response: requests Response object, usually the first of multiple pages
         :type response: requests.models.Response
         :return: ResponseCollection object containing multiple response pages
         :rtype: ResponseCollection
         """
-        return ResponseCollection(response)
+        return ResponseCollection(response, session=self.session, sendRequest=self._sendPreparedRequest,
+                                  sendRequestAsync=self._sendPreparedRequestAsync)
+
+    async def runAsync(self, function, *args, **kwargs):
+        """
+        Call a blocking function (e.g., one of the synchronous request methods)
+        on the async transport's threads, without blocking the event loop.
+
+        :param function: Function to call
+        :type function: callable
+        :return: Result of the function
+        """
+        return await self.asyncTransport.run(function, *args, **kwargs)
 
     @property
     def _authZHeader(self):
@@ -87,15 +120,121 @@ class RequestsPlus(util.UtilMixin, object):
         """
         preparedAPIQueryURL = self._prepareURL(apiQueryURI)
         response = None
-        sessionRequestMethod = self.session.__getattribute__(httpMethod)
 
         try:
-            response = sessionRequestMethod(preparedAPIQueryURL, **kwargs)
+            response = self._sendWithRetry(lambda: self.transport.request(httpMethod, preparedAPIQueryURL, **kwargs),
+                                           preparedAPIQueryURL, httpMethod)
         except requests.exceptions.RequestException as e:
-            logger.info( self._name + ' error: ' + e) # Python 3 message doesn't exist anymore? 
+            logger.info(self._name + ' error: ' + str(e))
 
         return response
 
+    def _sendPreparedRequest(self, preparedRequest, **kwargs):
+        """
+        Send an already prepared request (e.g., for the next page of a response).
+
+        :param preparedRequest: The request to be sent
+        :type preparedRequest: requests.PreparedRequest
+        :return: Response object
+        :rtype: requests.Response
+        """
+        return self._sendWithRetry(lambda: self.transport.send(preparedRequest, **kwargs), preparedRequest.url,
+                                   preparedRequest.method)
+
+    async def _sendPreparedRequestAsync(self, preparedRequest, **kwargs):
+        """
+        Like `_sendPreparedRequest()`, but awaitable.
+
+        :param preparedRequest: The request to be sent
+        :type preparedRequest: requests.PreparedRequest
+        :return: Response object
+        :rtype: requests.Response
+        """
+        return await self.runAsync(self._sendPreparedRequest, preparedRequest, **kwargs)
+
+    def _sendWithRetry(self, send, url, httpMethod='GET'):
+        """
+        Call send, pacing it with the throttle, if there is one.  Requests
+        refused because of the rate limit are retried after a backoff, as long
+        as the throttle allows.  Server errors and connection problems are only
+        retried for idempotent methods (e.g., GET), since a POST might have
+        been carried out before it failed.
+
+        :param send: Function sending the request and returning its Response
+        :type send: callable
+        :param url: URL of the request, for logging
+        :type url: str
+        :param httpMethod: HTTP method of the request
+        :type httpMethod: str
+        :return: Response object of the last attempt
+        :rtype: requests.Response
+        :raises: requests.exceptions.RequestException if the last attempt couldn't connect
+        """
+        if self.profiler is not None:
+            send = self._profiledSend(send, url)
+
+        if self.throttle is None:
+            return send()
+
+        idempotent = httpMethod.upper() in IDEMPOTENT_METHODS
+
+        attempt = 0
+        while True:
+            response = None
+            retryableError = None
+
+            self.throttle.acquire()
+            try:
+                response = send()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as exception:
+                retryableError = exception
+            finally:
+                self.throttle.release(response)
+
+            if retryableError is None and not self.throttle.isRetryable(response):
+                return response
+
+            # A request refused because of the rate limit wasn't carried out, so it's always safe to retry.
+            if not idempotent and (retryableError is not None or not self.throttle.isThrottled(response)):
+                if retryableError is not None:
+                    raise retryableError
+                return response
+
+            if not self.throttle.takeRetry(attempt, response):
+                if retryableError is not None:
+                    raise retryableError
+                return response
+
+            delay = self.throttle.backoffDelay(attempt)
+            logger.warning('{} retrying in {:.1f}s after {}: {}'.format(
+                self._name, delay,
+                retryableError if retryableError is not None else response.status_code, url))
+            if self.profiler is not None:
+                self.profiler.recordRetry(self._name, url)
+            time.sleep(delay)
+            attempt += 1
+
+    def _profiledSend(self, send, url):
+        """
+        :param send: Function sending the request and returning its Response
+        :type send: callable
+        :param url: URL of the request, for the profile
+        :type url: str
+        :return: Function like send, which records each call with the profiler
+        :rtype: callable
+        """
+
+        def profiledSend():
+            response = None
+            startTime = time.time()
+            try:
+                response = send()
+                return response
+            finally:
+                self.profiler.recordRequest(self._name, url, time.time() - startTime, response)
+
+        return profiledSend
+
     def errorString(self, response):
         """
         Return the HTTP status code and corresponding reason from a
@@ -127,7 +266,13 @@ class RequestsPlus(util.UtilMixin, object):
         :rtype: requests.Response
         """
 
-        response = self._sendRequest("get", apiQueryURI, **kwargs)
+        if self.cache is not None:
+            response = self._getWithCache(apiQueryURI, **kwargs)
+        else:
+            response = self._sendRequest("get", apiQueryURI, **kwargs)
+
+        if response is None:
+            raise RuntimeError('No response for request: {apiQueryURI}'.format(**locals()))
 
         if not response.ok:
             raise RuntimeError('Error {response.status_code} "{response.reason}" for request: {apiQueryURI}'
@@ -135,16 +280,76 @@ class RequestsPlus(util.UtilMixin, object):
 
         return response
 
-    def getAllResponsePages(self, response):
+    async def getAsync(self, apiQueryURI, **kwargs):
+        """
+        Like `get()`, but awaitable.  The request is throttled, retried and
+        cached the same way.
+
+        :param apiQueryURI: URI for the query, to be appended to the base URL
+        :type apiQueryURI: str
+        :return: Response object
+        :rtype: requests.Response
+        """
+        return await self.runAsync(self.get, apiQueryURI, **kwargs)
+
+    def _getWithCache(self, apiQueryURI, params=None, **kwargs):
+        """
+        Like `_sendRequest()` for the GET method, but reuse a response from the cache
+        if it's still fresh, or if the server confirms a cached response is unchanged.
+        Only responses without a following page are cached, so a list is never put
+        together from a cached first page and live following pages of another version.
+
+        :param apiQueryURI: URI for the query, to be appended to the base URL
+        :type apiQueryURI: str
+        :param params: Parameters to be sent along with the request
+        :type params: dict or None
+        :return: Response object
+        :rtype: requests.Response
+        """
+        preparedAPIQueryURL = self._prepareURL(apiQueryURI)
+        if self.cache.getTTL(preparedAPIQueryURL) is None:
+            return self._sendRequest("get", apiQueryURI, params=params, **kwargs)
+
+        cacheKey = self.cache.makeKey(preparedAPIQueryURL, params)
+        cacheEntry = self.cache.lookup(cacheKey)
+
+        if cacheEntry is not None and self.cache.isFresh(cacheEntry):
+            logger.debug('{} cache hit: {}'.format(self._name, cacheKey))
+            self.cache.countHit()
+            request = self.transport.prepare(requests.Request('GET', preparedAPIQueryURL, params=params))
+            return self.cache.makeResponse(cacheEntry, request)
+
+        headers = dict(kwargs.pop('headers', None) or {})
+        if cacheEntry is not None:
+            headers.update(self.cache.conditionalHeaders(cacheEntry))
+
+        response = self._sendRequest("get", apiQueryURI, params=params, headers=headers, **kwargs)
+
+        if response is not None and cacheEntry is not None and response.status_code == HTTP_STATUS_NOT_MODIFIED:
+            logger.debug('{} cache revalidated: {}'.format(self._name, cacheKey))
+            self.cache.refresh(cacheEntry)
+            return self.cache.makeResponse(cacheEntry, response.request)
+
+        self.cache.countMiss()
+        if response is not None and response.ok and self.cache.NEXT_LINK not in response.links:
+            self.cache.store(cacheKey, response)
+
+        return response
+
+    def getAllResponsePages(self, response, prefetchPages=False):
         """
         Convenience method to get a ResponseCollection which includes all pages
         of the API response.
 
         :param response:
+        :param prefetchPages: Request remaining pages at the same time, when possible
+        :type prefetchPages: bool
         :return: ResponseCollection containing all response pages
         :rtype: RequestsPlus.ResponseCollection
         """
-        return ResponseCollection(response, session=self.session).collectAllResponsePages()
+        responseCollection = self.responseCollection(response)
+        return responseCollection.collectAllResponsePages(prefetchPages=prefetchPages,
+                                                          maxWorkers=self.pagePrefetchWorkers)
 
     def post(self, apiQueryURI, params=None, **kwargs):
         """
@@ -159,3 +364,16 @@ class RequestsPlus(util.UtilMixin, object):
         """
 
         return self._sendRequest("post", apiQueryURI, params=params, **kwargs)
+
+    async def postAsync(self, apiQueryURI, params=None, **kwargs):
+        """
+        Like `post()`, but awaitable.
+
+        :param apiQueryURI: URI for the query, to be appended to the base URL
+        :type apiQueryURI: str
+        :param params: Parameters to be sent along with the request
+        :type params: mixed
+        :return: Response object
+        :rtype: requests.Response
+        """
+        return await self.runAsync(self.post, apiQueryURI, params=params, **kwargs)
@@ -1,7 +1,11 @@
+import asyncio
 from argparse import Namespace
+from urllib.parse import parse_qs, urlencode, urlsplit, urlunsplit
 
 import requests
 
+import util
+
 
 class ResponseCollection(object):
     """
@@ -12,20 +16,40 @@ class ResponseCollection(object):
 
     class _LinksKeys(object):
         NEXT = 'next'
+        LAST = 'last'
         CHILD_URL = 'url'
 
-    def __init__(self, response=None, session=None):
+    PAGE_PARAM = 'page'
+
+    def __init__(self, response=None, session=None, sendRequest=None, sendRequestAsync=None):
         """
         :param response: A Response object
         :type response: requests.Response
-        :param session: A Session object, helpful for reusing headers, etc.
+        :param session: A Session object, helpful for reusing headers, connections, etc.
+            A new one is only made if neither it nor sendRequest is given.
         :type session: requests.Session
+        :param sendRequest: (optional) Function to send prepared requests for more pages,
+            instead of the session's send() method
+        :type sendRequest: callable
+        :param sendRequestAsync: (optional) Coroutine function to send prepared requests for more pages
+            from async methods, instead of running sendRequest on the event loop's default executor
+        :type sendRequestAsync: callable
         """
         assert isinstance(response, requests.Response)
         self._currentResponse = response
         self._responses = [response]
         self._session = session if isinstance(session, requests.Session) \
-            else requests.Session()
+            else None
+        if sendRequest is None:
+            if self._session is None:
+                self._session = requests.Session()
+            sendRequest = self._session.send
+        self._sendRequest = sendRequest
+        self._sendRequestAsync = sendRequestAsync or self._sendRequestInExecutor
+
+    async def _sendRequestInExecutor(self, preparedRequest):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._sendRequest, preparedRequest)
 
     def json(self, **kwargs):
         """
@@ -37,9 +61,11 @@ class ResponseCollection(object):
         :type kwargs: mixed
         :return: Combined list of JSON from all Response objects
         :rtype: list of Any
+        :raises requests.HTTPError: If a page following the first one isn't OK, so the list would be incomplete
         """
         allResponseJSON = []
         for (responseNumber, response) in enumerate(self._responses):
+            self._checkFollowingPage(responseNumber, response)
             responseJSON = response.json(**kwargs)
             if type(responseJSON) is not list:
                 allResponseJSON.append(responseJSON)
@@ -48,6 +74,21 @@ class ResponseCollection(object):
 
         return allResponseJSON
 
+    @staticmethod
+    def _checkFollowingPage(responseNumber, response):
+        """
+        Callers check whether the first page is OK before reading the collection.
+        A following page that isn't OK ends the collection early, and its body is
+        an error, not part of the list, so it's raised instead of parsed.
+
+        :param responseNumber: Position of the Response object in the collection, from 0
+        :type responseNumber: int
+        :type response: requests.models.Response
+        :raises requests.HTTPError: If the Response object follows the first one and isn't OK
+        """
+        if responseNumber > 0 and not response.ok:
+            response.raise_for_status()
+
     def jsonObjects(self, **kwargs):
         """
 
@@ -62,6 +103,172 @@ class ResponseCollection(object):
 
         return self.json(**kwargs)
 
+    def jsonRecords(self, recordFactory, **kwargs):
+        """
+        Like `json()`, but pass each top-level object through recordFactory.
+        Nested objects are left as parsed, so recordFactory decides which
+        parts of them to keep.
+
+        :param recordFactory: Function making a record from a parsed JSON object
+        :type recordFactory: callable
+        :param kwargs: Optional keyword arguments to pass along to `json()`
+        :return: Records made from the JSON of all Response objects
+        :rtype: list
+        """
+        return [recordFactory(responseJSON) for responseJSON in self.json(**kwargs)]
+
+    def iterJson(self, **kwargs):
+        """
+        Like `json()`, but yield the JSON one page at a time as each page is
+        received and parsed.  See `iterResponsePages()`.
+
+        :param kwargs: Arguments to pass to Response.json()
+        :type kwargs: mixed
+        :return: Generator of JSON from all Response objects
+        :rtype: collections.abc.Iterator of Any
+        :raises requests.HTTPError: If a page following the first one isn't OK, so the list would be incomplete
+        """
+        for (responseNumber, response) in enumerate(self.iterResponsePages()):
+            self._checkFollowingPage(responseNumber, response)
+            responseJSON = response.json(**kwargs)
+            if type(responseJSON) is not list:
+                yield responseJSON
+            else:
+                yield from responseJSON
+
+    def iterJsonObjects(self, **kwargs):
+        """
+        Like `jsonObjects()`, but yield the objects one page at a time as
+        each page is received and parsed.  See `iterResponsePages()`.
+
+        :param kwargs: Optional keyword arguments to pass along to `iterJson()`
+        :return: Generator of Namespace objects (not dictionaries) representing data from the JSON
+        :rtype: collections.abc.Iterator of Namespace
+        """
+        OBJECT_HOOK_KEY = 'object_hook'
+
+        if OBJECT_HOOK_KEY not in kwargs:
+            kwargs[OBJECT_HOOK_KEY] = lambda jsonObject: Namespace(**jsonObject)
+
+        return self.iterJson(**kwargs)
+
+    def iterJsonRecords(self, recordFactory, **kwargs):
+        """
+        Like `jsonRecords()`, but yield the records one page at a time as
+        each page is received and parsed.  See `iterResponsePages()`.
+
+        :param recordFactory: Function making a record from a parsed JSON object
+        :type recordFactory: callable
+        :param kwargs: Optional keyword arguments to pass along to `iterJson()`
+        :return: Generator of records made from the JSON of all Response objects
+        :rtype: collections.abc.Iterator
+        """
+        for responseJSON in self.iterJson(**kwargs):
+            yield recordFactory(responseJSON)
+
+    def iterResponsePages(self):
+        """
+        Yield the initial Response and each page following it, one at a time.
+        Unlike `collectAllResponsePages()`, pages are not kept in the collection,
+        so each one can be released as soon as the caller is done with it.  That
+        also allows the caller to stop early without requesting the rest.
+
+        :return: Generator of Response objects
+        :rtype: collections.abc.Iterator of requests.models.Response
+        """
+        response = self._currentResponse
+        """:type response: requests.models.Response"""
+        self._responses = []
+
+        while True:
+            yield response
+
+            if not response.ok:
+                break
+            nextPageParams = self.getNextPageParams(response)
+            if nextPageParams is None:
+                break
+            nextPageRequest = response.request.copy()
+            """:type nextPageRequest: requests.PreparedRequest"""
+            nextPageRequest.prepare_url(nextPageRequest.url, nextPageParams)
+            response = self._sendRequest(nextPageRequest)
+
+            self._currentResponse = response
+
+    async def aiterJson(self, **kwargs):
+        """
+        Like `iterJson()`, but an async generator.  See `aiterResponsePages()`.
+
+        :param kwargs: Arguments to pass to Response.json()
+        :type kwargs: mixed
+        :return: Async generator of JSON from all Response objects
+        :rtype: collections.abc.AsyncIterator of Any
+        :raises requests.HTTPError: If a page following the first one isn't OK, so the list would be incomplete
+        """
+        responseNumber = 0
+        async for response in self.aiterResponsePages():
+            self._checkFollowingPage(responseNumber, response)
+            responseNumber += 1
+            responseJSON = response.json(**kwargs)
+            if type(responseJSON) is not list:
+                yield responseJSON
+            else:
+                for item in responseJSON:
+                    yield item
+
+    async def aiterJsonRecords(self, recordFactory, **kwargs):
+        """
+        Like `iterJsonRecords()`, but an async generator.  See `aiterResponsePages()`.
+
+        :param recordFactory: Function making a record from a parsed JSON object
+        :type recordFactory: callable
+        :param kwargs: Optional keyword arguments to pass along to `aiterJson()`
+        :return: Async generator of records made from the JSON of all Response objects
+        :rtype: collections.abc.AsyncIterator
+        """
+        async for responseJSON in self.aiterJson(**kwargs):
+            yield recordFactory(responseJSON)
+
+    async def aiterResponsePages(self):
+        """
+        Like `iterResponsePages()`, but an async generator.  The event loop
+        is free to run other tasks while each following page is requested.
+
+        :return: Async generator of Response objects
+        :rtype: collections.abc.AsyncIterator of requests.models.Response
+        """
+        response = self._currentResponse
+        """:type response: requests.models.Response"""
+        self._responses = []
+
+        while True:
+            yield response
+
+            nextPageRequest = self._makeNextPageRequest(response)
+            if nextPageRequest is None:
+                break
+            response = await self._sendRequestAsync(nextPageRequest)
+
+            self._currentResponse = response
+
+    def _makeNextPageRequest(self, response):
+        """
+        :param response: The Response object to follow
+        :type response: requests.models.Response
+        :return: A request for the page following the Response object, if it's OK and has a "next" link.
+            Otherwise, None.
+        :rtype: requests.PreparedRequest
+        """
+        if not response.ok:
+            return None
+        nextPageParams = self.getNextPageParams(response)
+        if nextPageParams is None:
+            return None
+        nextPageRequest = response.request.copy()
+        """:type nextPageRequest: requests.PreparedRequest"""
+        nextPageRequest.prepare_url(nextPageRequest.url, nextPageParams)
+        return nextPageRequest
+
     def getNextPageURI(self, response=None):
         """
         :param response: The Response object queried for next page URI
@@ -91,11 +298,67 @@ class ResponseCollection(object):
             (_, nextPageParams) = nextPageURI.split('?')
         return nextPageParams
 
-    def collectAllResponsePages(self):
+    def getLastPageURI(self, response=None):
+        """
+        :param response: The Response object queried for last page URI
+        :type response: requests.models.Response
+        :return: The URI from the "url" key of the Response object's "last" link, if one exists.  Otherwise, None.
+        :rtype: str
+        """
+        response = response or self._currentResponse
+        assert isinstance(response, requests.models.Response)
+
+        return response.links.get(self._LinksKeys.LAST, {}).get(self._LinksKeys.CHILD_URL)
+
+    def getRemainingPageURIs(self, response=None):
+        """
+        Compute the URIs of all pages following the Response object, based on
+        its "next" and "last" links.  This is only possible when both links use
+        numeric "page" params.  Some APIs (e.g., Canvas) use opaque bookmarks
+        instead, or omit the "last" link when it's expensive to compute.
+
+        :param response: The Response object queried for remaining page URIs
+        :type response: requests.models.Response
+        :return: URIs of the remaining pages, in order, if they can be computed.  Otherwise, None.
+        :rtype: list of str
+        """
+        response = response or self._currentResponse
+        assert isinstance(response, requests.models.Response)
+
+        nextPageURI = self.getNextPageURI(response=response)
+        lastPageURI = self.getLastPageURI(response=response)
+        if nextPageURI is None or lastPageURI is None:
+            return None
+
+        nextPageURIParts = urlsplit(nextPageURI)
+        nextPageParams = parse_qs(nextPageURIParts.query, keep_blank_values=True)
+        nextPage = nextPageParams.get(self.PAGE_PARAM, [''])[0]
+        lastPage = parse_qs(urlsplit(lastPageURI).query).get(self.PAGE_PARAM, [''])[0]
+        if not (nextPage.isdigit() and lastPage.isdigit()) or int(lastPage) < int(nextPage):
+            return None
+
+        remainingPageURIs = []
+        for page in range(int(nextPage), int(lastPage) + 1):
+            nextPageParams[self.PAGE_PARAM] = [str(page)]
+            remainingPageURIs.append(urlunsplit(
+                nextPageURIParts._replace(query=urlencode(nextPageParams, doseq=True))
+            ))
+
+        return remainingPageURIs
+
+    def collectAllResponsePages(self, prefetchPages=False, maxWorkers=4):
         """
+        :param prefetchPages: When possible, compute the URIs of all remaining pages
+            and request them at the same time instead of one after another
+        :type prefetchPages: bool
+        :param maxWorkers: Maximum number of pages to request at the same time when prefetching
+        :type maxWorkers: int
         :return: A ResponsePager object containing all pages following the initial Response
         :rtype: ResponseCollection
         """
+        if prefetchPages and maxWorkers > 1:
+            self._prefetchRemainingResponsePages(maxWorkers)
+
         response = self._currentResponse
         """:type response: requests.models.Response"""
 
@@ -106,13 +369,95 @@ class ResponseCollection(object):
             nextPageRequest = response.request.copy()
             """:type nextPageRequest: requests.PreparedRequest"""
             nextPageRequest.prepare_url(nextPageRequest.url, nextPageParams)
-            response = self._session.send(nextPageRequest)
+            response = self._sendRequest(nextPageRequest)
 
             self._responses.append(response)
             self._currentResponse = response
 
         return self
 
+    async def collectAllResponsePagesAsync(self, prefetchPages=False, maxWorkers=4):
+        """
+        Like `collectAllResponsePages()`, but awaitable.
+
+        :param prefetchPages: When possible, compute the URIs of all remaining pages
+            and request them at the same time instead of one after another
+        :type prefetchPages: bool
+        :param maxWorkers: Maximum number of pages to request at the same time when prefetching
+        :type maxWorkers: int
+        :return: A ResponsePager object containing all pages following the initial Response
+        :rtype: ResponseCollection
+        """
+        response = self._currentResponse
+        """:type response: requests.models.Response"""
+
+        remainingPageURIs = self.getRemainingPageURIs(response) \
+            if prefetchPages and maxWorkers > 1 and response.ok else None
+        if remainingPageURIs:
+            pageSemaphore = asyncio.Semaphore(maxWorkers)
+
+            async def sendPageRequest(pageURI):
+                pageRequest = response.request.copy()
+                """:type pageRequest: requests.PreparedRequest"""
+                pageRequest.prepare_url(pageURI, None)
+                async with pageSemaphore:
+                    return await self._sendRequestAsync(pageRequest)
+
+            pageResponses = await asyncio.gather(*(sendPageRequest(pageURI) for pageURI in remainingPageURIs))
+
+            for response in pageResponses:
+                self._responses.append(response)
+                self._currentResponse = response
+                if not response.ok:
+                    break
+
+        response = self._currentResponse
+        nextPageRequest = self._makeNextPageRequest(response)
+        while nextPageRequest is not None:
+            response = await self._sendRequestAsync(nextPageRequest)
+
+            self._responses.append(response)
+            self._currentResponse = response
+            nextPageRequest = self._makeNextPageRequest(response)
+
+        return self
+
+    def _prefetchRemainingResponsePages(self, maxWorkers):
+        """
+        Request all remaining pages at the same time, if their URIs can be computed.
+        Pages are added to the collection in order, up to and including the first
+        one that isn't OK.  Any pages beyond the computed ones (e.g., if the list
+        grew in the meantime) are left for the usual "next" link traversal.
+
+        :param maxWorkers: Maximum number of pages to request at the same time
+        :type maxWorkers: int
+        """
+        response = self._currentResponse
+        if not response.ok:
+            return
+
+        remainingPageURIs = self.getRemainingPageURIs(response)
+        if not remainingPageURIs:
+            return
+
+        def sendPageRequest(pageURI):
+            pageRequest = response.request.copy()
+            """:type pageRequest: requests.PreparedRequest"""
+            pageRequest.prepare_url(pageURI, None)
+            return self._sendRequest(pageRequest)
+
+        pageResponses, exceptions = util.mapConcurrently(sendPageRequest, remainingPageURIs, maxWorkers)
+
+        for pageURI in remainingPageURIs:
+            if pageURI in exceptions:
+                raise exceptions[pageURI]
+
+            response = pageResponses[pageURI]
+            self._responses.append(response)
+            self._currentResponse = response
+            if not response.ok:
+                break
+
     def getCurrentResponse(self):
         """
         :return: The current Response object
@@ -0,0 +1,185 @@
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+HTTP_HEADER_RATE_LIMIT_REMAINING = 'X-Rate-Limit-Remaining'
+HTTP_HEADER_REQUEST_COST = 'X-Request-Cost'
+RATE_LIMIT_EXCEEDED_TEXT = 'Rate Limit Exceeded'
+
+
+class AdaptiveThrottle(object):
+    """
+    The :class:`AdaptiveThrottle<RequestsPlus.AdaptiveThrottle>` object limits
+    how many requests are in flight at once, based on the rate limit quota
+    the API reports in its responses (e.g., Canvas's "X-Rate-Limit-Remaining"
+    and "X-Request-Cost" headers).  It also decides which failed requests may
+    be retried, and how long to wait first.
+
+    The number of requests allowed in flight is halved whenever the remaining
+    quota drops below lowWatermark, and grows by one for each response that
+    reports more than highWatermark.  Below lowWatermark, new requests are also
+    paused long enough for the quota to recover at recoveryRate.
+    """
+
+    def __init__(self, maxConcurrency=8, lowWatermark=150, highWatermark=450, recoveryRate=10.0,
+                 maxRetries=5, retryBudget=100, backoffBase=1.0, backoffMax=60.0):
+        """
+        :param maxConcurrency: Most requests ever allowed in flight at once
+        :type maxConcurrency: int
+        :param lowWatermark: Remaining quota below which requests are slowed down
+        :type lowWatermark: float
+        :param highWatermark: Remaining quota above which requests may speed up again
+        :type highWatermark: float
+        :param recoveryRate: Quota units the API restores per second
+        :type recoveryRate: float
+        :param maxRetries: Most retries for any one request
+        :type maxRetries: int
+        :param retryBudget: Most retries for all requests together
+        :type retryBudget: int
+        :param backoffBase: Seconds of the first backoff; doubled for each later retry
+        :type backoffBase: float
+        :param backoffMax: Most seconds of any backoff
+        :type backoffMax: float
+        """
+        self.maxConcurrency = max(1, maxConcurrency)
+        self.lowWatermark = lowWatermark
+        self.highWatermark = highWatermark
+        self.recoveryRate = recoveryRate
+        self.maxRetries = maxRetries
+        self.backoffBase = backoffBase
+        self.backoffMax = backoffMax
+
+        self._condition = threading.Condition()
+        self._concurrency = self.maxConcurrency
+        self._inFlight = 0
+        self._pausedUntil = 0.0
+        self.retryBudget = retryBudget
+        self._retryBudget = retryBudget
+
+        self.requestCount = 0
+        self.throttledCount = 0
+        self.retryCount = 0
+        self.lowestRemaining = None
+
+    def acquire(self):
+        """Wait until another request may be sent."""
+        with self._condition:
+            while True:
+                pause = self._pausedUntil - time.monotonic()
+                if pause > 0:
+                    self._condition.wait(pause)
+                elif self._inFlight >= self._concurrency:
+                    self._condition.wait()
+                else:
+                    break
+            self._inFlight += 1
+            self.requestCount += 1
+
+    def release(self, response=None):
+        """
+        Record that a request finished, adjusting the pace from its response.
+
+        :param response: Response of the request, if there is one
+        :type response: requests.Response or None
+        """
+        with self._condition:
+            self._inFlight -= 1
+            if response is not None:
+                self._adjust(response)
+            self._condition.notify_all()
+
+    def _adjust(self, response):
+        remaining = response.headers.get(HTTP_HEADER_RATE_LIMIT_REMAINING)
+        try:
+            remaining = float(remaining)
+        except (TypeError, ValueError):
+            return
+
+        if self.lowestRemaining is None or remaining < self.lowestRemaining:
+            self.lowestRemaining = remaining
+
+        if remaining < self.lowWatermark:
+            self._concurrency = max(1, self._concurrency // 2)
+            pauseSeconds = (self.lowWatermark - remaining) / self.recoveryRate
+            self._pausedUntil = max(self._pausedUntil, time.monotonic() + pauseSeconds)
+            logger.debug('Rate limit remaining {} (request cost {}): concurrency {}, pausing {:.1f}s'
+                         .format(remaining, response.headers.get(HTTP_HEADER_REQUEST_COST),
+                                 self._concurrency, pauseSeconds))
+        elif remaining > self.highWatermark and self._concurrency < self.maxConcurrency:
+            self._concurrency += 1
+
+    @staticmethod
+    def isThrottled(response):
+        """
+        :param response: Response to check
+        :type response: requests.Response
+        :return: Whether the API refused the request because of its rate limit
+        :rtype: bool
+        """
+        return response.status_code == 429 or \
+            (response.status_code == 403 and RATE_LIMIT_EXCEEDED_TEXT in response.text)
+
+    def isRetryable(self, response):
+        """
+        :param response: Response to check
+        :type response: requests.Response
+        :return: Whether the request may succeed if sent again
+        :rtype: bool
+        """
+        return self.isThrottled(response) or response.status_code >= 500
+
+    def takeRetry(self, attempt, response=None):
+        """
+        Check whether another retry is allowed, and count it if it is.
+        Throttled responses also slow down the requests that follow.
+
+        :param attempt: Number of retries already made for this request
+        :type attempt: int
+        :param response: Response of the failed attempt, if there is one
+        :type response: requests.Response or None
+        :return: Whether the request may be retried
+        :rtype: bool
+        """
+        with self._condition:
+            if response is not None and self.isThrottled(response):
+                self.throttledCount += 1
+                self._concurrency = max(1, self._concurrency // 2)
+
+            if attempt >= self.maxRetries or self._retryBudget <= 0:
+                return False
+
+            self._retryBudget -= 1
+            self.retryCount += 1
+            return True
+
+    def resetRetryBudget(self):
+        """Allow retryBudget more retries, e.g., for the next run of a long-lived process."""
+        with self._condition:
+            self._retryBudget = self.retryBudget
+
+    def backoffDelay(self, attempt):
+        """
+        :param attempt: Number of retries already made for this request
+        :type attempt: int
+        :return: Seconds to wait before the next retry, with "full jitter"
+        :rtype: float
+        """
+        return random.uniform(0, min(self.backoffMax, self.backoffBase * 2 ** attempt))
+
+    def stats(self):
+        """
+        :return: Request, throttle and retry counts, plus the current and lowest pace values
+        :rtype: dict
+        """
+        with self._condition:
+            return {
+                'requests': self.requestCount,
+                'throttled': self.throttledCount,
+                'retries': self.retryCount,
+                'retryBudgetLeft': self._retryBudget,
+                'concurrency': self._concurrency,
+                'lowestRateLimitRemaining': self.lowestRemaining,
+            }
@@ -0,0 +1,152 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class RequestsTransport(object):
+    """
+    The :class:`RequestsTransport<RequestsPlus.RequestsTransport>` object sends
+    HTTP requests with a requests Session.  Each call blocks until its response
+    is received.  A transport only sends requests; headers, retries and caching
+    are left to :class:`RequestsPlus<RequestsPlus.RequestsPlus>`.
+
+    All requests share the session's pool of connections, so connections
+    (and their TLS sessions) are kept alive and reused between requests.
+    """
+
+    def __init__(self, session=None, poolConnections=4, poolMaxSize=16, keepAlive=True):
+        """
+        :param session: (optional) Session to send requests with, instead of a new one
+        :type session: requests.Session
+        :param poolConnections: Number of hosts to keep a pool of connections for
+        :type poolConnections: int
+        :param poolMaxSize: Most connections kept open to any one host.  Connections
+            beyond these, opened when more requests are in flight at once, are closed after use.
+        :type poolMaxSize: int
+        :param keepAlive: Keep connections open for later requests
+        :type keepAlive: bool
+        """
+        self.session = session if isinstance(session, requests.Session) \
+            else requests.Session()
+
+        adapter = HTTPAdapter(pool_connections=poolConnections, pool_maxsize=poolMaxSize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        if not keepAlive:
+            self.session.headers['Connection'] = 'close'
+
+    def request(self, httpMethod, url, **kwargs):
+        """
+        :param httpMethod: Name of the HTTP method, e.g., "get"
+        :type httpMethod: str
+        :param url: URL of the request
+        :type url: str
+        :param kwargs: Arguments to pass to Session.request()
+        :return: Response object
+        :rtype: requests.Response
+        """
+        return self.session.request(httpMethod.upper(), url, **kwargs)
+
+    def send(self, preparedRequest, **kwargs):
+        """
+        :param preparedRequest: The request to be sent
+        :type preparedRequest: requests.PreparedRequest
+        :param kwargs: Arguments to pass to Session.send()
+        :return: Response object
+        :rtype: requests.Response
+        """
+        # Apply the same environment settings (e.g., CA bundle) as request() does.  Otherwise the
+        # connection pool key differs, and the request can't reuse the connections of earlier ones.
+        settings = self.session.merge_environment_settings(
+            preparedRequest.url, kwargs.pop('proxies', {}), kwargs.pop('stream', None),
+            kwargs.pop('verify', None), kwargs.pop('cert', None)
+        )
+        settings.update(kwargs)
+        return self.session.send(preparedRequest, **settings)
+
+    def prepare(self, request):
+        """
+        :param request: A request to prepare with the session's headers, etc.
+        :type request: requests.Request
+        :rtype: requests.PreparedRequest
+        """
+        return self.session.prepare_request(request)
+
+    def connectionStats(self):
+        """
+        Count the connections opened and the requests sent by the connection pools
+        currently open.
+
+        :return: Dictionary of "opened", "reused" and "requests" counts
+        :rtype: dict
+        """
+        connectionCount = requestCount = 0
+        for adapter in set(self.session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for poolKey in pools.keys():
+                pool = pools.get(poolKey)
+                if pool is not None:
+                    connectionCount += pool.num_connections
+                    requestCount += pool.num_requests
+
+        return {'opened': connectionCount, 'reused': max(requestCount - connectionCount, 0),
+                'requests': requestCount}
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncioTransport(object):
+    """
+    The :class:`AsyncioTransport<RequestsPlus.AsyncioTransport>` object makes a
+    blocking transport awaitable.  Each call runs on a pool of threads, so one
+    asyncio event loop can have as many requests in flight as there are
+    workers, while the transport's session and connections are shared with
+    synchronous callers.
+    """
+
+    def __init__(self, transport, maxWorkers=16):
+        """
+        :param transport: The transport requests are sent with
+        :type transport: RequestsTransport
+        :param maxWorkers: Most calls running at the same time
+        :type maxWorkers: int
+        """
+        self.transport = transport
+        self._executor = ThreadPoolExecutor(max_workers=maxWorkers, thread_name_prefix=self.__class__.__name__)
+
+    async def run(self, function, *args, **kwargs):
+        """
+        Call a blocking function on the worker threads and wait for its result
+        without blocking the event loop.
+
+        :param function: Function to call
+        :type function: callable
+        :return: Result of the function
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(function, *args, **kwargs))
+
+    async def request(self, httpMethod, url, **kwargs):
+        """
+        Like `RequestsTransport.request()`, but awaitable.
+
+        :rtype: requests.Response
+        """
+        return await self.run(self.transport.request, httpMethod, url, **kwargs)
+
+    async def send(self, preparedRequest, **kwargs):
+        """
+        Like `RequestsTransport.send()`, but awaitable.
+
+        :rtype: requests.Response
+        """
+        return await self.run(self.transport.send, preparedRequest, **kwargs)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.transport.close()
@@ -1,2 +1,5 @@
 from . RequestsPlus import *
 from . ResponseCollection import *
+from . HTTPCache import *
+from . Throttle import *
+from . Transport import *
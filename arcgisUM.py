@@ -3,13 +3,16 @@
 import datetime
 import json
 import logging
+import re
+import time
 import traceback
 from io import StringIO
 from operator import itemgetter
 
-import arcgis
 import dateutil.tz
 
+import profiling
+import syncEvents
 import util
 from configuration import config
 
@@ -44,11 +47,16 @@ MODIFY_MODES = {
 # Hold parsed options
 options = None
 
+# Messages of ArcGIS errors caused by a token that expired or was revoked
+AUTHENTICATION_ERROR_PATTERN = re.compile(r'invalid token|token required|token expired|error code: 49[89]',
+                                          re.IGNORECASE)
+
 # TODO: required in this module?
 courseLogHandlers = dict()
 courseLoggers = dict()
 
 
+@profiling.profiledCall('ArcGIS')
 def getArcGISConnection(securityinfo):
     """
     Get a connection object for ArcGIS based on configuration options
@@ -62,17 +70,69 @@ def getArcGISConnection(securityinfo):
     if not isinstance(securityinfo, dict):
         raise TypeError('Argument securityinfo type should be dict')
 
+    # arcgis takes seconds to import (with pandas, etc.), so it's only imported when it's needed.
+    import arcgis
+
     try:
         arcGIS = arcgis.GIS(securityinfo['org_url'],
                      securityinfo['username'],
                      securityinfo['password']);
     except RuntimeError as exp:
-        logger.error("RuntimeError: getArcGISConnection: {}".format(exp))
+        logger.error("RuntimeError: getArcGISConnection: %s", exp)
         raise RuntimeError(str('ArcGIS connection invalid: {}'.format(exp)))
     
     return arcGIS
 
 
+def isAuthenticationError(exception):
+    """
+    :param exception: Exception raised by an ArcGIS call
+    :type exception: Exception
+    :return: Whether the exception means a new connection must be made
+    :rtype: bool
+    """
+    return AUTHENTICATION_ERROR_PATTERN.search(str(exception)) is not None
+
+
+class ArcGISConnectionKeeper(object):
+    """
+    Keeps an ArcGIS connection for reuse by later sync runs.  A new connection
+    is made once the current one is maxAgeSeconds old, before its token
+    expires, or after it's invalidated (e.g., after an authentication error).
+    """
+
+    def __init__(self, securityinfo, maxAgeSeconds=60 * 60):
+        """
+        :param securityinfo: Connection settings; see getArcGISConnection()
+        :type securityinfo: dict
+        :param maxAgeSeconds: Most seconds a connection is reused
+        :type maxAgeSeconds: int or float
+        """
+        self.securityinfo = securityinfo
+        self.maxAgeSeconds = maxAgeSeconds
+        self.connectCount = 0
+        self._connection = None
+        self._connectTime = 0.0
+
+    def get(self):
+        """
+        :return: Connection object for the ArcGIS service, made now if necessary
+        :rtype: arcgis.GIS
+        """
+        if self._connection is None or time.monotonic() - self._connectTime >= self.maxAgeSeconds:
+            if self._connection is not None:
+                logger.info('Reconnecting to ArcGIS after %.0f seconds', time.monotonic() - self._connectTime)
+            self._connection = getArcGISConnection(self.securityinfo)
+            self._connectTime = time.monotonic()
+            self.connectCount += 1
+        return self._connection
+
+    def invalidate(self):
+        """Have the next get() make a new connection."""
+        self._connection = None
+
+
+@profiling.profiledCall('ArcGIS')
 def getArcGISGroupByTitle(arcGISAdmin, title):
     """
     Given a possible title of a group, search for it in ArcGIS
@@ -87,12 +147,14 @@ def getArcGISGroupByTitle(arcGISAdmin, title):
     """
     escapedTitle = title.translate(str.maketrans({ '"':  r'\"' }))
     searchString = f'title:"{escapedTitle}"'
-    logger.debug("group search string: escaped: {}".format(searchString))
+    logger.debug('group search string: escaped: %s', searchString)
     
     try:
         gis_groups = arcGISAdmin.groups.search(searchString)
     except RuntimeError as exp:
-        logger.error("arcGIS error finding group: {} exception: {}".format(searchString,exp))
+        if isAuthenticationError(exp):
+            raise
+        logger.error("arcGIS error finding group: %s exception: %s", searchString, exp)
         return None
     
     if len(gis_groups) > 0:
@@ -101,10 +163,48 @@ def getArcGISGroupByTitle(arcGISAdmin, title):
     return None
 
 
-def modifyUsersInGroup(group: object, users: list, mode: str, instructorLog: str):
-    """Depending on the mode, add or remove users from the given ArcGIS group"""
+@profiling.profiledCall('ArcGIS')
+def getArcGISGroupsByTags(arcGISAdmin, tags, maxGroups=10000):
+    """
+    Search once for all groups having every one of the given tags, and index
+    them by title.  The ArcGIS API pages through the search results itself.
+
+    :param arcGISAdmin: ArcGIS Administration REST service connection object
+    :type arcGISAdmin: arcgis.GIS
+    :param tags: Tags every group found must have
+    :type tags: list or tuple of str
+    :param maxGroups: Maximum number of groups to be found
+    :type maxGroups: int
+    :return: Dictionary of ArcGIS Group objects keyed by title, or None if the search failed
+    :rtype: dict or None
+    """
+    searchString = ' AND '.join('tags:"{}"'.format(tag) for tag in tags)
+    logger.debug("group search string: tags: %s", searchString)
+
+    try:
+        gis_groups = arcGISAdmin.groups.search(searchString, max_groups=maxGroups)
+    except RuntimeError as exp:
+        if isAuthenticationError(exp):
+            raise
+        logger.error("arcGIS error finding groups: %s exception: %s", searchString, exp)
+        return None
+
+    if len(gis_groups) >= maxGroups:
+        logger.warning("arcGIS group search found the maximum of %d groups: %s", maxGroups, searchString)
+
+    groupIndex = {}
+    for group in gis_groups:
+        groupIndex[group.title] = group
+
+    logger.info("Found %d existing ArcGIS groups tagged %s", len(groupIndex), tags)
+    return groupIndex
+
+
+def modifyUsersInGroup(group: object, users: list, mode: str, groupReport=None):
+    """Depending on the mode, add or remove users from the given ArcGIS group, and record the changes in groupReport
+    (a courseReport.GroupReport), if given.  Return the ArcGIS usernames not added or removed."""
 
-    logger.info("modifyUsersInGroup: enter")
+    logger.debug('modifyUsersInGroup: enter')
     groupNameAndID = util.formatNameAndID(group)
 
     # Set mode-specific methods and variables
@@ -112,89 +212,160 @@ def modifyUsersInGroup(group: object, users: list, mode: str, instructorLog: str
         modeDict = MODIFY_MODES[mode]
         verb, verbStem, verbPrep, methodName = itemgetter("verb", "verbStem", "verbPrep", "methodName")(modeDict)
         modifyUsersMethod = getattr(group, methodName)
-        logger.debug(modifyUsersMethod)
+        logger.debug('modifyUsersInGroup: method: %s', modifyUsersMethod)
     else:
         logger.error("Function was called with an invalid mode: " + mode)
 
     if len(users) == 0:
-        logger.info(f"No users to {verb} {verbPrep} ArcGIS Group {groupNameAndID}")
-        instructorLog += f"No users were {verbStem}ed.\n\n"
-        logger.debug(f"modifyUsersInGroup: instructorLog: [\n{instructorLog}\n]")
-        return instructorLog
+        logger.info('No users to %s %s ArcGIS Group %s', verb, verbPrep, groupNameAndID)
+        if groupReport is not None:
+            groupReport.recordChanges(mode, 0, [])
+        return []
 
-    logger.info(f"{verbStem}ing Canvas Users {verbPrep} ArcGIS Group {groupNameAndID}: {users}")
+    logger.info('%sing Canvas Users %s ArcGIS Group %s: %s', verbStem, verbPrep, groupNameAndID, users)
 
     # Change Canvas usernames to the ArcGIS format
     # (ArcGIS usernames are U-M uniqnames with the ArcGIS organization name appended)
     arcGISFormatUsers = formatUsersNamesForArcGIS(users)
-    logger.debug(f"modifyUsersInGroup: formatted: {arcGISFormatUsers}")
+    logger.debug('modifyUsersInGroup: formatted: %s', arcGISFormatUsers)
 
-    listsOfFormattedUsernames = util.splitListIntoSublists(arcGISFormatUsers, 20)
-    usersNotModified = []
+    listsOfFormattedUsernames = util.splitListIntoSublists(arcGISFormatUsers, config.ArcGIS.USER_BATCH_SIZE)
+
+    batchSeconds = {}
 
-    for listOfFormattedUsernames in listsOfFormattedUsernames:
+    def modifyBatch(batchIndex):
+        startTime = time.time()
         try:
-            results = modifyUsersMethod(listOfFormattedUsernames)
-            logger.debug(f"{verbStem}ing: results: {results}")
-            usersNotModified += results.get(f"not{verbStem.capitalize()}ed")
-        except RuntimeError as exception:
-            logger.error(f"Exception while {verbStem}ing users {verbPrep} ArcGIS group '{groupNameAndID}': {exception}")
-            return None
+            return modifyUserBatchInGroup(modifyUsersMethod, listsOfFormattedUsernames[batchIndex],
+                                          verbStem, verbPrep, groupNameAndID)
+        finally:
+            batchSeconds[batchIndex] = time.time() - startTime
+
+    # Batches are independent, so they're sent at the same time.  Results are gathered in batch order.
+    results, exceptions = util.mapConcurrently(modifyBatch, range(len(listsOfFormattedUsernames)),
+                                               config.ArcGIS.USER_BATCH_WORKERS)
+    for exception in exceptions.values():
+        if isAuthenticationError(exception):
+            raise exception
+    usersNotModified = []
+
+    for (batchIndex, listOfFormattedUsernames) in enumerate(listsOfFormattedUsernames):
+        if batchIndex in exceptions:
+            logger.error("Exception while %sing users %s ArcGIS group '%s': %s", verbStem, verbPrep, groupNameAndID,
+                         exceptions[batchIndex])
+            batchNotModified = list(listOfFormattedUsernames)
+        else:
+            batchNotModified = results[batchIndex]
+        usersNotModified += batchNotModified
+
+        syncEvents.record('users_batch', group=group.title, groupID=group.id, mode=mode,
+                          users=len(listOfFormattedUsernames), notChanged=len(batchNotModified),
+                          seconds=round(batchSeconds.get(batchIndex, 0.0), 3), error=exceptions.get(batchIndex))
+        for username in batchNotModified:
+            syncEvents.record('user_not_changed', group=group.title, groupID=group.id, mode=mode, username=username)
 
     usersModifiedCount = len(arcGISFormatUsers) - len(usersNotModified)
-    logger.debug(f"usersModifiedCount: {usersModifiedCount}")
-    instructorLog += f"Number of users {verbStem}ed {verbPrep} group: [{usersModifiedCount}]\n\n"
+    logger.debug('usersModifiedCount: %d', usersModifiedCount)
     if usersNotModified:
         notModifiedMessage = f"Some or all users not {verbStem}ed {verbPrep} ArcGIS group"
         if mode == "add":
             notModifiedMessage += " (These users likely need ArcGIS accounts set up)"
-        logger.warning(
-            f"Warning: {notModifiedMessage} {groupNameAndID} : {usersNotModified}"
-        )
-        instructorLog += f"{notModifiedMessage}:\n" + "\n".join(
-            ["* " + userNotModified for userNotModified in usersNotModified]
-        ) + "\n"
+        logger.warning('Warning: %s %s : %s', notModifiedMessage, groupNameAndID, usersNotModified)
+
+    if groupReport is not None:
+        groupReport.recordChanges(mode, usersModifiedCount, usersNotModified)
+    return usersNotModified
+
+
+@profiling.profiledCall('ArcGIS')
+def modifyUserBatchInGroup(modifyUsersMethod, listOfFormattedUsernames, verbStem, verbPrep, groupNameAndID):
+    """
+    Send one batch of users to be added to or removed from an ArcGIS group.  The batch
+    is retried up to config.ArcGIS.USER_BATCH_RETRIES times if ArcGIS raises an error,
+    except an authentication error, which is raised since retrying with the same token can't succeed.
+
+    :return: Users of the batch that were not added or removed, which is the whole batch if every attempt failed
+    :rtype: list of str
+    """
+    attempts = 1 + config.ArcGIS.USER_BATCH_RETRIES
+
+    for attempt in range(1, attempts + 1):
+        try:
+            results = modifyUsersMethod(listOfFormattedUsernames)
+            logger.debug('%sing: results: %s', verbStem, results)
+            return results.get(f"not{verbStem.capitalize()}ed") or []
+        except RuntimeError as exception:
+            if isAuthenticationError(exception):
+                raise
+            logger.error("Exception while %sing users %s ArcGIS group '%s' (attempt %d of %d): %s",
+                         verbStem, verbPrep, groupNameAndID, attempt, attempts, exception)
+            if attempt < attempts:
+                time.sleep(attempt)
 
-    logger.debug(f"modifyUsersInGroup: instructorLog: [\n{instructorLog}\n]")
-    return instructorLog
+    return list(listOfFormattedUsernames)
 
 
+@profiling.profiledCall('ArcGIS')
 def getCurrentArcGISMembers(group, groupNameAndID):
     groupAllMembers = {}
 
     try:
         groupAllMembers = group.get_members()
     except RuntimeError as exception:
-        logger.error('Exception while getting users for ArcGIS group "{}": {}'.format(groupNameAndID, exception))
+        if isAuthenticationError(exception):
+            raise
+        logger.error('Exception while getting users for ArcGIS group "%s": %s', groupNameAndID, exception)
             
     groupUsers = groupAllMembers.get('users')
     """:type groupUsers: list"""
     return groupUsers
 
 
-def createNewArcGISGroup(arcGIS, groupTags, groupTitle,instructorLog):
-    """Create a new ArgGIS group.  Return group and any creation messages."""
+@profiling.profiledCall('ArcGIS')
+def createNewArcGISGroup(arcGIS, groupTags, groupTitle, groupReport=None):
+    """Create a new ArgGIS group, and record the attempt in groupReport (a courseReport.GroupReport), if given.
+    Return the group, or None if it couldn't be created."""
     group=None
     
-    logger.info('Creating ArcGIS group: "{}"'.format(groupTitle))
-    instructorLog += 'Creating ArcGIS group: "{}"\n'.format(groupTitle)
+    logger.info('Creating ArcGIS group: "%s"', groupTitle)
+    if groupReport is not None:
+        groupReport.created = True
+    startTime = time.time()
+    error = None
     try:
         group = arcGIS.groups.create(groupTitle,groupTags)
     except RuntimeError as exception:
-        logger.exception('Exception while creating ArcGIS group "{}": {}'.format(groupTitle, exception))
-    
-    return group, instructorLog
+        if isAuthenticationError(exception):
+            raise
+        error = exception
+        logger.exception('Exception while creating ArcGIS group "%s": %s', groupTitle, exception)
+
+    syncEvents.record('group_create', group=groupTitle, groupID=group.id if group is not None else None,
+                      succeeded=group is not None, seconds=round(time.time() - startTime, 3), error=error)
+    return group
 
 
 # Get ArcGIS group with this title (if it exists)
-def lookForExistingArcGISGroup(arcGIS, groupTitle):
-    """Find an ArgGIS group with a matching title."""
-    logger.info('Searching for existing ArcGIS group "{}"'.format(groupTitle))
+def lookForExistingArcGISGroup(arcGIS, groupTitle, groupIndex=None):
+    """Find an ArgGIS group with a matching title.  Look in groupIndex (from getArcGISGroupsByTags) first, if given."""
+    if groupIndex is not None and groupTitle in groupIndex:
+        logger.info('Found existing ArcGIS group "%s" in group index', groupTitle)
+        syncEvents.record('group_lookup', group=groupTitle, source='index', found=True, seconds=0.0)
+        return groupIndex[groupTitle]
+
+    # Groups missing from the index might have been created without the expected tags.
+    logger.info('Searching for existing ArcGIS group "%s"', groupTitle)
+    startTime = time.time()
+    group = None
     try:
             group = getArcGISGroupByTitle(arcGIS, groupTitle)
     except RuntimeError as exception:
-            logger.exception('Exception while searching for ArcGIS group "{}": {}'.format(groupTitle, exception))
-            
+            if isAuthenticationError(exception):
+                raise
+            logger.exception('Exception while searching for ArcGIS group "%s": %s', groupTitle, exception)
+
+    syncEvents.record('group_lookup', group=groupTitle, source='search', found=group is not None,
+                      seconds=round(time.time() - startTime, 3))
     return group
 
 
@@ -204,7 +375,10 @@ def formatUsersNamesForArcGIS(userList):
     return userList
 
 
-def updateArcGISItem(item: arcgis.gis.Item, data: dict):
+@profiling.profiledCall('ArcGIS')
+def updateArcGISItem(item: 'arcgis.gis.Item', data: dict):
+    import arcgis
+
     itemType = arcgis.gis.Item
     assert isinstance(item, itemType), '"item" is not type "' + str(itemType) + '"'
     dataType = dict
@@ -0,0 +1,135 @@
+"""
+A local stand-in for the parts of the ArcGIS API for Python kartograafr uses:
+``arcgis.GIS`` and its groups (search, create, members, adding and removing
+users).  Every call can be delayed, and is counted and logged.  Calls on a
+group can be made to fail, as can adding users whose names start with
+``FAILING_USER_PREFIX``; users whose names start with ``NO_ACCOUNT_PREFIX``
+are not added.
+
+Used by the benchmarks in place of ``arcgis.GIS``, and by the tests.
+"""
+
+import itertools
+import re
+import threading
+import time
+from collections import Counter
+
+NO_ACCOUNT_PREFIX = 'noaccount'
+FAILING_USER_PREFIX = 'failing'
+
+
+def groupID(number):
+    """ID of the ``number``th group created on a ``FakeGIS``, counting from 1."""
+    return '{:032x}'.format(number)
+
+
+class FakeArcGISStats(object):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.callCounts = Counter()
+
+    def count(self, name):
+        with self._lock:
+            self.callCounts[name] += 1
+
+    def stats(self):
+        with self._lock:
+            return {'calls': sum(self.callCounts.values()), 'functions': dict(self.callCounts)}
+
+
+class FakeGroup(object):
+    def __init__(self, gis, groupID, title, tags):
+        self._gis = gis
+        self.id = groupID
+        self.groupid = groupID
+        self.title = title
+        self.tags = list(tags)
+        self.members = set()
+        self._lock = threading.Lock()
+
+    def _call(self, name):
+        self._gis.call(name, self.title)
+        time.sleep(self._gis.delays.get(self.title, 0))
+        if self.title in self._gis.failures:
+            raise self._gis.failures[self.title]
+
+    def get_members(self):
+        self._call('get_members')
+        with self._lock:
+            return {'owner': 'admin', 'admins': ['admin'], 'users': sorted(self.members)}
+
+    def add_users(self, usernames):
+        self._call('add_users')
+        if any(username.startswith(FAILING_USER_PREFIX) for username in usernames):
+            raise RuntimeError('Unable to add users to group {}'.format(self.title))
+        with self._lock:
+            notAdded = [username for username in usernames if username.startswith(NO_ACCOUNT_PREFIX)]
+            self.members.update(username for username in usernames if username not in notAdded)
+        return {'notAdded': notAdded}
+
+    def remove_users(self, usernames):
+        self._call('remove_users')
+        with self._lock:
+            self.members.difference_update(usernames)
+        return {'notRemoved': []}
+
+
+class FakeGroupManager(object):
+    TAG_PATTERN = re.compile(r'tags:"([^"]*)"')
+    TITLE_PATTERN = re.compile(r'^title:"(.*)"$')
+
+    def __init__(self, gis):
+        self._gis = gis
+        self.groups = {}
+        self._groupIDs = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def search(self, query='', sort_field='title', sort_order='asc', max_groups=1000, **kwargs):
+        self._gis.call('groups.search', query)
+        with self._lock:
+            groups = list(self.groups.values())
+
+        titleMatch = self.TITLE_PATTERN.match(query)
+        if titleMatch:
+            title = titleMatch.group(1).replace(r'\"', '"')
+            return [group for group in groups if group.title == title][:max_groups]
+
+        tags = self.TAG_PATTERN.findall(query)
+        return [group for group in groups if all(tag in group.tags for tag in tags)][:max_groups]
+
+    def create(self, title, tags, **kwargs):
+        self._gis.call('groups.create', title)
+        if isinstance(tags, str):
+            tags = [tag.strip() for tag in tags.split(',')]
+        with self._lock:
+            group = FakeGroup(self._gis, groupID(next(self._groupIDs)), title, tags)
+            self.groups[group.id] = group
+        return group
+
+
+class FakeGIS(object):
+    """
+    Takes the place of ``arcgis.GIS``; all instances share the latency and the call counts of the class.
+
+    Each instance logs its calls in ``calls`` as ``(name, subject)`` pairs, the subject being the query or the group
+    title.  Calls on the groups titled in ``delays`` take that many more seconds, and calls on the groups titled in
+    ``failures`` raise that exception.
+    """
+    latency = 0.0
+    stats = FakeArcGISStats()
+
+    def __init__(self, url=None, username=None, password=None, **kwargs):
+        self.url = url
+        self.calls = []
+        self.delays = {}
+        self.failures = {}
+        self._lock = threading.Lock()
+        self.groups = FakeGroupManager(self)
+
+    def call(self, name, subject):
+        self.stats.count(name)
+        with self._lock:
+            self.calls.append((name, subject))
+        if self.latency:
+            time.sleep(self.latency)
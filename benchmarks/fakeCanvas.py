@@ -0,0 +1,261 @@
+"""
+A local stand-in for the parts of the Canvas REST API kartograafr uses,
+with synthetic courses, assignments and rosters generated on demand.
+
+Lists are paginated with "Link" headers like Canvas's (numeric pages, with
+"next" and "last" links), every response can be delayed, and a leaky bucket
+quota is reported in "X-Rate-Limit-Remaining" / "X-Request-Cost" headers.
+Requests are refused with 403 "Rate Limit Exceeded" when the quota runs out.
+
+Used by scaleBenchmark.py; it can also be run alone for manual testing::
+
+    python benchmarks/fakeCanvas.py --courses 10 --students 50 --port 8900
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+OUTCOME_ID = 4353  # config.Canvas.TARGET_OUTCOME_ID
+CONFIG_COURSE_ID = 1
+CONFIG_COURSE_PAGE_NAME = 'course-ids'
+FIRST_COURSE_ID = 1001
+DUE_AT = '2099-12-31T23:59:59Z'
+
+
+class FakeCanvasData(object):
+    """Synthetic Canvas data: each course has one teacher and some students, and some assignments aligned with the outcome."""
+
+    def __init__(self, courseCount=10, studentCount=50, assignmentCount=2):
+        self.courseIDs = list(range(FIRST_COURSE_ID, FIRST_COURSE_ID + courseCount))
+        self.studentCount = studentCount
+        self.assignmentCount = assignmentCount
+
+    def hasCourse(self, courseID):
+        return courseID in self.courseIDs
+
+    def course(self, courseID):
+        return {'id': courseID, 'name': 'Course {}'.format(courseID), 'course_code': 'C{}'.format(courseID),
+                'workflow_state': 'available', 'enrollment_term_id': 1}
+
+    def outcome(self):
+        return {'id': OUTCOME_ID, 'title': 'kartograafr', 'context_type': 'Account'}
+
+    def configPage(self, baseURL):
+        links = ''.join('<li><a href="{}/courses/{}">Course {}</a></li>'.format(baseURL, courseID, courseID)
+                        for courseID in self.courseIDs)
+        return {'title': CONFIG_COURSE_PAGE_NAME, 'url': CONFIG_COURSE_PAGE_NAME, 'body': '<ul>{}</ul>'.format(links)}
+
+    def outcomeGroupLinks(self, courseID):
+        return [{'url': '/api/v1/courses/{}/outcome_groups/1/outcomes/{}'.format(courseID, OUTCOME_ID),
+                 'outcome': {'id': OUTCOME_ID, 'title': 'kartograafr'}}]
+
+    def assignments(self, courseID):
+        return [{'id': courseID * 100 + number, 'name': 'Map {}'.format(number), 'course_id': courseID,
+                 'unlock_at': None, 'due_at': DUE_AT, 'lock_at': None, 'description': 'x' * 200,
+                 'rubric': [{'id': '_1', 'outcome_id': OUTCOME_ID, 'points': 5}]}
+                for number in range(self.assignmentCount)]
+
+    def rosterSize(self, courseID):
+        return 1 + self.studentCount
+
+    def enrollment(self, courseID, index):
+        userID = courseID * 100000 + index
+        enrollmentType = 'TeacherEnrollment' if index == 0 else 'StudentEnrollment'
+        return {
+            'id': userID * 10, 'user_id': userID, 'course_id': courseID, 'type': enrollmentType,
+            'role': enrollmentType, 'enrollment_state': 'active',
+        }
+
+    def user(self, courseID, index):
+        userID = courseID * 100000 + index
+        login = ('teacher{}' if index == 0 else 'student{}').format(userID)
+        user = {'id': userID, 'name': login.title(), 'sortable_name': login, 'login_id': login,
+                'email': login + '@umich.edu', 'enrollments': [self.enrollment(courseID, index)]}
+        return user
+
+
+class FakeCanvasServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, data, port=0, pageSize=10, latency=0.0, quota=700.0, requestCost=0.1, recoveryRate=10.0):
+        """
+        :param data: The synthetic Canvas data to serve
+        :type data: FakeCanvasData
+        :param port: Port to listen on; any free port if 0
+        :param pageSize: Items per page when the request has no "per_page" param
+        :param latency: Seconds every response is delayed
+        :param quota: Rate limit bucket size, as in Canvas's "X-Rate-Limit-Remaining"
+        :param requestCost: Quota each request takes
+        :param recoveryRate: Quota restored per second
+        """
+        super(FakeCanvasServer, self).__init__(('127.0.0.1', port), FakeCanvasHandler)
+        self.data = data
+        self.pageSize = pageSize
+        self.latency = latency
+        self.quota = quota
+        self.requestCost = requestCost
+        self.recoveryRate = recoveryRate
+        self.requestCounts = Counter()
+        self.rateLimitedCount = 0
+        self._lock = threading.Lock()
+        self._remaining = quota
+        self._lastRefill = time.monotonic()
+
+    @property
+    def baseURL(self):
+        return 'http://{}:{}'.format(*self.server_address)
+
+    def takeQuota(self, endpoint):
+        """
+        Count a request, and take its cost from the quota.
+
+        :return: Remaining quota, or None if the request must be refused
+        """
+        with self._lock:
+            self.requestCounts[endpoint] += 1
+            now = time.monotonic()
+            self._remaining = min(self.quota, self._remaining + (now - self._lastRefill) * self.recoveryRate)
+            self._lastRefill = now
+            if self._remaining < self.requestCost:
+                self.rateLimitedCount += 1
+                return None
+            self._remaining -= self.requestCost
+            return self._remaining
+
+    def stats(self):
+        with self._lock:
+            return {'requests': sum(self.requestCounts.values()), 'rateLimited': self.rateLimitedCount,
+                    'endpoints': dict(self.requestCounts)}
+
+    def startInThread(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+class FakeCanvasHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    # (pattern, endpoint name); IDs are matched as the groups of each pattern
+    ROUTES = [
+        (re.compile(r'^/api/v1/outcomes/(\d+)$'), 'outcome'),
+        (re.compile(r'^/api/v1/courses/(\d+)/pages/([^/]+)$'), 'page'),
+        (re.compile(r'^/api/v1/courses/(\d+)/outcome_group_links$'), 'outcome_group_links'),
+        (re.compile(r'^/api/v1/courses/(\d+)/assignments$'), 'assignments'),
+        (re.compile(r'^/api/v1/courses/(\d+)/users$'), 'users'),
+        (re.compile(r'^/api/v1/courses/(\d+)$'), 'course'),
+    ]
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        urlParts = urlsplit(self.path)
+        params = parse_qs(urlParts.query)
+
+        for (pattern, endpoint) in self.ROUTES:
+            match = pattern.match(urlParts.path)
+            if match:
+                break
+        else:
+            return self.sendJSON(404, {'errors': [{'message': 'The specified resource does not exist.'}]})
+
+        remaining = self.server.takeQuota(endpoint)
+        if remaining is None:
+            return self.sendText(403, 'Rate Limit Exceeded\n')
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        data = self.server.data
+        ids = [int(group) if group.isdigit() else group for group in match.groups()]
+        headers = {'X-Rate-Limit-Remaining': '{:.3f}'.format(remaining),
+                   'X-Request-Cost': '{:.3f}'.format(self.server.requestCost)}
+
+        if endpoint == 'outcome':
+            if ids[0] != OUTCOME_ID:
+                return self.sendJSON(404, {'errors': [{'message': 'not found'}]}, headers)
+            return self.sendJSON(200, data.outcome(), headers)
+        if endpoint == 'page':
+            return self.sendJSON(200, data.configPage(self.server.baseURL), headers)
+
+        courseID = ids[0]
+        if not data.hasCourse(courseID):
+            return self.sendJSON(404, {'errors': [{'message': 'The specified resource does not exist.'}]}, headers)
+
+        if endpoint == 'course':
+            return self.sendJSON(200, data.course(courseID), headers)
+        if endpoint == 'outcome_group_links':
+            return self.sendPage(data.outcomeGroupLinks(courseID), urlParts, params, headers)
+        if endpoint == 'assignments':
+            return self.sendPage(data.assignments(courseID), urlParts, params, headers)
+
+        # Rosters are generated one page at a time, so large ones aren't kept in memory.
+        return self.sendPage(None, urlParts, params, headers, itemCount=data.rosterSize(courseID),
+                             makeItem=lambda index: data.user(courseID, index))
+
+    def sendPage(self, items, urlParts, params, headers, itemCount=None, makeItem=None):
+        page = int(params.get('page', ['1'])[-1])
+        pageSize = int(params.get('per_page', [self.server.pageSize])[-1])
+        itemCount = len(items) if items is not None else itemCount
+        lastPage = max(1, -(-itemCount // pageSize))
+
+        start = (page - 1) * pageSize
+        indexes = range(start, min(start + pageSize, itemCount))
+        pageItems = [items[index] for index in indexes] if items is not None else [makeItem(index) for index in indexes]
+
+        def pageURL(pageNumber):
+            pageParams = dict(params, page=[str(pageNumber)], per_page=[str(pageSize)])
+            return '{}{}?{}'.format(self.server.baseURL, urlParts.path, urlencode(pageParams, doseq=True))
+
+        links = ['<{}>; rel="current"'.format(pageURL(page)), '<{}>; rel="first"'.format(pageURL(1)),
+                 '<{}>; rel="last"'.format(pageURL(lastPage))]
+        if page < lastPage:
+            links.append('<{}>; rel="next"'.format(pageURL(page + 1)))
+        headers = dict(headers, Link=','.join(links))
+
+        return self.sendJSON(200, pageItems, headers)
+
+    def sendJSON(self, status, body, headers=None):
+        self.sendBody(status, json.dumps(body).encode(), 'application/json; charset=utf-8', headers)
+
+    def sendText(self, status, text, headers=None):
+        self.sendBody(status, text.encode(), 'text/plain', headers)
+
+    def sendBody(self, status, body, contentType, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', contentType)
+        self.send_header('Content-Length', str(len(body)))
+        for (name, value) in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    argumentParser = argparse.ArgumentParser(description='Serve synthetic Canvas data.')
+    argumentParser.add_argument('--courses', type=int, default=10)
+    argumentParser.add_argument('--students', type=int, default=50)
+    argumentParser.add_argument('--assignments', type=int, default=2)
+    argumentParser.add_argument('--page-size', type=int, default=10)
+    argumentParser.add_argument('--latency', type=float, default=0.0)
+    argumentParser.add_argument('--port', type=int, default=8900)
+    options = argumentParser.parse_args()
+
+    server = FakeCanvasServer(FakeCanvasData(options.courses, options.students, options.assignments),
+                              port=options.port, pageSize=options.page_size, latency=options.latency)
+    print('Serving fake Canvas at {}/api/v1 (config course {})'.format(server.baseURL, CONFIG_COURSE_ID))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
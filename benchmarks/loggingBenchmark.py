@@ -0,0 +1,145 @@
+"""
+Measure how much logging adds to syncing ArcGIS group members, per 1,000 users.
+
+Groups of the ArcGIS stand-in (fakeArcGIS.py) are synced with
+main.updateGroupUsers(): first with logging off, then with the main log file
+and stdout (sent to /dev/null) written directly by the logging threads, then
+written by logPipeline.LogPipeline, as kartograafr does.  The overhead of each
+is its time less the time with logging off, e.g.::
+
+    python benchmarks/loggingBenchmark.py
+    python benchmarks/loggingBenchmark.py --users 5000 --groups 20 --level DEBUG
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+BENCHMARKS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+REPOSITORY_DIRECTORY = os.path.dirname(BENCHMARKS_DIRECTORY)
+sys.path.insert(0, REPOSITORY_DIRECTORY)
+sys.path.insert(0, BENCHMARKS_DIRECTORY)
+
+from fakeArcGIS import FakeGIS  # noqa: E402
+
+import main  # noqa: E402
+from configuration import config  # noqa: E402
+from courseReport import GroupReport  # noqa: E402
+
+MODES = ('off', 'direct', 'pipeline')
+
+
+def syncGroups(groupCount, userCount):
+    """
+    Sync groups that each have half of the course's users already, and as many users who left the course.
+
+    :return: Seconds taken
+    :rtype: float
+    """
+    arcGIS = FakeGIS()
+    course = SimpleNamespace(id=1, name='Benchmark')
+    courseUserIndex = {course.id: {None: [SimpleNamespace(login_id='user{}'.format(number))
+                                          for number in range(userCount)]}}
+
+    groups = []
+    for number in range(groupCount):
+        group = arcGIS.groups.create('Benchmark_1_Map_{}'.format(number), 'kartograafr')
+        group.add_users(['{}{}_{}'.format(prefix, userNumber, config.ArcGIS.ORG_NAME)
+                         for prefix in ('user', 'left') for userNumber in range(userCount // 2)])
+        groups.append(group)
+
+    startTime = time.perf_counter()
+    for group in groups:
+        main.updateGroupUsers(courseUserIndex, course, GroupReport(group.title), group.title, group)
+    return time.perf_counter() - startTime
+
+
+def timeMode(mode, level, groupCount, userCount, directory):
+    """
+    :return: Seconds taken to sync, and to sync and finish writing the log
+    :rtype: tuple
+    """
+    root = logging.getLogger()
+    main.logger = logging.getLogger(config.Application.Logging.MAIN_LOGGER_NAME)
+    main.logFormatter = logging.Formatter('%(asctime)s|%(levelname)s|%(name)s|%(message)s')
+    main.loggingLevel = level
+    config.Application.Logging.DIRECTORY = directory
+    for logger in (root, main.logger):
+        logger.setLevel(logging.CRITICAL + 1 if mode == 'off' else level)
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        if mode == 'direct':
+            stdoutHandler = logging.StreamHandler(sys.stdout)
+            stdoutHandler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+            root.addHandler(stdoutHandler)
+            mainLogHandler = logging.FileHandler(main.getMainLogFilePath())
+            mainLogHandler.setFormatter(main.logFormatter)
+            main.logger.addHandler(mainLogHandler)
+        elif mode == 'pipeline':
+            main.startLogging()
+
+        syncSeconds = syncGroups(groupCount, userCount)
+        flushStartTime = time.perf_counter()
+        if mode == 'pipeline':
+            main.mainLogPipeline.flush()
+        writtenSeconds = syncSeconds + time.perf_counter() - flushStartTime
+
+        if mode == 'direct':
+            root.removeHandler(stdoutHandler)
+            main.logger.removeHandler(mainLogHandler)
+            mainLogHandler.close()
+        elif mode == 'pipeline':
+            main.stopLogging()
+
+    return syncSeconds, writtenSeconds
+
+
+def main_():
+    argumentParser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    argumentParser.add_argument('--users', type=int, default=2000, help='users in the course')
+    argumentParser.add_argument('--groups', type=int, default=10, help='groups synced in each repetition')
+    argumentParser.add_argument('--level', default='INFO', help='log level, as Logging_Level')
+    argumentParser.add_argument('--repeat', type=int, default=5, help='repetitions of each mode')
+    argumentParser.add_argument('--json', dest='jsonPath', help='also write the results to this JSON file')
+    options = argumentParser.parse_args()
+
+    thousandsOfUsers = options.groups * options.users / 1000
+    times = {mode: [] for mode in MODES}
+    with tempfile.TemporaryDirectory() as directory:
+        for _ in range(options.repeat):
+            for mode in MODES:
+                times[mode].append(timeMode(mode, options.level, options.groups, options.users, directory))
+
+    baseSeconds = statistics.median(syncSeconds for (syncSeconds, writtenSeconds) in times['off'])
+    results = []
+    print('{} groups of {} users at {}, median of {}'.format(options.groups, options.users, options.level,
+                                                            options.repeat))
+    print('{:>9} {:>11} {:>16} {:>22}'.format('mode', 'seconds', 'ms / 1k users', 'ms / 1k users written'))
+    for mode in MODES:
+        syncSeconds = statistics.median(syncSeconds for (syncSeconds, writtenSeconds) in times[mode])
+        writtenSeconds = statistics.median(writtenSeconds for (syncSeconds, writtenSeconds) in times[mode])
+        result = {
+            'mode': mode,
+            'seconds': round(syncSeconds, 4),
+            'overheadMsPer1000Users': round((syncSeconds - baseSeconds) * 1000 / thousandsOfUsers, 3),
+            'overheadMsPer1000UsersWritten': round((writtenSeconds - baseSeconds) * 1000 / thousandsOfUsers, 3),
+        }
+        results.append(result)
+        print('{mode:>9} {seconds:11.4f} {overheadMsPer1000Users:16.3f} {overheadMsPer1000UsersWritten:22.3f}'
+              .format(**result))
+
+    if options.jsonPath:
+        with open(options.jsonPath, 'w') as jsonFile:
+            json.dump({'users': options.users, 'groups': options.groups, 'level': options.level,
+                       'results': results}, jsonFile, indent=2)
+
+
+if __name__ == '__main__':
+    main_()
@@ -0,0 +1,88 @@
+"""
+Compare CanvasObject (Namespace with an object hook) and the slotted
+CanvasRecord types for parsing, attribute access and memory use, with
+a synthetic Canvas course users payload.
+
+Run from the repository root::
+
+    python benchmarks/recordBenchmark.py [--users 50000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from CanvasAPI.models import CanvasObject, User  # noqa: E402
+
+
+def makeUsersPayload(userCount):
+    """Make JSON like that of Canvas course users, including fields kartograafr never reads."""
+    return json.dumps([{
+        'id': userID,
+        'name': 'Student {}'.format(userID),
+        'created_at': '2024-08-20T12:00:00-04:00',
+        'sortable_name': '{}, Student'.format(userID),
+        'short_name': 'Student {}'.format(userID),
+        'sis_user_id': str(10000000 + userID),
+        'integration_id': None,
+        'login_id': 'student{}'.format(userID),
+        'email': 'student{}@umich.edu'.format(userID),
+        'avatar_url': 'https://umich.instructure.com/images/messages/avatar-50.png',
+        'enrollments': [{
+            'id': userID * 10,
+            'course_id': 366945,
+            'type': 'StudentEnrollment',
+            'enrollment_state': 'active',
+            'grades': {'html_url': 'https://umich.instructure.com/courses/366945/grades/{}'.format(userID)},
+        }],
+        'permissions': {'can_update_name': False, 'can_update_avatar': True, 'limit_parent_app_web_access': False},
+    } for userID in range(userCount)])
+
+
+def parseNamespace(payload):
+    return json.loads(payload, object_hook=lambda jsonObject: CanvasObject(**jsonObject))
+
+
+def parseRecords(payload):
+    return [User.fromJSON(jsonObject) for jsonObject in json.loads(payload)]
+
+
+def readLoginIDs(users):
+    return [user.login_id for user in users if user.login_id is not None]
+
+
+def measure(name, parse, payload, repeat):
+    parseSeconds = min(timeit.repeat(lambda: parse(payload), number=1, repeat=repeat))
+
+    tracemalloc.start()
+    users = parse(payload)
+    retainedBytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    accessSeconds = min(timeit.repeat(lambda: readLoginIDs(users), number=1, repeat=repeat))
+
+    print('{:<14} parse: {:8.1f} ms   read login_id: {:7.2f} ms   retained: {:8.1f} MiB ({:5.0f} B/user)'.format(
+        name, parseSeconds * 1000, accessSeconds * 1000,
+        retainedBytes / 2 ** 20, retainedBytes / len(users)))
+
+
+def main():
+    argumentParser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    argumentParser.add_argument('--users', type=int, default=50000, help='number of users in the payload')
+    argumentParser.add_argument('--repeat', type=int, default=3, help='best of this many runs')
+    options = argumentParser.parse_args()
+
+    payload = makeUsersPayload(options.users)
+    print('{} users, {:.1f} MiB of JSON'.format(options.users, len(payload) / 2 ** 20))
+
+    measure('CanvasObject', parseNamespace, payload, options.repeat)
+    measure('User record', parseRecords, payload, options.repeat)
+
+
+if __name__ == '__main__':
+    main()
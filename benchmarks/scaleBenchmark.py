@@ -0,0 +1,158 @@
+"""
+Run kartograafr end to end against the local Canvas and ArcGIS stand-ins
+(fakeCanvas.py, fakeArcGIS.py) at synthetic scales, and report the wall
+time, Canvas requests, ArcGIS calls and peak memory of each run.
+
+Each run is a separate process, so its peak memory is kartograafr's alone
+(the fake Canvas server runs in this process).  Scales are given as
+COURSESxSTUDENTS.  Settings from env.json can be changed to compare
+configurations, e.g.::
+
+    python benchmarks/scaleBenchmark.py --scales 10x50,100x500 --latency 0.02
+    python benchmarks/scaleBenchmark.py --scales 100x500 --setting Canvas_Max_Concurrent_Requests=32
+
+Larger scales (e.g., 1000x5000) work too, but take a while.
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARKS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+REPOSITORY_DIRECTORY = os.path.dirname(BENCHMARKS_DIRECTORY)
+sys.path.insert(0, BENCHMARKS_DIRECTORY)
+
+from fakeCanvas import CONFIG_COURSE_ID, FakeCanvasData, FakeCanvasServer  # noqa: E402
+
+RESULT_MARKER = 'SCALE_BENCHMARK_RESULT '
+
+
+def parseScale(scale):
+    (courseCount, studentCount) = scale.lower().split('x')
+    return int(courseCount), int(studentCount)
+
+
+def parseSetting(setting):
+    (key, value) = setting.split('=', 1)
+    try:
+        value = json.loads(value)
+    except ValueError:
+        pass
+    return key, value
+
+
+def runKartograafr(arcGISLatency):
+    """Run main.main() in this process with arcgis.GIS replaced, then print the result for the parent process."""
+    sys.path.insert(0, REPOSITORY_DIRECTORY)
+    sys.argv = ['main.py']
+
+    import arcgis
+    from fakeArcGIS import FakeGIS
+
+    FakeGIS.latency = arcGISLatency
+    arcgis.GIS = FakeGIS
+
+    import main
+
+    startTime = time.perf_counter()
+    main.main()
+    main.finishRun(True)
+    main.stopLogging()
+    wallSeconds = time.perf_counter() - startTime
+
+    result = {
+        'wallSeconds': round(wallSeconds, 3),
+        'peakMemoryMB': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'arcGIS': FakeGIS.stats.stats(),
+    }
+    print(RESULT_MARKER + json.dumps(result), flush=True)
+
+
+def runScale(courseCount, studentCount, options, settings):
+    server = FakeCanvasServer(FakeCanvasData(courseCount, studentCount, options.assignments),
+                              pageSize=options.page_size, latency=options.latency, requestCost=options.request_cost)
+    server.startInThread()
+
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            env = {
+                'Canvas_Base_URL': server.baseURL,
+                'Canvas_API_Token': 'benchmark',
+                'Canvas_Config_Course_ID': CONFIG_COURSE_ID,
+                'Logging_Directory': os.path.join(directory, 'log'),
+                'Logging_Level': options.log_level,
+                'ArcGIS_Org_Name': 'benchmark',
+                'ArcGIS_Username': 'benchmark',
+                'ArcGIS_Password': 'benchmark',
+            }
+            env.update(settings)
+            envFilePath = os.path.join(directory, 'env.json')
+            with open(envFilePath, 'w') as envFile:
+                json.dump(env, envFile)
+
+            completedProcess = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--run-kartograafr',
+                 '--arcgis-latency', str(options.arcgis_latency)],
+                cwd=REPOSITORY_DIRECTORY, env=dict(os.environ, ENV_FILE=envFilePath),
+                stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True,
+            )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    resultLines = [line for line in completedProcess.stdout.splitlines() if line.startswith(RESULT_MARKER)]
+    if completedProcess.returncode != 0 or not resultLines:
+        print(completedProcess.stdout[-5000:], file=sys.stderr)
+        raise RuntimeError('kartograafr run failed at scale {}x{}'.format(courseCount, studentCount))
+
+    result = json.loads(resultLines[-1][len(RESULT_MARKER):])
+    result.update({'courses': courseCount, 'students': studentCount, 'canvas': server.stats()})
+    return result
+
+
+def main():
+    argumentParser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    argumentParser.add_argument('--scales', default='10x50,100x500',
+                                help='comma-separated COURSESxSTUDENTS scales (default: %(default)s)')
+    argumentParser.add_argument('--assignments', type=int, default=2, help='assignments per course')
+    argumentParser.add_argument('--page-size', type=int, default=10, help='Canvas items per page')
+    argumentParser.add_argument('--latency', type=float, default=0.0, help='seconds added to each Canvas response')
+    argumentParser.add_argument('--request-cost', type=float, default=0.1,
+                                help='Canvas rate limit quota each request takes, of 700 restored at 10 per second')
+    argumentParser.add_argument('--arcgis-latency', type=float, default=0.0, help='seconds added to each ArcGIS call')
+    argumentParser.add_argument('--setting', action='append', default=[], metavar='KEY=VALUE',
+                                help='env.json setting for the runs; may be repeated')
+    argumentParser.add_argument('--log-level', default='WARNING', help='Logging_Level for the runs')
+    argumentParser.add_argument('--json', dest='jsonPath', help='also write the results to this JSON file')
+    argumentParser.add_argument('--run-kartograafr', action='store_true', help=argparse.SUPPRESS)
+    options = argumentParser.parse_args()
+
+    if options.run_kartograafr:
+        return runKartograafr(options.arcgis_latency)
+
+    settings = dict(parseSetting(setting) for setting in options.setting)
+    results = []
+
+    print('{:>8} {:>9} {:>10} {:>10} {:>12} {:>12} {:>12}'.format(
+        'courses', 'students', 'seconds', 'peak MB', 'Canvas reqs', 'rate limited', 'ArcGIS calls'))
+    for scale in options.scales.split(','):
+        (courseCount, studentCount) = parseScale(scale)
+        result = runScale(courseCount, studentCount, options, settings)
+        results.append(result)
+        print('{courses:>8} {students:>9} {wallSeconds:>10.2f} {peakMemoryMB:>10.1f} {canvasRequests:>12} '
+              '{rateLimited:>12} {arcGISCalls:>12}'.format(
+                  canvasRequests=result['canvas']['requests'], rateLimited=result['canvas']['rateLimited'],
+                  arcGISCalls=result['arcGIS']['calls'], **result), flush=True)
+
+    if options.jsonPath:
+        with open(options.jsonPath, 'w') as jsonFile:
+            json.dump({'settings': settings, 'results': results}, jsonFile, indent=2)
+
+
+if __name__ == '__main__':
+    main()
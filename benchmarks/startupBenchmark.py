@@ -0,0 +1,118 @@
+"""
+Measure how long importing kartograafr's modules takes, using Python's
+``-X importtime`` option, and list the slowest imports each one makes.
+
+Each import is timed in a new process, several times, and the median is
+reported, so a heavy package that's imported at module level again (instead
+of when it's first used) shows up here, e.g.::
+
+    python benchmarks/startupBenchmark.py
+    python benchmarks/startupBenchmark.py --modules main,arcgisUM --repeat 10 --top 5
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+BENCHMARKS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+REPOSITORY_DIRECTORY = os.path.dirname(BENCHMARKS_DIRECTORY)
+
+# A line of -X importtime output: "import time: <self us> | <cumulative us> | <indented module name>"
+IMPORT_TIME_PATTERN = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parseImportTimes(output):
+    """
+    :param output: stderr of a process run with -X importtime
+    :type output: str
+    :return: Tuples of (module name, nesting depth, cumulative microseconds), in the order they finished
+    :rtype: list of tuple
+    """
+    importTimes = []
+    for line in output.splitlines():
+        match = IMPORT_TIME_PATTERN.match(line)
+        if match:
+            (selfTime, cumulativeTime, indent, moduleName) = match.groups()
+            importTimes.append((moduleName, len(indent) // 2, int(cumulativeTime)))
+    return importTimes
+
+
+def timeImport(moduleName):
+    """
+    Import a module in a new process.
+
+    :return: Process wall seconds, and the import times of the module and everything it imported
+    :rtype: tuple
+    """
+    startTime = time.perf_counter()
+    completedProcess = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + moduleName],
+                                      cwd=REPOSITORY_DIRECTORY, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                      universal_newlines=True)
+    wallSeconds = time.perf_counter() - startTime
+    if completedProcess.returncode != 0:
+        print(completedProcess.stderr[-5000:], file=sys.stderr)
+        raise RuntimeError('Importing {} failed'.format(moduleName))
+    return wallSeconds, parseImportTimes(completedProcess.stderr)
+
+
+def benchmarkModule(moduleName, repeat, top):
+    wallTimes = []
+    totalTimes = []
+    importTimes = []
+    for _ in range(repeat):
+        (wallSeconds, importTimes) = timeImport(moduleName)
+        wallTimes.append(wallSeconds)
+        totalTimes.append(next(cumulativeTime for (name, depth, cumulativeTime) in importTimes
+                               if name == moduleName and depth == 0))
+
+    # The modules imported directly by this one, slowest first, from the last run.  Nested imports are listed
+    # before the module importing them, so they're the ones at depth 1 since the previous import at depth 0.
+    directImports = []
+    for (name, depth, cumulativeTime) in importTimes:
+        if depth == 0:
+            if name == moduleName:
+                break
+            directImports = []
+        elif depth == 1:
+            directImports.append((name, cumulativeTime))
+    directImports.sort(key=lambda item: item[1], reverse=True)
+
+    return {
+        'module': moduleName,
+        'importSeconds': round(statistics.median(totalTimes) / 1e6, 4),
+        'processSeconds': round(statistics.median(wallTimes), 4),
+        'slowestImports': [{'module': name, 'seconds': round(cumulativeTime / 1e6, 4)}
+                           for (name, cumulativeTime) in directImports[:top]],
+    }
+
+
+def main():
+    argumentParser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    argumentParser.add_argument('--modules', default='main,arcgisUM,CanvasAPI',
+                                help='comma-separated modules to import (default: %(default)s)')
+    argumentParser.add_argument('--repeat', type=int, default=5, help='imports of each module, in new processes')
+    argumentParser.add_argument('--top', type=int, default=8, help='slowest direct imports to list for each module')
+    argumentParser.add_argument('--json', dest='jsonPath', help='also write the results to this JSON file')
+    options = argumentParser.parse_args()
+
+    results = []
+    for moduleName in options.modules.split(','):
+        result = benchmarkModule(moduleName, options.repeat, options.top)
+        results.append(result)
+        print('{module}: import {importSeconds:.3f} s, process {processSeconds:.3f} s (median of {repeat})'
+              .format(repeat=options.repeat, **result))
+        for slowImport in result['slowestImports']:
+            print('    {seconds:8.3f} s  {module}'.format(**slowImport))
+
+    if options.jsonPath:
+        with open(options.jsonPath, 'w') as jsonFile:
+            json.dump({'python': sys.version.split()[0], 'results': results}, jsonFile, indent=2)
+
+
+if __name__ == '__main__':
+    main()
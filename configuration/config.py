@@ -2,18 +2,44 @@ import json, os
 
 ENV = {}
 
+# A missing file is only an error when kartograafr runs (see checkEnvFile()), so modules can be imported without one,
+# e.g., by tests, with the defaults below.
 env_file_path = os.getenv("ENV_FILE", "configuration/secrets/env.json")
+env_file_found = False
 try:
     with open(env_file_path) as env_file:
         ENV = json.load(env_file)
-except FileNotFoundError as fnfe:
-    raise RuntimeError(f'Config file "{env_file_path}" was not found.')
+    env_file_found = True
+except FileNotFoundError:
+    pass
+
+
+def checkEnvFile():
+    """Raise RuntimeError if the env JSON file was not found."""
+    if not env_file_found:
+        raise RuntimeError(f'Config file "{env_file_path}" was not found.')
+
+
+def parseBool(value):
+    """
+    :param value: A setting from the env JSON file: a JSON boolean, or "true" or "false" in any case
+    :type value: bool or str
+    :return: The setting as a boolean
+    :rtype: bool
+    :raises ValueError: If the setting is neither
+    """
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ('true', 'false'):
+        return value.strip().lower() == 'true'
+    raise ValueError(f'Expected true or false, not {value!r}')
 
 
 class Application(object):
     class Email(object):
         DEBUG_LEVEL = False
         SMTP_SERVER = ENV.get("SMTP_Server", "localhost:1025")
+        CONNECTIONS = int(ENV.get("SMTP_Connections", 2))  # SMTP connections sending at the same time
         SENDER_ADDRESS = ENV.get(
             "Email_Sender_Address", '"ArcGIS-Canvas Service Dev" <kartograafr-service-dev@umich.edu>'
         )
@@ -29,6 +55,31 @@ class Application(object):
         LOG_FILENAME_EXTENSION = '.log'
         DEFAULT_LOG_LEVEL = ENV.get("Logging_Level", "INFO")
 
+    # Metrics of each run, for Prometheus.  Each is off if not set.
+    class Metrics(object):
+        TEXTFILE_PATH = ENV.get("Metrics_Textfile_Path")  # For a node exporter textfile collector
+        PUSHGATEWAY_URL = ENV.get("Metrics_Pushgateway_URL")
+
+    # Snapshots of synced groups kept between runs, so unchanged groups can be skipped.
+    class SyncState(object):
+        DATABASE_PATH = ENV.get("Sync_State_Path")  # Skipping is off if not set
+        FULL_SYNC_INTERVAL_SECONDS = 24 * 60 * 60  # Unchanged groups are fully synced this often
+
+    # Events of each run (group lookups and creations, user batches, group syncs), appended to a JSON-lines file
+    class SyncEvents(object):
+        PATH = ENV.get("Sync_Events_Path")  # Events aren't recorded if not set
+        BUFFER_SIZE = 500  # Events written to the file at once
+
+    # Order and time budget of the group syncs of each run
+    class Scheduling(object):
+        TIME_BUDGET_SECONDS = ENV.get("Sync_Time_Budget_Seconds")  # No budget if not set
+        DEADLINE_WINDOW_SECONDS = 7 * 24 * 60 * 60  # Assignments unlocking or due within this time go first
+
+    # Running as a service with the --daemon option, instead of once per start
+    class Daemon(object):
+        INTERVAL_SECONDS = int(ENV.get("Daemon_Interval_Seconds", 15 * 60))  # From the start of one run to the next
+        JITTER_SECONDS = int(ENV.get("Daemon_Jitter_Seconds", 60))  # Most seconds randomly added to each wait
+
 
 class Canvas(object):
     BASE_URL = ENV.get("Canvas_Base_URL", "https://umich.test.instructure.com")
@@ -37,6 +88,28 @@ class Canvas(object):
     TARGET_OUTCOME_ID = 4353  # Canvas Outcome created for kartograafr
     CONFIG_COURSE_ID = ENV.get("Canvas_Config_Course_ID", 366944)
     CONFIG_COURSE_PAGE_NAME = 'course-ids'  # Not case-sensitive
+    FETCH_WORKERS = int(ENV.get("Canvas_Fetch_Workers", 8))  # Courses fetched from Canvas at the same time
+    PAGE_PREFETCH_WORKERS = int(ENV.get("Canvas_Page_Prefetch_Workers", 4))  # Pages of one list fetched at the same time
+    # Requests in flight are reduced when the "X-Rate-Limit-Remaining" value Canvas reports falls
+    # below the low watermark.  Throttled, failed (5xx) and unconnected requests are retried with backoff.
+    MAX_CONCURRENT_REQUESTS = int(ENV.get("Canvas_Max_Concurrent_Requests", 16))
+    # Connections kept open to Canvas for reuse; enough for all concurrent requests by default
+    CONNECTION_POOL_SIZE = int(ENV.get("Canvas_Connection_Pool_Size", MAX_CONCURRENT_REQUESTS))
+    KEEP_ALIVE = parseBool(ENV.get("Canvas_Keep_Alive", True))
+    RATE_LIMIT_LOW_WATERMARK = 150
+    RATE_LIMIT_HIGH_WATERMARK = 450
+    MAX_RETRIES = 5  # For any one request
+    RETRY_BUDGET = 100  # For all requests of a run together
+    # Persistent cache of Canvas GET responses.  Caching is off unless a database path is given.
+    CACHE_PATH = ENV.get("Canvas_Cache_Path")
+    CACHE_TTL_SECONDS = [
+        # (URL pattern, seconds before revalidating); URLs not matching any pattern are never cached
+        (r'/outcomes/\d+$', 24 * 60 * 60),
+        (r'/courses/\d+$', 60 * 60),
+        (r'/courses/\d+/pages/', 0),
+        (r'/courses/\d+/assignments$', 0),
+        (r'/courses/\d+/outcome_group_links$', 0),
+    ]
     COURSE_ID_SET = set((
         # Used if IDs are not found in the configuration course page defined above
         366945,  # Practice Course for Sam Sciolla (Kartograafr Test Course)
@@ -52,3 +125,8 @@ class ArcGIS(object):
         'username': ENV.get("ArcGIS_Username", ""),
         'password': ENV.get("ArcGIS_Password", "")
     }
+    SYNC_WORKERS = int(ENV.get("ArcGIS_Sync_Workers", 4))  # Groups synced at the same time
+    USER_BATCH_SIZE = int(ENV.get("ArcGIS_User_Batch_Size", 20))  # Users added to or removed from a group per request
+    USER_BATCH_WORKERS = int(ENV.get("ArcGIS_User_Batch_Workers", 4))  # Batches of one group sent at the same time
+    RECONNECT_SECONDS = int(ENV.get("ArcGIS_Reconnect_Seconds", 60 * 60))  # Connection reused this long by --daemon
+    USER_BATCH_RETRIES = 2  # Retries for a batch that raised an error
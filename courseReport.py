@@ -0,0 +1,117 @@
+# Reports to instructors of what a run did to the ArcGIS groups of their courses,
+# kept in memory until they're emailed or written to the course logs.
+
+# Past tense and preposition of each way users are changed, for the report text
+CHANGE_WORDS = {
+    'remove': ('removed', 'from'),
+    'add': ('added', 'to'),
+}
+
+# Format of the run time at the top of each report
+RUN_TIME_FORMAT = '%I:%M:%S %p on %B %d, %Y'
+
+
+class GroupReport(object):
+    """
+    What a run did to one ArcGIS group: whether it was created or could not
+    be synced, and how many users were removed and added, with the users that
+    couldn't be.  created is set when creating the group was attempted, even
+    if it then failed.
+    """
+
+    def __init__(self, groupTitle):
+        """
+        :param groupTitle: Title of the ArcGIS group
+        :type groupTitle: str
+        """
+        self.groupTitle = groupTitle
+        self.groupNameAndID = None
+        self.created = False
+        self.problem = None
+        self.changes = []
+
+    def recordChanges(self, mode, changedCount, usersNotChanged):
+        """
+        :param mode: "remove" or "add"
+        :type mode: str
+        :param changedCount: Number of users removed or added
+        :type changedCount: int
+        :param usersNotChanged: ArcGIS usernames that couldn't be removed or added
+        :type usersNotChanged: list of str
+        """
+        self.changes.append((mode, changedCount, list(usersNotChanged)))
+
+    def recordProblem(self, problem):
+        """
+        :param problem: Why the group couldn't be synced
+        :type problem: str
+        """
+        self.problem = problem
+
+    def render(self):
+        """
+        :return: The report as text for instructors
+        :rtype: str
+        """
+        text = ''
+        if self.created:
+            text += 'Creating ArcGIS group: "{}"\n'.format(self.groupTitle)
+        if self.problem is not None:
+            return text + self.problem + '\n'
+
+        if self.groupNameAndID is not None:
+            text += 'Group: {} \n\n'.format(self.groupNameAndID)
+
+        for (mode, changedCount, usersNotChanged) in self.changes:
+            (changed, preposition) = CHANGE_WORDS[mode]
+            if changedCount == 0 and not usersNotChanged:
+                text += 'No users were {}.\n\n'.format(changed)
+                continue
+
+            text += 'Number of users {} {} group: [{}]\n\n'.format(changed, preposition, changedCount)
+            if usersNotChanged:
+                text += 'Some or all users not {} {} ArcGIS group'.format(changed, preposition)
+                if mode == 'add':
+                    text += ' (These users likely need ArcGIS accounts set up)'
+                text += ':\n' + '\n'.join('* ' + username for username in usersNotChanged) + '\n'
+
+        return text + '- - -\n'
+
+    def __str__(self):
+        # Lets the report be logged lazily, as a %s argument.
+        return self.render()
+
+
+class CourseReport(object):
+    """The reports of a run on the groups of one Canvas course, in the order they're added."""
+
+    def __init__(self, courseID, courseName, runTime):
+        """
+        :param courseID: ID of the Canvas course
+        :type courseID: int or str
+        :param courseName: Name of the Canvas course
+        :type courseName: str
+        :param runTime: Start time of the run
+        :type runTime: datetime.datetime
+        """
+        self.courseID = courseID
+        self.courseName = courseName
+        self.runTime = runTime
+        self.groupReports = []
+
+    def addGroupReport(self, groupReport):
+        """
+        :param groupReport: Report on one of the course's groups
+        :type groupReport: GroupReport
+        """
+        self.groupReports.append(groupReport)
+
+    def render(self):
+        """
+        :return: The report as text for instructors, or an empty string if no groups were synced
+        :rtype: str
+        """
+        if not self.groupReports:
+            return ''
+        header = 'Running at: {}\n\n'.format(self.runTime.astimezone().strftime(RUN_TIME_FORMAT))
+        return header + '\n'.join(groupReport.render() for groupReport in self.groupReports) + '\n'
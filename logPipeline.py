@@ -0,0 +1,156 @@
+# Writing log records from one background thread, so the threads of a sync only
+# put them on a queue, and each log file is opened once, not once per logger.
+
+import copy
+import logging
+import logging.handlers
+import queue
+import threading
+
+# Put on the queue by stop(), after the last record
+_STOP = object()
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Puts the records of the given loggers (and their children) on the queue
+    without formatting them.  Their messages and tracebacks are formatted by
+    the target handlers instead, on the thread that writes them.  Arguments
+    are read then, so those loggers' callers must not change them after
+    they're logged.  Records of other loggers, e.g., of libraries, are
+    formatted in the logging thread, as QueueHandler does.
+    """
+
+    def __init__(self, queue, deferredLoggerNames=()):
+        """
+        :param queue: Queue the records are put on
+        :type queue: queue.Queue
+        :param deferredLoggerNames: Names of the loggers whose records are formatted later
+        :type deferredLoggerNames: list or tuple of str
+        """
+        super(DeferredQueueHandler, self).__init__(queue)
+        self.deferredLoggerFilters = [logging.Filter(name) for name in deferredLoggerNames]
+
+    def prepare(self, record):
+        if not any(loggerFilter.filter(record) for loggerFilter in self.deferredLoggerFilters):
+            return super(DeferredQueueHandler, self).prepare(record)
+        # A copy, so formatting on the writer thread doesn't change a record other handlers may be reading.
+        return copy.copy(record)
+
+
+class LogPipeline(object):
+    """
+    Records given to the pipeline's handler are put on a queue and written by
+    the target handlers from a background thread, each at its own level.
+    Messages of the deferredLoggerNames loggers are formatted on that thread
+    too; see DeferredQueueHandler.
+
+    The thread takes all the records waiting on the queue (up to
+    maxBatchSize) at once.  Target stream and file handlers write a batch with
+    one write and one flush, instead of one of each per record.  Target
+    handlers may be replaced while the pipeline runs, e.g., to start a new log
+    file for each run of a daemon.
+    """
+
+    def __init__(self, targetHandlers, maxBatchSize=500, deferredLoggerNames=()):
+        """
+        :param targetHandlers: Handlers that write the records, e.g., to a file and to stdout
+        :type targetHandlers: list of logging.Handler
+        :param maxBatchSize: Most records written at once
+        :type maxBatchSize: int
+        :param deferredLoggerNames: (optional) Names of the loggers whose messages are formatted by the pipeline's
+            thread, instead of the logging thread
+        :type deferredLoggerNames: list or tuple of str
+        """
+        self.queue = queue.Queue()
+        self.handler = DeferredQueueHandler(self.queue, deferredLoggerNames)
+        self.handlers = tuple(targetHandlers)
+        self.maxBatchSize = maxBatchSize
+        self.batchCount = 0
+        self.recordCount = 0
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._writeRecords, name='logPipeline', daemon=True)
+        self._thread.start()
+
+    def _writeRecords(self):
+        stopping = False
+        while not stopping:
+            items = [self.queue.get()]
+            while len(items) < self.maxBatchSize:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            records = [item for item in items if item is not _STOP]
+            stopping = len(records) < len(items)
+            if records:
+                self._writeBatch(records)
+            for _ in items:
+                self.queue.task_done()
+
+    def _writeBatch(self, records):
+        self.batchCount += 1
+        self.recordCount += len(records)
+
+        for handler in self.handlers:
+            handlerRecords = [record for record in records if record.levelno >= handler.level and handler.filter(record)]
+            if not handlerRecords:
+                continue
+
+            if not isinstance(handler, logging.StreamHandler) or handler.stream is None:
+                for record in handlerRecords:
+                    handler.handle(record)
+                continue
+
+            handler.acquire()
+            try:
+                # A record that can't be formatted is reported on its own, and the rest are still written.
+                lines = []
+                for record in handlerRecords:
+                    try:
+                        lines.append(handler.format(record) + handler.terminator)
+                    except Exception:
+                        handler.handleError(record)
+                if lines:
+                    try:
+                        handler.stream.write(''.join(lines))
+                        handler.flush()
+                    except Exception:
+                        handler.handleError(handlerRecords[-1])
+            finally:
+                handler.release()
+
+    def flush(self):
+        """Wait until the records queued so far are written."""
+        if self.running:
+            self.queue.join()
+
+    def replaceHandler(self, oldHandler, newHandler):
+        """
+        Have newHandler write the records that oldHandler would, then close
+        oldHandler once the records queued for it are written.
+
+        :type oldHandler: logging.Handler
+        :type newHandler: logging.Handler
+        """
+        self.flush()
+        self.handlers = tuple(newHandler if handler is oldHandler else handler for handler in self.handlers)
+        # Records queued while replacing may still be written by oldHandler.
+        self.flush()
+        oldHandler.close()
+
+    def stop(self):
+        """Write the records still queued, then close the target handlers."""
+        if self.running:
+            self.queue.put_nowait(_STOP)
+            self._thread.join()
+            self._thread = None
+        for handler in self.handlers:
+            handler.close()
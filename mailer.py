@@ -0,0 +1,161 @@
+# Sending email over a few reused SMTP connections, from worker threads, so a run
+# doesn't connect to the mail server once per course.
+
+import logging
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import profiling
+
+logger = logging.getLogger(__name__)
+
+
+class MailDispatcher(object):
+    """
+    Sends messages with up to connectionCount SMTP connections at once, each
+    kept open by one worker thread for all the messages it sends.  A message
+    whose connection fails (e.g., the server closed an idle connection) is
+    sent again once with a new connection.
+
+    With background, send() returns at once, and messages are sent while the
+    caller goes on; close() waits for them.  Otherwise send() waits until
+    its message is sent.
+    """
+
+    def __init__(self, smtpServer, connectionCount=1, background=False, debugLevel=0, timeout=60):
+        """
+        :param smtpServer: Host of the SMTP server, with an optional port, e.g., "localhost:1025"
+        :type smtpServer: str
+        :param connectionCount: Most SMTP connections open at once
+        :type connectionCount: int
+        :param background: Whether send() returns before the message is sent
+        :type background: bool
+        :param debugLevel: Debug level of the SMTP connections, see smtplib.SMTP.set_debuglevel()
+        :type debugLevel: int or bool
+        :param timeout: Seconds to wait for the SMTP server
+        :type timeout: float
+        """
+        self.smtpServer = smtpServer
+        self.background = background
+        self.debugLevel = debugLevel
+        self.timeout = timeout
+
+        self._executor = ThreadPoolExecutor(max_workers=max(1, connectionCount), thread_name_prefix='mailer')
+        self._threadState = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self._stats = {'sent': 0, 'failed': 0, 'connections': 0, 'reconnects': 0, 'seconds': 0.0, 'maxSeconds': 0.0}
+
+    def _connect(self):
+        connection = smtplib.SMTP(self.smtpServer, timeout=self.timeout)
+        connection.set_debuglevel(self.debugLevel)
+        with self._lock:
+            self._connections.append(connection)
+            self._stats['connections'] += 1
+        self._threadState.connection = connection
+        return connection
+
+    def _discardConnection(self):
+        connection = getattr(self._threadState, 'connection', None)
+        self._threadState.connection = None
+        if connection is not None:
+            with self._lock:
+                self._connections.remove(connection)
+            try:
+                connection.close()
+            except OSError:
+                pass
+
+    def _sendWithConnection(self, message, recipients):
+        connection = getattr(self._threadState, 'connection', None)
+        if connection is None:
+            connection = self._connect()
+
+        try:
+            connection.send_message(message, to_addrs=recipients)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # The connection was lost; the message wasn't accepted, so send it with a new one.
+            # Refusals by the server (SMTPResponseException) would only be refused again.
+            self._discardConnection()
+            with self._lock:
+                self._stats['reconnects'] += 1
+            self._connect().send_message(message, to_addrs=recipients)
+
+    def _send(self, message, recipients, description):
+        startTime = time.time()
+        error = None
+        try:
+            self._sendWithConnection(message, recipients)
+        except Exception as exception:
+            error = exception
+            self._discardConnection()
+        seconds = time.time() - startTime
+
+        with self._lock:
+            self._stats['failed' if error else 'sent'] += 1
+            self._stats['seconds'] += seconds
+            self._stats['maxSeconds'] = max(self._stats['maxSeconds'], seconds)
+        profiler = profiling.getProfiler()
+        if profiler is not None:
+            profiler.recordCall('SMTP', 'send_message', seconds, error=error is not None)
+
+        if error is not None:
+            logger.error('Failed to send email to {} for {} after {:.3f} seconds: {}'
+                         .format(recipients, description, seconds, error))
+            raise error
+        logger.info('Email sent to {} for {} in {:.3f} seconds'.format(recipients, description, seconds))
+
+    def send(self, message, recipients, description=''):
+        """
+        Send a message, or queue it to be sent if sending in the background.
+
+        :param message: The message
+        :type message: email.message.EmailMessage
+        :param recipients: Addresses to send the message to
+        :type recipients: list of str
+        :param description: What the message is about, for logging, e.g., "course 12345"
+        :type description: str
+        :return: Future of the sending, which raises the exception if the message could not be sent
+        :rtype: concurrent.futures.Future
+        """
+        future = self._executor.submit(self._send, message, recipients, description)
+        if not self.background:
+            future.exception()
+        return future
+
+    def stats(self):
+        """
+        :return: Numbers of messages sent and failed, connections made, reconnects after failures,
+            and the average and longest seconds taken by a message
+        :rtype: dict
+        """
+        with self._lock:
+            messageCount = self._stats['sent'] + self._stats['failed']
+            return {
+                'sent': self._stats['sent'],
+                'failed': self._stats['failed'],
+                'connections': self._stats['connections'],
+                'reconnects': self._stats['reconnects'],
+                'averageSeconds': round(self._stats['seconds'] / messageCount, 3) if messageCount else 0.0,
+                'maxSeconds': round(self._stats['maxSeconds'], 3),
+            }
+
+    def close(self):
+        """Wait for all messages to be sent, then close the SMTP connections."""
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            connections = list(self._connections)
+            self._connections = []
+        for connection in connections:
+            try:
+                connection.quit()
+            except (smtplib.SMTPException, OSError):
+                connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
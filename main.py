@@ -1,22 +1,29 @@
 # standard modules
 import argparse
+import asyncio
 import logging
 import os
 import re
-import smtplib
 import sys
+import time
 import traceback
 from datetime import datetime
 from email.message import EmailMessage
 
-import dateutil.parser
 import dateutil.tz
-from bs4 import BeautifulSoup
-from bs4.builder._htmlparser import HTMLParserTreeBuilder
+import requests
 
 import arcgisUM
+import courseReport
+import logPipeline
+import metrics
+import profiling
+import scheduler
+import syncEvents
+import syncState
 import util
 from CanvasAPI import CanvasAPI
+from RequestsPlus import AdaptiveThrottle, HTTPCache, RequestsTransport
 from configuration import config
 
 
@@ -25,57 +32,120 @@ def handleError(self, record):  # @UnusedVariable
     traceback.print_stack()
 
 
-# Create log file directories (if necessary)
-os.makedirs(config.Application.Logging.DIRECTORY + "/courses", exist_ok=True)
-
 logging.Handler.handleError = handleError
 
 # Adjustable level to use for all logging
-logger = logging.getLogger(__name__)
 loggingLevel = config.Application.Logging.DEFAULT_LOG_LEVEL
-logger.error("loggingLevel: {}".format(loggingLevel))
 
 logger = None  # type: logging.Logger
 logFormatter = None  # type: logging.Formatter
-courseLogHandlers = dict()
-courseLoggers = dict()
+mainLogHandler = None  # type: logging.FileHandler
+mainLogPipeline = None  # type: logPipeline.LogPipeline
+# Reports to instructors of this run, keyed by course ID (as str)
+courseReports = dict()
 
 TIMEZONE_UTC = dateutil.tz.tzutc()
 RUN_START_TIME = datetime.now(tz=TIMEZONE_UTC)
 RUN_START_TIME_FORMATTED = RUN_START_TIME.strftime('%Y%m%d%H%M%S')
 
+# Tags given to every ArcGIS group created by kartograafr
+GROUP_TAGS = ('kartograafr', 'umich')
+
+# Canvas enrollment types (not role names, which may be customized)
+ENROLLMENT_TYPE_TEACHER = 'TeacherEnrollment'
+# Enrollment states the Canvas course users API returns by default
+CURRENT_ENROLLMENT_STATES = ('active', 'invited')
+
 # Hold parsed options
 options = None
 
+# Snapshots of group syncs from earlier runs, if in use
+syncStateStore = None  # type: syncState.SyncStateStore
+
 
 def getCanvasInstance():
+    cache = None
+    if config.Canvas.CACHE_PATH:
+        cache = HTTPCache(config.Canvas.CACHE_PATH, ttlTable=config.Canvas.CACHE_TTL_SECONDS)
+
+    throttle = AdaptiveThrottle(maxConcurrency=config.Canvas.MAX_CONCURRENT_REQUESTS,
+                                lowWatermark=config.Canvas.RATE_LIMIT_LOW_WATERMARK,
+                                highWatermark=config.Canvas.RATE_LIMIT_HIGH_WATERMARK,
+                                maxRetries=config.Canvas.MAX_RETRIES,
+                                retryBudget=config.Canvas.RETRY_BUDGET)
+
+    transport = RequestsTransport(poolMaxSize=config.Canvas.CONNECTION_POOL_SIZE,
+                                  keepAlive=config.Canvas.KEEP_ALIVE)
+
     return CanvasAPI(config.Canvas.API_BASE_URL,
-                     authZToken=config.Canvas.API_AUTHZ_TOKEN)
+                     authZToken=config.Canvas.API_AUTHZ_TOKEN,
+                     pagePrefetchWorkers=config.Canvas.PAGE_PREFETCH_WORKERS,
+                     cache=cache,
+                     throttle=throttle,
+                     transport=transport,
+                     asyncWorkers=config.Canvas.MAX_CONCURRENT_REQUESTS,
+                     profiler=profiling.getProfiler())
+
+
+def fetchForCourses(fetchFunction, courseIDs, description):
+    """Call fetchFunction for all courses concurrently on one event loop.  Courses for which the call fails are logged and left out of the results.
+
+    :param fetchFunction: Coroutine function taking a course ID as its only argument
+    :type fetchFunction: callable
+    :param courseIDs: IDs of the courses to fetch
+    :type courseIDs: set or list
+    :param description: Description of what is fetched, for logging
+    :type description: str
+    :return: Dictionary of fetchFunction results keyed by course ID
+    :rtype: dict
+    """
+    courseIDs = list(courseIDs)
+
+    async def fetchAll():
+        courseSemaphore = asyncio.Semaphore(config.Canvas.FETCH_WORKERS)
+
+        async def fetchForCourse(courseID):
+            async with courseSemaphore:
+                return await fetchFunction(courseID)
+
+        return await asyncio.gather(*(fetchForCourse(courseID) for courseID in courseIDs), return_exceptions=True)
+
+    results = {}
+    for courseID, result in zip(courseIDs, asyncio.run(fetchAll())):
+        if isinstance(result, Exception):
+            logger.error('Failed to get {} for Course {}: {}'.format(description, courseID, result))
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            results[courseID] = result
+
+    return results
 
 
 def getCourseIDsWithOutcome(canvas, courseIDs, outcome):
     """Get Canvas courses that have assignments marked with outcome indicating there should be a corresponding ArgGIS group."""
-    matchingCourseIDs = set()
-    for courseID in courseIDs:
-        courseOutcomeGroupLinks = \
-            canvas.getCoursesOutcomeGroupLinksObjects(courseID)
-
-        # Is it possible to short-circuit this using itertools?
-        matchingCourseIDs.update(
-            set(courseID for outcomeLink in courseOutcomeGroupLinks
-                if outcomeLink.outcome.id == outcome.id)
-        )
 
-    return matchingCourseIDs
+    async def courseHasOutcome(courseID):
+        # Stop requesting pages as soon as a matching link is found.
+        async for outcomeLink in canvas.aiterCoursesOutcomeGroupLinksObjects(courseID):
+            if outcomeLink.outcome.id == outcome.id:
+                return True
+        return False
+
+    coursesHaveOutcome = fetchForCourses(courseHasOutcome, courseIDs, 'outcome group links')
+
+    return set(courseID for (courseID, hasOutcome) in coursesHaveOutcome.items() if hasOutcome)
 
 
 def getCourseAssignmentsWithOutcome(canvas, courseIDs, outcome):
     """Get specific assignments from Canvas courses.  Remove assignments that are expired or aren't marked to match up with ArgGIS group."""
-    matchingCourseAssignments = []
-    for courseID in courseIDs:
-        courseAssignments = canvas.getCoursesAssignmentsObjects(courseID)
+    import dateutil.parser
+
+    async def getMatchingAssignments(courseID):
+        matchingAssignments = []
+        courseAssignments = canvas.aiterCoursesAssignmentsObjects(courseID)
 
-        for assignment in courseAssignments:
+        async for assignment in courseAssignments:
             expirationTimestamp = assignment.lock_at or assignment.due_at
             expirationTime = dateutil.parser.parse(expirationTimestamp) if expirationTimestamp else RUN_START_TIME
             if (expirationTime < RUN_START_TIME):
@@ -91,8 +161,15 @@ def getCourseAssignmentsWithOutcome(canvas, courseIDs, outcome):
                 continue
             for rubric in assignment.rubric:
                 if rubric.outcome_id == outcome.id:
-                    matchingCourseAssignments.append(assignment)
+                    matchingAssignments.append(assignment)
                     break
+        return matchingAssignments
+
+    coursesAssignments = fetchForCourses(getMatchingAssignments, courseIDs, 'assignments')
+
+    matchingCourseAssignments = []
+    for matchingAssignments in coursesAssignments.values():
+        matchingCourseAssignments.extend(matchingAssignments)
     return matchingCourseAssignments
 
 
@@ -113,91 +190,263 @@ def computeListDifferences(leftList, rightList):
 
 def minimizeUserChanges(groupUsers, courseUsers):
     """Compute minimal changes to ArgGIS group membership so that members who don't need to be changed aren't changed."""
-    logger.debug('groupUsers input: {}'.format(groupUsers))
-    logger.debug('courseUsers input: {}'.format(courseUsers))
+    logger.debug('groupUsers input: %s', groupUsers)
+    logger.debug('courseUsers input: %s', courseUsers)
 
     # Based on current Canvas and ArcGIS memberships find obsolete users in ArcGIS group, new users in course,
     # and members in both (hence unchanged).
     minGroupUsers, minCourseUsers, unchangedUsers = computeListDifferences(groupUsers,courseUsers)
 
-    logger.info('changedArcGISGroupUsers: {} changedCanvasUsers: {} unchanged Users {}'.format(minGroupUsers,minCourseUsers,unchangedUsers))
+    logger.info('changedArcGISGroupUsers: %s changedCanvasUsers: %s unchanged Users: %d',
+                minGroupUsers, minCourseUsers, len(unchangedUsers))
+    logger.debug('unchanged Users: %s', unchangedUsers)
 
     return minGroupUsers, minCourseUsers
 
 
-def updateGroupUsers(courseUserDictionary, course, instructorLog, groupTitle, group):
-    """Add remove / users from group to match Canvas course"""
+def getGroupTitle(course, assignment):
+    """Title of the ArcGIS group for a Canvas course and assignment."""
+    return '%s_%s_%s_%s' % (course.name, course.id, assignment.name, assignment.id)
+
+
+def getCourseUsernames(courseUserIndex, course):
+    """Canvas login IDs of all users of a course, from indexCourseUsersByRole()."""
+    return [user.login_id for user in courseUserIndex[course.id][None] if user.login_id is not None]
+
+
+def getGroupSyncPriority(assignment, courseUsernames, snapshot=None, lastOutcome=None, now=None):
+    """Sort key for the group of an assignment, so groups most in need of a sync come first:
+
+    * groups whose last sync failed, was deferred by the time budget, or couldn't add or remove some users;
+    * then groups whose Canvas users changed since their last sync (or that were never synced);
+    * among those, assignments unlocking or due within config.Application.Scheduling.DEADLINE_WINDOW_SECONDS,
+      soonest first;
+    * then the groups with the most users to add or remove.
+
+    :param assignment: The Canvas assignment
+    :type assignment: Assignment
+    :param courseUsernames: Login IDs of the course's users, from getCourseUsernames()
+    :type courseUsernames: list of str
+    :param snapshot: (optional) The group's last snapshot, from the sync state store
+    :type snapshot: dict
+    :param lastOutcome: (optional) Outcome of the group's last sync, from the sync state store
+    :type lastOutcome: str
+    :param now: (optional) Current time, in seconds since the epoch
+    :type now: float
+    :return: Sort key, lowest first
+    :rtype: tuple
+    """
+    import dateutil.parser
+
+    now = time.time() if now is None else now
+
+    needsRetry = lastOutcome in ('failed', 'deferred') or (snapshot is not None and snapshot['hadFailures'])
+
+    if snapshot is None:
+        changeCount = len(set(courseUsernames))
+    else:
+        changeCount = len(set(courseUsernames) ^ set(snapshot['members']))
+
+    secondsToDeadline = float('inf')
+    for timestamp in (assignment.unlock_at, assignment.due_at):
+        if timestamp:
+            secondsToTimestamp = dateutil.parser.parse(timestamp).timestamp() - now
+            if 0 <= secondsToTimestamp <= config.Application.Scheduling.DEADLINE_WINDOW_SECONDS:
+                secondsToDeadline = min(secondsToDeadline, secondsToTimestamp)
+
+    return (not needsRetry, changeCount == 0, secondsToDeadline, -changeCount)
+
+
+def updateGroupUsers(courseUserIndex, course, groupReport, groupTitle, group, groupCreated=False):
+    """Add remove / users from group to match Canvas course, and record the changes in groupReport.
+
+    If a sync state store is in use and the Canvas roster hasn't changed since the group's last
+    successful sync, getting the ArcGIS members and computing changes are skipped, until a full
+    sync is due again.  A group created by this run is never skipped.
+    """
 
-    # get the arcgis group members and the canvas course members.
     groupNameAndID = util.formatNameAndID(group)
+    canvasCourseUsers = getCourseUsernames(courseUserIndex, course)
+    logger.debug('All Canvas users in course for Group %s: Canvas Users: %s', groupNameAndID, canvasCourseUsers)
+    canvasRosterHash = syncState.rosterHash(canvasCourseUsers)
+
+    groupReport.groupNameAndID = groupNameAndID
+
+    if not groupCreated and syncStateStore is not None \
+            and syncStateStore.isGroupUnchanged(group.id, canvasRosterHash):
+        logger.info('Canvas users unchanged since last sync: Group %s: skipping', groupNameAndID)
+        metrics.increment('group_syncs_skipped_total')
+        groupReport.recordChanges('remove', 0, [])
+        groupReport.recordChanges('add', 0, [])
+        return
+
+    # get the arcgis group members.
     groupUsers = arcgisUM.getCurrentArcGISMembers(group, groupNameAndID)
-    logger.debug('group users: {}'.format(groupUsers))
+    logger.debug('group users: %s', groupUsers)
     groupUsersTrimmed = [re.sub(r'_\S+$', '', gu) for gu in groupUsers]
-    logger.debug('All ArcGIS users currently in Group {}: ArcGIS Users: {}'.format(groupNameAndID, groupUsers))
-    canvasCourseUsers = [user.login_id for user in courseUserDictionary[course.id] if user.login_id is not None]
-    logger.debug('All Canvas users in course for Group {}: Canvas Users: {}'.format(groupNameAndID, canvasCourseUsers))
+    logger.debug('All ArcGIS users currently in Group %s: ArcGIS Users: %s', groupNameAndID, groupUsers)
 
     # Compute the exact sets of users to change.
     usersToRemove, usersToAdd = minimizeUserChanges(groupUsersTrimmed, canvasCourseUsers)
 
-    logger.info('Users to remove from ArcGIS: Group {}: Users: {}'.format(groupNameAndID, usersToRemove))
-    logger.info('Users to add to ArcGIS: Group {}: Users: {}'.format(groupNameAndID, usersToAdd))
+    logger.info('Users to remove from ArcGIS: Group %s: Users: %s', groupNameAndID, usersToRemove)
+    logger.info('Users to add to ArcGIS: Group %s: Users: %s', groupNameAndID, usersToAdd)
 
     # Now update only the users in the group that have changed.
-    instructorLog += f"Group: {groupNameAndID} \n\n"
-    instructorLog = arcgisUM.modifyUsersInGroup(group, usersToRemove, "remove", instructorLog)
-    instructorLog = arcgisUM.modifyUsersInGroup(group, usersToAdd, "add", instructorLog)
-    instructorLog += "- - -\n"
+    usersNotRemoved = arcgisUM.modifyUsersInGroup(group, usersToRemove, "remove", groupReport)
+    usersNotAdded = arcgisUM.modifyUsersInGroup(group, usersToAdd, "add", groupReport)
+
+    metrics.increment('users_changed_total', len(usersToRemove) - len(usersNotRemoved), action='remove')
+    metrics.increment('users_changed_total', len(usersToAdd) - len(usersNotAdded), action='add')
+    metrics.increment('users_not_changed_total', len(usersNotRemoved), action='remove')
+    metrics.increment('users_not_changed_total', len(usersNotAdded), action='add')
 
-    return instructorLog
+    if syncStateStore is not None:
+        usersNotRemovedTrimmed = [re.sub(r'_\S+$', '', gu) for gu in usersNotRemoved]
+        usersNotAddedTrimmed = [re.sub(r'_\S+$', '', gu) for gu in usersNotAdded]
+        groupMembers = (set(canvasCourseUsers) | set(usersNotRemovedTrimmed)) - set(usersNotAddedTrimmed)
+        syncStateStore.saveGroupSnapshot(group.id, groupTitle, course.id, canvasRosterHash, groupMembers,
+                                         bool(usersNotRemoved or usersNotAdded))
 
 
-def updateArcGISGroupForAssignment(arcGIS, courseUserDictionary, groupTags, assignment, course,instructorLog):
-    """" Make sure there is a corresponding ArcGIS group for this Canvas course and assignment.  Sync up the ArcGIS members with the Canvas course members."""
+def updateArcGISGroupForAssignment(arcGIS, courseUserIndex, groupTags, assignment, course, groupIndex=None):
+    """" Make sure there is a corresponding ArcGIS group for this Canvas course and assignment.  Sync up the ArcGIS members with the Canvas course members.
 
-    groupTitle = '%s_%s_%s_%s' % (course.name, course.id, assignment.name, assignment.id)
+    :return: The report for instructors and the outcome for the group: "created", "updated" or "failed"
+    :rtype: (courseReport.GroupReport, str)
+    """
 
-    group = arcgisUM.lookForExistingArcGISGroup(arcGIS, groupTitle)
+    groupTitle = getGroupTitle(course, assignment)
+    groupReport = courseReport.GroupReport(groupTitle)
+    outcome = 'updated'
+
+    group = arcgisUM.lookForExistingArcGISGroup(arcGIS, groupTitle, groupIndex)
 
     if group is None:
-        group, instructorLog = arcgisUM.createNewArcGISGroup(arcGIS, groupTags, groupTitle,instructorLog)
+        outcome = 'created'
+        group = arcgisUM.createNewArcGISGroup(arcGIS, groupTags, groupTitle, groupReport)
+        if group is not None and groupIndex is not None:
+            groupIndex[groupTitle] = group
+        if group is not None and syncStateStore is not None:
+            syncStateStore.forgetGroup(group.id, groupTitle)
 
     # if creation didn't work then log that.
     if group is None:
-        logger.info('Problem creating or updating ArcGIS group "{}": Missing group object.'.format(groupTitle))
-        instructorLog += 'Problem creating or updating ArcGIS group "{}"\n'.format(groupTitle)
+        outcome = 'failed'
+        logger.info('Problem creating or updating ArcGIS group "%s": Missing group object.', groupTitle)
+        groupReport.recordProblem('Problem creating or updating ArcGIS group "{}"'.format(groupTitle))
     else:
         # have a group.  Might be new or existing.
-        instructorLog = updateGroupUsers(courseUserDictionary, course, instructorLog, groupTitle, group)
+        updateGroupUsers(courseUserIndex, course, groupReport, groupTitle, group, groupCreated=outcome == 'created')
 
-    courseLogger = getCourseLogger(course.id, course.name)
-    logger.debug("update group instructor log: {}".format(instructorLog))
-    courseLogger.info(instructorLog)
+    return groupReport, outcome
 
 
 # For all the assignments and their courses update the ArcGIS group.
-def updateArcGISGroupsForAssignments(arcGIS, assignments, courseDictionary,courseUserDictionary):
-    """For each assignment listed ensure there is an ArcGIS group corresponding to the Canvas course / assignment."""
+def updateArcGISGroupsForAssignments(arcGIS, assignments, courseDictionary,courseUserIndex):
+    """For each assignment listed ensure there is an ArcGIS group corresponding to the Canvas course / assignment.
+
+    Groups are independent of each other, so up to config.ArcGIS.SYNC_WORKERS of them are synced at the same time,
+    in the order of getGroupSyncPriority().  Groups not started within config.Application.Scheduling.TIME_BUDGET_SECONDS
+    of the start of the run, if set, are deferred to the next run.
+    Group reports are added to the course reports afterwards, in the order of the assignments.
+
+    :return: Outcome for each group synced, as dictionaries with "course", "assignment", "outcome" and "error" keys
+    :rtype: list of dict
+    """
+
+    groupTags = ','.join(GROUP_TAGS)
+    logger.debug('groupTags: %s', groupTags)
+
+    # One search for all existing groups, instead of one per assignment.
+    groupIndex = arcgisUM.getArcGISGroupsByTags(arcGIS, GROUP_TAGS)
 
-    groupTags = ','.join(('kartograafr', 'umich'))
-    logger.debug("groupTags: {}".format(groupTags))
+    courseAssignments = []
     for assignment in assignments:
-        course = courseDictionary[assignment.course_id]
-        instructorLog = ''
-        updateArcGISGroupForAssignment(arcGIS, courseUserDictionary, groupTags, assignment, course,instructorLog)
+        course = courseDictionary.get(assignment.course_id)
+        if course is None or course.id not in courseUserIndex:
+            # Without the course or its users, syncing could wrongly empty the group.
+            logger.warning('Skipping Assignment %s for Course %s, course or its users could not be fetched',
+                           assignment, assignment.course_id)
+            continue
+        courseAssignments.append((course, assignment))
+
+    groupSnapshots = syncStateStore.getGroupSnapshotsByTitle() if syncStateStore is not None else {}
+    lastGroupOutcomes = syncStateStore.getGroupOutcomes() if syncStateStore is not None else {}
+    groupPriorities = []
+    for (course, assignment) in courseAssignments:
+        groupTitle = getGroupTitle(course, assignment)
+        groupPriorities.append(getGroupSyncPriority(assignment, getCourseUsernames(courseUserIndex, course),
+                                                    groupSnapshots.get(groupTitle), lastGroupOutcomes.get(groupTitle)))
+    # The pool starts the groups in the order they're given.
+    groupOrder = sorted(range(len(courseAssignments)), key=groupPriorities.__getitem__)
+
+    timeBudget = config.Application.Scheduling.TIME_BUDGET_SECONDS
+    budgetEndTime = RUN_START_TIME.timestamp() + float(timeBudget) if timeBudget else None
+
+    groupSeconds = {}
+
+    def updateGroup(index):
+        (course, assignment) = courseAssignments[index]
+        if budgetEndTime is not None and time.time() >= budgetEndTime:
+            return None, 'deferred'
+        startTime = time.time()
+        try:
+            return updateArcGISGroupForAssignment(arcGIS, courseUserIndex, groupTags, assignment, course, groupIndex)
+        finally:
+            groupSeconds[index] = time.time() - startTime
+
+    results, exceptions = util.mapConcurrently(updateGroup, groupOrder, config.ArcGIS.SYNC_WORKERS)
+
+    groupOutcomes = []
+    for (index, (course, assignment)) in enumerate(courseAssignments):
+        error = None
+        if index in exceptions:
+            error = exceptions[index]
+            logger.error('Exception while updating ArcGIS group for Assignment %s of Course %s: %s',
+                         assignment, course, error)
+            groupReport = courseReport.GroupReport(getGroupTitle(course, assignment))
+            groupReport.recordProblem('Problem creating or updating ArcGIS group for assignment {}'.format(assignment))
+            outcome = 'failed'
+        else:
+            groupReport, outcome = results[index]
+
+        if groupReport is not None:
+            getCourseReport(course).addGroupReport(groupReport)
+            logger.info('Report for group "%s":\n%s', groupReport.groupTitle, groupReport)
+
+        groupOutcomes.append({'course': course, 'assignment': assignment, 'outcome': outcome, 'error': error})
+        syncEvents.record('group_sync', group=getGroupTitle(course, assignment), course=course.id,
+                          courseName=course.name, term=course.enrollment_term_id, assignment=assignment.id,
+                          outcome=outcome, seconds=round(groupSeconds.get(index, 0.0), 3), error=error)
+
+    for groupOutcome in groupOutcomes:
+        logger.info('ArcGIS group for Assignment %(assignment)s of Course %(course)s: %(outcome)s', groupOutcome)
+        metrics.increment('groups_total', outcome=groupOutcome['outcome'])
+    logger.info('ArcGIS groups: {} created, {} updated, {} failed, {} deferred'.format(
+        *[sum(1 for groupOutcome in groupOutcomes if groupOutcome['outcome'] == outcome)
+          for outcome in ('created', 'updated', 'failed', 'deferred')]))
+
+    if syncStateStore is not None:
+        syncStateStore.saveGroupOutcomes({getGroupTitle(groupOutcome['course'], groupOutcome['assignment']):
+                                          groupOutcome['outcome'] for groupOutcome in groupOutcomes})
+
+    return groupOutcomes
 
 
 def getCoursesByID(canvas, courseIDs):
     """Get Canvas course objects for the listed courses."""
-    courses = {}
-    for courseID in courseIDs:
+    async def getCourse(courseID):
         logger.info("getCoursesById: courseId: {}".format(courseID))
-        courses[courseID] = canvas.getCourseObject(courseID)
-    return courses
+        return await canvas.getCourseObjectAsync(courseID)
+
+    courses = fetchForCourses(getCourse, courseIDs, 'course')
+    return {courseID: course for (courseID, course) in courses.items() if course is not None}
 
 
 def getCoursesUsersByID(canvas, courseIDs, enrollmentType=None):
     """Get Canvas course members for specific course.  Can filter by members's Canvas role.
+    Each user includes their enrollments in the course, so roles can be found without another request.
 
     :param canvas:
     :type canvas: CanvasAPI
@@ -207,11 +456,59 @@ def getCoursesUsersByID(canvas, courseIDs, enrollmentType=None):
     :type enrollmentType: str
     :return:
     """
-    coursesUsers = {}
-    for courseID in courseIDs:
-        coursesUsers[courseID] = canvas.getCoursesUsersObjects(courseID, enrollmentType=enrollmentType,
-                                                               params={'include[]': 'email'})
-    return coursesUsers
+
+    async def getCourseUsers(courseID):
+        return await canvas.getCoursesUsersObjectsAsync(courseID, enrollmentType=enrollmentType, prefetchPages=True,
+                                                        **{'include[]': ['email', 'enrollments']})
+
+    coursesUsers = fetchForCourses(getCourseUsers, courseIDs, 'users')
+    return {courseID: users for (courseID, users) in coursesUsers.items() if users is not None}
+
+
+def indexCourseUsersByRole(courseUserDictionary):
+    """Index the users of each course by the types of their current enrollments in it (e.g., "TeacherEnrollment").
+    All of a course's users are also listed under the None key.
+
+    :param courseUserDictionary: Dictionary of course IDs to list of users, with their enrollments
+    :type courseUserDictionary: dict
+    :return: Dictionary of course IDs to dictionary of enrollment types to list of users
+    :rtype: dict
+    """
+    courseUserIndex = {}
+    for (courseID, users) in courseUserDictionary.items():
+        roleIndex = {None: users}
+        for user in users:
+            enrollmentTypes = set(enrollment.type for enrollment in user.enrollments or []
+                                  if enrollment.enrollment_state in CURRENT_ENROLLMENT_STATES + (None,))
+            for enrollmentType in enrollmentTypes:
+                roleIndex.setdefault(enrollmentType, []).append(user)
+        courseUserIndex[courseID] = roleIndex
+    return courseUserIndex
+
+
+def getProfileReportFilePath():
+    """Return the path/filename of the run's profile report, named like the main log file once it's renamed."""
+    return os.path.splitext(getMainLogFilePath(nameSuffix=RUN_START_TIME_FORMATTED))[0] + '-profile.json'
+
+
+def exportRunMetrics(runSucceeded):
+    """Write or push the run's metrics, as configured, with the phases and calls recorded by the profiler."""
+    runMetrics = metrics.getMetrics()
+    if runMetrics is None:
+        return
+
+    runMetrics.setGauge('run_success', int(runSucceeded))
+    runMetrics.setGauge('run_finish_timestamp_seconds', round(datetime.now(tz=TIMEZONE_UTC).timestamp(), 3))
+    if profiling.getProfiler() is not None:
+        runMetrics.addRunProfile(profiling.getProfiler().report())
+
+    if config.Application.Metrics.TEXTFILE_PATH:
+        runMetrics.writeTextfile(config.Application.Metrics.TEXTFILE_PATH)
+    if config.Application.Metrics.PUSHGATEWAY_URL:
+        try:
+            runMetrics.push(config.Application.Metrics.PUSHGATEWAY_URL)
+        except requests.exceptions.RequestException as exception:
+            logger.error('Failed to push run metrics: {}'.format(exception))
 
 
 def getCourseLogFilePath(courseID):
@@ -235,8 +532,21 @@ def getMainLogFilePath(nameSuffix=None):
     )))
 
 
-def logToStdOut():
-    """Have log output go to stdout in addition to any file."""
+def makeMainLogHandler():
+    """Make a handler that writes the records of the main logger (and its children) to the main log file."""
+    handler = logging.FileHandler(getMainLogFilePath())
+    handler.setFormatter(logFormatter)
+    handler.addFilter(logging.Filter(config.Application.Logging.MAIN_LOGGER_NAME))
+    return handler
+
+
+def startLogging():
+    """Have log output of all loggers go to stdout, and that of the main logger to the main log file, too.
+    Both are written by the log pipeline's thread, so logging doesn't wait for file or terminal output.
+    Messages of the main logger and arcgisUM, which log for each group synced, are formatted by that thread, too."""
+    global mainLogHandler
+    global mainLogPipeline
+
     root = logging.getLogger()
     root.setLevel(loggingLevel)
 
@@ -244,91 +554,53 @@ def logToStdOut():
     ch.setLevel(loggingLevel)
     formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     ch.setFormatter(formatter)
-    root.addHandler(ch)
-
-
-def getCourseLogger(courseID, courseName):
-    """Set up course specific logger.
 
-    :param courseID: ID number of the course
-    :type courseID: str or int
-    :param courseName: Name of the course
-    :type courseName: str
-    :return: A logging handler for a specific course's log file
-    :rtype: logging.FileHandler
-    """
-    global courseLoggers  # type: dict
-
-    courseID = str(courseID)
+    mainLogHandler = makeMainLogHandler()
+    mainLogPipeline = logPipeline.LogPipeline([mainLogHandler, ch], deferredLoggerNames=(
+        config.Application.Logging.MAIN_LOGGER_NAME, arcgisUM.logger.name))
+    root.addHandler(mainLogPipeline.handler)
+    mainLogPipeline.start()
 
-    if courseID in courseLoggers:
-        return courseLoggers[courseID]
 
-    logFormatterFriendly = logging.Formatter('Running at: %(asctime)s\n\n%(message)s', '%I:%M:%S %p on %B %d, %Y')
+def stopLogging():
+    """Write the log records still queued, and close the log files."""
+    if mainLogPipeline is not None:
+        logging.getLogger().removeHandler(mainLogPipeline.handler)
+        mainLogPipeline.stop()
 
-    logHandlerMain = logging.FileHandler(getMainLogFilePath())
-    logHandlerMain.setFormatter(logFormatterFriendly)
 
-    logHandlerCourse = logging.FileHandler(getCourseLogFilePath(courseID))
-    logHandlerCourse.setFormatter(logFormatterFriendly)
+def getCourseReport(course):
+    """Get the course's report of this run, started the first time it's needed.
 
-    courseLogger = logging.getLogger(courseID)  # type: logging.Logger
-    courseLogger.setLevel(loggingLevel)
-    courseLogger.addHandler(logHandlerMain)
-    courseLogger.addHandler(logHandlerCourse)
-
-    courseLoggers[courseID] = courseLogger
-
-    return courseLogger
-
-
-def getCourseLogHandler(courseID, courseName):
-    """Lookup the course specific logger for this course.
-
-    :param courseID: ID number of the course
-    :type courseID: str or int
-    :param courseName: Name of the course
-    :type courseName: str
-    :return: A logging handler for a specific course's log file
-    :rtype: logging.FileHandler
+    :param course: The Canvas course
+    :type course: Course
+    :rtype: courseReport.CourseReport
     """
-    global logFormatter  # type: logging.Formatter
-    global courseLogHandlers  # type: dict
-
-    courseID = str(courseID)
-
-    if courseID in courseLogHandlers:
-        return courseLogHandlers[courseID]
-
-    courseLogHandler = logging.FileHandler(getCourseLogFilePath(courseID))
-    courseLogHandler.setFormatter(logFormatter)
-
-    courseLogHandlers[courseID] = courseLogHandler
-
-    return courseLogHandler
-
-
-def closeAllCourseLoggerHandlers():
-    global courseLoggers
+    courseID = str(course.id)
 
-    for (courseID, courseLogger) in courseLoggers.items():  # type: logging.Logger
-        for handler in courseLogger.handlers:  # type: logging.Handler
-            handler.close()
+    if courseID not in courseReports:
+        courseReports[courseID] = courseReport.CourseReport(course.id, course.name, RUN_START_TIME)
 
+    return courseReports[courseID]
 
-def closeAllCourseLogHandlers():
-    global courseLogHandlers
 
-    for (courseID, courseLogHandler) in courseLogHandlers.items():
-        courseLogHandler.close()
+def saveCourseReports():
+    """Append the course reports of this run to the course logs, so a later run with --email sends them too."""
+    for (courseID, report) in courseReports.items():
+        reportText = report.render()
+        if reportText:
+            with open(getCourseLogFilePath(courseID), 'a') as courseLogFile:
+                courseLogFile.write(reportText)
 
 
 def getCourseIDsFromConfigCoursePage(canvas, courseID, config_course_page_name):
     """Read hand edited list of Canvas course ids to process from a specific Canvas course page."""
+    from bs4 import BeautifulSoup
+    from bs4.builder._htmlparser import HTMLParserTreeBuilder
 
     regex_base = config.Canvas.BASE_URL.replace(".", "\\.")
     valid_course_url_regex = '^{}/courses/[0-9]+$'.format(regex_base)
-    pages = canvas.getCoursesPagesByNameObjects(courseID, config_course_page_name)  # type: list of CanvasObject
+    pages = canvas.getCoursesPagesByNameObjects(courseID, config_course_page_name)  # type: list of Page
 
     courseIDs = None
     if pages:
@@ -364,28 +636,38 @@ def renameLogForCourseID(courseID=-1):
     return (oldLogName, newLogName)
 
 
-def emailLogForCourseID(courseID, recipients):
-    """Email course information to a list of multiple recipients."""
+def emailCourseReport(courseID, recipients, mailDispatcher=None):
+    """Email the course's report of this run to a list of multiple recipients, after the reports of any earlier runs
+    that weren't emailed.  Then write them all to the course's log, named for this run.
+
+    :param mailDispatcher: Sends the email; if None, the email is printed to the log instead
+    :type mailDispatcher: mailer.MailDispatcher
+    """
 
     if not isinstance(recipients, list):
         recipients = [recipients]
 
     courseID = str(courseID)
 
-    logContent = None
+    logContent = ''
 
-    # File may not exist if no changes were made to group.
-    if os.path.isfile(getCourseLogFilePath(courseID)) is not True:
-        logger.debug('No logfile {} for course: {}'.format(getCourseLogFilePath(courseID),courseID))
-        return
+    # Reports of runs without --email wait in the course log.
+    pendingLogName = getCourseLogFilePath(courseID)
+    if os.path.isfile(pendingLogName):
+        try:
+            with open(pendingLogName) as logfile:
+                logContent = logfile.read()
+        except Exception as exception:
+            logger.warning('Exception while trying to read logfile for course {courseID}: {exception}'
+                           .format(**locals()))
+            return
 
-    try:
-        logfile = open(getCourseLogFilePath(courseID))
-        logContent = logfile.read()
-        logfile.close()
-    except Exception as exception:
-        logger.warning('Exception while trying to read logfile for course {courseID}: {exception}'
-                       .format(**locals()))
+    if courseID in courseReports:
+        logContent += courseReports[courseID].render()
+
+    # There is no report if no groups were synced for the course.
+    if not logContent:
+        logger.debug('No report for course: {}'.format(courseID))
         return
 
     message = EmailMessage()
@@ -394,98 +676,116 @@ def emailLogForCourseID(courseID, recipients):
     message['Subject'] = config.Application.Email.SUBJECT.format(**locals())
     message.set_content(logContent)
 
-    if options.printEmail is True:
+    if mailDispatcher is None:
         logger.info("email message: {}".format(message))
     else:
-        try:
-            server = smtplib.SMTP(config.Application.Email.SMTP_SERVER)
-            logger.debug("mail server: " + config.Application.Email.SMTP_SERVER)
-            server.set_debuglevel(config.Application.Email.DEBUG_LEVEL)
-            server.sendmail(config.Application.Email.SENDER_ADDRESS, recipients, message.as_string())
-            server.quit()
-            logger.info('Email sent to {recipients} for course {courseID}'.format(**locals()))
-        except Exception as exception:
-            logger.exception('Failed to send email to {recipients} for course {courseID}.  Exception: {exception}'
-                         .format(**locals()))
+        # Failures are logged by the dispatcher.
+        mailDispatcher.send(message, recipients, 'course {}'.format(courseID))
 
     try:
-        (oldLogName, newLogName) = renameLogForCourseID(courseID)
-        logger.info('Renamed course log "{oldLogName}" to "{newLogName}"'.format(**locals()))
+        newLogName = getCourseLogFilePath(courseID + '-' + RUN_START_TIME_FORMATTED)
+        with open(newLogName, 'w') as logfile:
+            logfile.write(logContent)
+        if os.path.isfile(pendingLogName):
+            os.remove(pendingLogName)
+        logger.info('Wrote course log "{newLogName}"'.format(**locals()))
     except Exception as exception:
-        logger.exception('Failed to rename log file for course {courseID}.  Exception: {exception}'
+        logger.exception('Failed to write log file for course {courseID}.  Exception: {exception}'
                          .format(**locals()))
 
 
-def emailCourseLogs(courseInstructors):
+def emailCourseReports(courseUserIndex):
     """ Loop through instructors to email course information to them.
 
-    :param courseInstructors: Dictionary of courses to list of their instructors
-    :type courseInstructors: dict
+    :param courseUserIndex: Dictionary of courses to their users by enrollment type, from indexCourseUsersByRole()
+    :type courseUserIndex: dict
     """
+    import mailer
 
     logger.info('Preparing to send email to instructors...')
 
-    for courseID, instructors in list(courseInstructors.items()):
+    mailDispatcher = None
+    if options.printEmail is not True:
+        logger.debug("mail server: " + config.Application.Email.SMTP_SERVER)
+        # Messages are sent while the next course logs are read.
+        mailDispatcher = mailer.MailDispatcher(config.Application.Email.SMTP_SERVER,
+                                               connectionCount=config.Application.Email.CONNECTIONS,
+                                               background=True,
+                                               debugLevel=config.Application.Email.DEBUG_LEVEL)
+
+    for courseID, roleIndex in list(courseUserIndex.items()):
+        instructors = roleIndex.get(ENROLLMENT_TYPE_TEACHER, [])
         recipients = [instructor.login_id + config.Application.Email.RECIPIENT_AT_DOMAIN for instructor in instructors]
-        emailLogForCourseID(courseID, recipients)
+        emailCourseReport(courseID, recipients, mailDispatcher)
 
+    if mailDispatcher is not None:
+        mailDispatcher.close()
+        mailStats = mailDispatcher.stats()
+        logger.info('Emails: {}'.format(mailStats))
+        metrics.increment('emails_total', mailStats['sent'], result='sent')
+        metrics.increment('emails_total', mailStats['failed'], result='failed')
 
-def main():
-    """Setup and run Canvas / ArcGIS group sync.
 
-    * parse command line arguments.
-    * setup loggers.
-    * connect to Canvas and  ArcGIS instances.
-    * get list of relevant assignments from Canvas courses listed hand-edited Canvas page.
-    * update membership of ArcGIS groups corresponding to Canvas course / assignments.
-    """
+def startMainLog():
+    """Have the main logger write to a new main log file, closing the one it wrote to before."""
+    global mainLogHandler
 
-    global logger
-    global logFormatter
-    global options
+    newMainLogHandler = makeMainLogHandler()
+    mainLogPipeline.replaceHandler(mainLogHandler, newMainLogHandler)
+    mainLogHandler = newMainLogHandler
 
-    logFormatter = util.Iso8601UTCTimeFormatter('%(asctime)s|%(levelname)s|%(name)s|%(message)s')
 
-    logHandler = logging.FileHandler(getMainLogFilePath())
-    logHandler.setFormatter(logFormatter)
+def startRun():
+    """Start the time, metrics and profile of a run.  Log and report file names include the start time."""
+    global RUN_START_TIME
+    global RUN_START_TIME_FORMATTED
 
-    logger = logging.getLogger(config.Application.Logging.MAIN_LOGGER_NAME)  # type: logging.Logger
-    logger.setLevel(loggingLevel)
-    logger.addHandler(logHandler)
+    RUN_START_TIME = datetime.now(tz=TIMEZONE_UTC)
+    RUN_START_TIME_FORMATTED = RUN_START_TIME.strftime('%Y%m%d%H%M%S')
+    courseReports.clear()
 
-    # Add logging to stdout for OpenShift.
-    logToStdOut()
+    metricsEnabled = bool(config.Application.Metrics.TEXTFILE_PATH or config.Application.Metrics.PUSHGATEWAY_URL)
+    if metricsEnabled:
+        metrics.startCollecting()
+    # Metrics include the phase and request timings recorded by the profiler.
+    if options.profile or metricsEnabled:
+        profiling.startProfiling()
 
-    logger.info("Starting kartograafr")
+    if config.Application.SyncEvents.PATH:
+        syncEvents.startRecording(config.Application.SyncEvents.PATH, RUN_START_TIME_FORMATTED,
+                                  config.Application.SyncEvents.BUFFER_SIZE)
 
-    argumentParser = argparse.ArgumentParser()
-    argumentParser.add_argument('--mail', '--email', dest='sendEmail',
-                                action=argparse._StoreTrueAction,
-                                help='email all available course logs to instructors, then rename all logs.')
-    argumentParser.add_argument('--printMail', '--printEmail', dest='printEmail',
-                                action=argparse._StoreTrueAction,
-                                help='print emails to log instead of sending them.')
-    options, unknownOptions = argumentParser.parse_known_args()
 
-    logger.info('kart sys args: {} '.format(sys.argv[1:]))
+def finishRun(runSucceeded):
+    """Write the run's profile report, metrics and sync events, as configured."""
+    if options is not None and options.profile:
+        profiling.getProfiler().writeReport(getProfileReportFilePath())
+    exportRunMetrics(runSucceeded)
+    syncEvents.stopRecording()
 
-    if unknownOptions:
-        unknownOptionMessage = 'unrecognized arguments: %s' % ' '.join(unknownOptions)
-        usageMessage = argumentParser.format_usage()
 
-        logger.warning(unknownOptionMessage)
-        logger.warning(usageMessage)
+def closeConnections(canvas):
+    """Close the Canvas cache, connections and request threads, and the sync state store, before kartograafr stops."""
+    if canvas.cache is not None:
+        canvas.cache.close()
+    # Also closes canvas.transport, whose session it shares.
+    canvas.asyncTransport.close()
 
-        # Also print usage error messages so they will appear in email to sysadmins, sent from crond
-        print(unknownOptionMessage)
-        print(usageMessage)
+    if syncStateStore is not None:
+        syncStateStore.close()
 
-    logger.info('{} email to instructors with logs after courses are processed'
-                .format('Sending' if options.sendEmail else 'Not sending'))
 
-    canvas = getCanvasInstance()
-    arcGIS = arcgisUM.getArcGISConnection(config.ArcGIS.SECURITY_INFO)
+def runSync(canvas, arcGIS):
+    """Sync the ArcGIS groups of the assignments linked to the outcome, in the courses listed on the config page.
 
+    :param canvas: Canvas API client
+    :type canvas: CanvasAPI
+    :param arcGIS: Connection object for the ArcGIS service
+    :type arcGIS: arcgis.GIS
+    :return: Outcome for each group synced; see updateArcGISGroupsForAssignments()
+    :rtype: list of dict
+    """
+    profiling.startPhase('outcome discovery')
     outcomeID = config.Canvas.TARGET_OUTCOME_ID
     logger.info('Config -> Outcome ID to find: {}'.format(outcomeID))
 
@@ -528,39 +828,197 @@ def main():
     logger.info('Config -> Found Course IDs for Outcome {}: {}'.format(validOutcome,
                                                                        list(matchingCourseIDs)))
 
+    profiling.startPhase('assignment scan')
     logger.info('Searching specified Courses for Assignments linked to Outcome {}'.format(validOutcome))
     matchingCourseAssignments = getCourseAssignmentsWithOutcome(
         canvas, matchingCourseIDs, validOutcome)
 
     if not matchingCourseAssignments:
         logger.info('No valid Assignments linked to Outcome {} were found'.format(validOutcome))
-        return
+        return []
 
     logger.info('Found Assignments linked to Outcome {}: {}'.format(validOutcome,
                                                                     ', '.join(map(str, matchingCourseAssignments))))
 
+    profiling.startPhase('course fetch')
     courseDictionary = getCoursesByID(canvas, matchingCourseIDs)
-    courseUserDictionary = getCoursesUsersByID(canvas, matchingCourseIDs)
-    courseInstructorDictionary = getCoursesUsersByID(canvas, matchingCourseIDs, 'teacher')
 
-    updateArcGISGroupsForAssignments(arcGIS, matchingCourseAssignments, courseDictionary, courseUserDictionary)
+    profiling.startPhase('roster fetch')
+    # One roster request per course; instructors are found from the enrollments included with it.
+    courseUserIndex = indexCourseUsersByRole(getCoursesUsersByID(canvas, matchingCourseIDs))
 
-    closeAllCourseLoggerHandlers()
+    profiling.startPhase('group sync')
+    groupOutcomes = updateArcGISGroupsForAssignments(arcGIS, matchingCourseAssignments, courseDictionary,
+                                                     courseUserIndex)
 
     if options.sendEmail:
-        emailCourseLogs(courseInstructorDictionary)
+        profiling.startPhase('email')
+        emailCourseReports(courseUserIndex)
+    else:
+        saveCourseReports()
+
+    profiling.startPhase('finish')
+
+    throttleStats = canvas.throttle.stats()
+    logger.info('Canvas requests: {}'.format(throttleStats))
+    metrics.increment('canvas_throttled_total', throttleStats['throttled'])
+    logger.info('Canvas connections: {}'.format(canvas.transport.connectionStats()))
+
+    if canvas.cache is not None:
+        cacheStats = canvas.cache.stats()
+        logger.info('Canvas cache: {}'.format(cacheStats))
+        if metrics.getMetrics() is not None:
+            for result in ('hits', 'revalidations', 'misses'):
+                metrics.increment('canvas_cache_responses_total', cacheStats[result], result=result)
+            metrics.getMetrics().setGauge('canvas_cache_hit_ratio', round(cacheStats['hitRatio'], 4))
 
     renameLogForCourseID(None)
 
     logger.info("Finished current kartograafr run.")
+    return groupOutcomes
+
+
+def runDaemon(canvas):
+    """Run syncs on the schedule in config.Application.Daemon until SIGTERM or SIGINT, reusing the Canvas session
+    and the ArcGIS connection.  Each run has its own main log, profile report and metrics, as a separate run would.
+
+    :param canvas: Canvas API client
+    :type canvas: CanvasAPI
+    """
+    arcGISConnection = arcgisUM.ArcGISConnectionKeeper(config.ArcGIS.SECURITY_INFO, config.ArcGIS.RECONNECT_SECONDS)
+    cycleScheduler = scheduler.CycleScheduler(config.Application.Daemon.INTERVAL_SECONDS,
+                                              config.Application.Daemon.JITTER_SECONDS)
+    cycleScheduler.installSignalHandlers()
+
+    def runCycle():
+        # The first run was started by main(), along with the Canvas session.
+        if cycleScheduler.cycleCount > 1:
+            startRun()
+            canvas.profiler = profiling.getProfiler()
+            canvas.throttle.resetRetryBudget()
+            profiling.startPhase('connect')
+
+        runSucceeded = False
+        try:
+            groupOutcomes = runSync(canvas, arcGISConnection.get())
+            runSucceeded = True
+            # Errors of each group are caught, so a token that expired during the run only fails those groups.
+            authenticationErrors = [groupOutcome['error'] for groupOutcome in groupOutcomes
+                                    if groupOutcome['error'] is not None
+                                    and arcgisUM.isAuthenticationError(groupOutcome['error'])]
+            if authenticationErrors:
+                logger.warning('ArcGIS authentication failed for {} groups; reconnecting for the next run'
+                               .format(len(authenticationErrors)))
+                arcGISConnection.invalidate()
+        except Exception as exception:
+            logger.exception('abnormal ending of run {}: {}'.format(cycleScheduler.cycleCount, exception))
+            if arcgisUM.isAuthenticationError(exception):
+                logger.warning('ArcGIS authentication failed; reconnecting for the next run')
+                arcGISConnection.invalidate()
+        finally:
+            finishRun(runSucceeded)
+            renameLogForCourseID(None)
+            startMainLog()
+
+    logger.info('Running every {} seconds (plus up to {} seconds of jitter) until stopped'
+                .format(cycleScheduler.intervalSeconds, cycleScheduler.jitterSeconds))
+    cycleScheduler.run(runCycle)
+    logger.info('ArcGIS connections made: {}'.format(arcGISConnection.connectCount))
+
+
+def main():
+    """Setup and run Canvas / ArcGIS group sync.
+
+    * parse command line arguments.
+    * setup loggers.
+    * connect to Canvas and  ArcGIS instances.
+    * get list of relevant assignments from Canvas courses listed hand-edited Canvas page.
+    * update membership of ArcGIS groups corresponding to Canvas course / assignments.
+    * with --daemon, repeat the update on a schedule until stopped.
+    """
+
+    global logger
+    global logFormatter
+    global options
+    global syncStateStore
+
+    # Create log file directories (if necessary)
+    os.makedirs(config.Application.Logging.COURSE_DIRECTORY, exist_ok=True)
+    logging.getLogger(__name__).error("loggingLevel: {}".format(loggingLevel))
+
+    logFormatter = util.Iso8601UTCTimeFormatter('%(asctime)s|%(levelname)s|%(name)s|%(message)s')
+
+    logger = logging.getLogger(config.Application.Logging.MAIN_LOGGER_NAME)  # type: logging.Logger
+    logger.setLevel(loggingLevel)
+
+    # Log to stdout for OpenShift, as well as to the main log file.
+    startLogging()
+
+    logger.info("Starting kartograafr")
+
+    argumentParser = argparse.ArgumentParser()
+    argumentParser.add_argument('--mail', '--email', dest='sendEmail',
+                                action=argparse._StoreTrueAction,
+                                help='email all available course logs to instructors, then rename all logs.')
+    argumentParser.add_argument('--printMail', '--printEmail', dest='printEmail',
+                                action=argparse._StoreTrueAction,
+                                help='print emails to log instead of sending them.')
+    argumentParser.add_argument('--profile', dest='profile',
+                                action=argparse._StoreTrueAction,
+                                help='time each phase and external call, and write a JSON report beside the main log.')
+    argumentParser.add_argument('--daemon', dest='daemon',
+                                action=argparse._StoreTrueAction,
+                                help='keep running, with a sync on the schedule set in config.py, until SIGTERM.')
+    options, unknownOptions = argumentParser.parse_known_args()
+
+    logger.info('kart sys args: {} '.format(sys.argv[1:]))
+
+    if unknownOptions:
+        unknownOptionMessage = 'unrecognized arguments: %s' % ' '.join(unknownOptions)
+        usageMessage = argumentParser.format_usage()
+
+        logger.warning(unknownOptionMessage)
+        logger.warning(usageMessage)
+
+        # Also print usage error messages so they will appear in email to sysadmins, sent from crond
+        print(unknownOptionMessage)
+        print(usageMessage)
+
+    logger.info('{} email to instructors with logs after courses are processed'
+                .format('Sending' if options.sendEmail else 'Not sending'))
+
+    startRun()
+    profiling.startPhase('connect')
+
+    canvas = getCanvasInstance()
+
+    if config.Application.SyncState.DATABASE_PATH:
+        syncStateStore = syncState.SyncStateStore(config.Application.SyncState.DATABASE_PATH,
+                                                  config.Application.SyncState.FULL_SYNC_INTERVAL_SECONDS)
+
+    try:
+        if options.daemon:
+            runDaemon(canvas)
+        else:
+            runSync(canvas, arcgisUM.getArcGISConnection(config.ArcGIS.SECURITY_INFO))
+    finally:
+        closeConnections(canvas)
 
 
 if __name__ == '__main__':
+    config.checkEnvFile()
+
     kartStartTime = datetime.now()
+    runSucceeded = False
     try:
         main()
+        runSucceeded = True
     except Exception as exp:
         logger.error("abnormal ending: {}".format(exp))
         traceback.print_exc(exp)
     finally:
+        # Each run of a daemon is finished by runDaemon().
+        if options is None or not options.daemon:
+            finishRun(runSucceeded)
         logger.info("Stopping kartograafr. Duration: {} seconds".format(datetime.now()-kartStartTime))
+        stopLogging()
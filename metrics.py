@@ -0,0 +1,215 @@
+# Metrics of a run in the Prometheus text format, written for a node exporter
+# textfile collector or pushed to a Pushgateway when the run ends.
+
+import logging
+import os
+import threading
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = 'kartograafr_'
+CONTENT_TYPE = 'text/plain; version=0.0.4'
+PUSHGATEWAY_JOB = 'kartograafr'
+
+# Type and help text of every metric, by name (without the prefix)
+METRIC_DEFINITIONS = {
+    'run_success': ('gauge', '1 if the last run finished normally, otherwise 0.'),
+    'run_finish_timestamp_seconds': ('gauge', 'When the last run finished, in seconds since the epoch.'),
+    'run_duration_seconds': ('gauge', 'Duration of the last run.'),
+    'phase_duration_seconds': ('gauge', 'Duration of each phase of the last run.'),
+    'requests_total': ('counter', 'Canvas requests and ArcGIS calls, by service and endpoint.'),
+    'request_errors_total': ('counter', 'Failed Canvas requests and ArcGIS calls, by service and endpoint.'),
+    'request_retries_total': ('counter', 'Retried Canvas requests, by service and endpoint.'),
+    'request_duration_seconds': ('histogram', 'Duration of Canvas requests and ArcGIS calls, by service.'),
+    'groups_total': ('counter', 'ArcGIS groups synced, by outcome.'),
+    'group_syncs_skipped_total': ('counter', 'ArcGIS groups not synced because their Canvas users were unchanged.'),
+    'users_changed_total': ('counter', 'Users added to or removed from ArcGIS groups, by action.'),
+    'users_not_changed_total': ('counter', 'Users that could not be added to or removed from ArcGIS groups, by action.'),
+    'emails_total': ('counter', 'Emails to instructors, by result.'),
+    'canvas_cache_responses_total': ('counter', 'Canvas responses looked up in the cache, by result.'),
+    'canvas_cache_hit_ratio': ('gauge', 'Share of cached Canvas responses that were reused.'),
+    'canvas_throttled_total': ('counter', 'Canvas requests slowed down because of the rate limit.'),
+}
+
+# The metrics of the current run, if metrics are collected
+_activeMetrics = None
+
+
+class RunMetrics(object):
+    """
+    Holds the samples of the metrics in `METRIC_DEFINITIONS` for a run, and
+    renders them in the Prometheus text exposition format.  Samples may be
+    recorded from any thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}
+
+    def _checkName(self, name):
+        if name not in METRIC_DEFINITIONS:
+            raise ValueError('Unknown metric: {}'.format(name))
+
+    def increment(self, name, amount=1, **labels):
+        """
+        :param name: Name of a counter, from `METRIC_DEFINITIONS`
+        :type name: str
+        :param amount: Amount to add
+        :type amount: int or float
+        :param labels: Labels of the sample
+        """
+        self._checkName(name)
+        labelItems = tuple(sorted(labels.items()))
+        with self._lock:
+            metricSamples = self._samples.setdefault(name, {})
+            metricSamples[labelItems] = metricSamples.get(labelItems, 0) + amount
+
+    def setGauge(self, name, value, **labels):
+        """
+        :param name: Name of a gauge, from `METRIC_DEFINITIONS`
+        :type name: str
+        :param value: Value of the sample
+        :type value: int or float
+        :param labels: Labels of the sample
+        """
+        self._checkName(name)
+        with self._lock:
+            self._samples.setdefault(name, {})[tuple(sorted(labels.items()))] = value
+
+    def setHistogram(self, name, buckets, count, total, **labels):
+        """
+        :param name: Name of a histogram, from `METRIC_DEFINITIONS`
+        :type name: str
+        :param buckets: Pairs of bucket upper bounds and cumulative counts
+        :type buckets: list of tuple
+        :param count: Number of observations
+        :type count: int
+        :param total: Sum of observations
+        :type total: float
+        :param labels: Labels of the histogram
+        """
+        self._checkName(name)
+        with self._lock:
+            self._samples.setdefault(name, {})[tuple(sorted(labels.items()))] = \
+                {'buckets': list(buckets), 'count': count, 'sum': total}
+
+    def addRunProfile(self, profileReport):
+        """
+        Record the phases and calls from a profile report.  See `profiling.RunProfiler.report()`.
+
+        :param profileReport: Report of the run's profiler
+        :type profileReport: dict
+        """
+        self.setGauge('run_duration_seconds', profileReport['totalSeconds'])
+        for phase in profileReport['phases']:
+            self.setGauge('phase_duration_seconds', phase['seconds'], phase=phase['name'])
+        for endpointStats in profileReport['endpoints']:
+            labels = {'service': endpointStats['service'], 'endpoint': endpointStats['endpoint']}
+            self.increment('requests_total', endpointStats['calls'], **labels)
+            self.increment('request_errors_total', endpointStats['errors'], **labels)
+            self.increment('request_retries_total', endpointStats['retries'], **labels)
+        for serviceStats in profileReport['services']:
+            self.setHistogram('request_duration_seconds', serviceStats['buckets'], serviceStats['calls'],
+                              serviceStats['seconds'], service=serviceStats['service'])
+
+    def render(self):
+        """
+        :return: All samples, in the Prometheus text exposition format
+        :rtype: str
+        """
+        lines = []
+        with self._lock:
+            for (name, (metricType, helpText)) in METRIC_DEFINITIONS.items():
+                if name not in self._samples:
+                    continue
+
+                fullName = METRIC_PREFIX + name
+                lines.append('# HELP {} {}'.format(fullName, helpText))
+                lines.append('# TYPE {} {}'.format(fullName, metricType))
+
+                for (labelItems, value) in self._samples[name].items():
+                    if metricType == 'histogram':
+                        for (upperBound, bucketCount) in value['buckets']:
+                            lines.append(formatSample(fullName + '_bucket', labelItems + (('le', upperBound),),
+                                                      bucketCount))
+                        lines.append(formatSample(fullName + '_bucket', labelItems + (('le', '+Inf'),),
+                                                  value['count']))
+                        lines.append(formatSample(fullName + '_sum', labelItems, value['sum']))
+                        lines.append(formatSample(fullName + '_count', labelItems, value['count']))
+                    else:
+                        lines.append(formatSample(fullName, labelItems, value))
+
+        return '\n'.join(lines) + '\n'
+
+    def writeTextfile(self, path):
+        """
+        Write the metrics for a node exporter textfile collector.  The file is
+        replaced at once, so the collector never reads a partly written file.
+
+        :param path: Path of the metrics file, which should end in ".prom"
+        :type path: str
+        """
+        temporaryPath = path + '.tmp'
+        with open(temporaryPath, 'w') as metricsFile:
+            metricsFile.write(self.render())
+        os.replace(temporaryPath, path)
+        logger.info('Wrote run metrics: {}'.format(path))
+
+    def push(self, pushgatewayURL, job=PUSHGATEWAY_JOB):
+        """
+        Replace the job's metrics in a Pushgateway.
+
+        :param pushgatewayURL: Base URL of the Pushgateway, e.g., "http://localhost:9091"
+        :type pushgatewayURL: str
+        :param job: Job name to group the metrics under
+        :type job: str
+        """
+        response = requests.put('{}/metrics/job/{}'.format(pushgatewayURL.rstrip('/'), job),
+                                data=self.render().encode(), headers={'Content-Type': CONTENT_TYPE}, timeout=30)
+        response.raise_for_status()
+        logger.info('Pushed run metrics: {}'.format(pushgatewayURL))
+
+
+def formatSample(fullName, labelItems, value):
+    """
+    :param fullName: Name of the sample, with prefix and suffix
+    :type fullName: str
+    :param labelItems: Pairs of label names and values
+    :type labelItems: tuple
+    :param value: Value of the sample
+    :type value: int or float
+    :return: One line of the Prometheus text exposition format
+    :rtype: str
+    """
+    labelsText = ','.join('{}="{}"'.format(labelName, str(labelValue).replace('\\', r'\\').replace('"', r'\"')
+                                          .replace('\n', r'\n'))
+                          for (labelName, labelValue) in labelItems)
+    return '{}{} {}'.format(fullName, '{' + labelsText + '}' if labelsText else '', value)
+
+
+def startCollecting():
+    """
+    Start collecting metrics for this run.
+
+    :return: The run's metrics
+    :rtype: RunMetrics
+    """
+    global _activeMetrics
+    _activeMetrics = RunMetrics()
+    return _activeMetrics
+
+
+def getMetrics():
+    """
+    :return: The run's metrics, or None if metrics aren't collected
+    :rtype: RunMetrics or None
+    """
+    return _activeMetrics
+
+
+def increment(name, amount=1, **labels):
+    """Add to a counter of the run, if metrics are collected.  See `RunMetrics.increment()`."""
+    if _activeMetrics is not None:
+        _activeMetrics.increment(name, amount, **labels)
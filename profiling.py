@@ -0,0 +1,217 @@
+# Timing of the phases of a run and of the calls it makes to Canvas and ArcGIS,
+# written as a JSON report when the --profile option is given.
+
+import functools
+import json
+import logging
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# The profiler of the current run, if profiling is on
+_activeProfiler = None
+
+# Upper bounds (in seconds) of the buckets call durations are counted in, for each service
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class RunProfiler(object):
+    """
+    Records how long each phase of a run takes, and the number, duration,
+    size, retries and errors of the calls made to each endpoint of each
+    external service.  Calls may be recorded from any thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._startTime = time.time()
+        self._phases = []
+        self._currentPhase = None
+        self._endpoints = {}
+        self._services = {}
+
+    def startPhase(self, name):
+        """
+        End the current phase, if any, and start the next one.
+
+        :param name: Name of the phase, e.g., "roster fetch"
+        :type name: str
+        """
+        with self._lock:
+            self._endCurrentPhase()
+            self._currentPhase = {'name': name, 'start': time.time()}
+
+    def _endCurrentPhase(self):
+        if self._currentPhase is not None:
+            phase = self._currentPhase
+            self._phases.append({'name': phase['name'], 'seconds': round(time.time() - phase['start'], 3)})
+            self._currentPhase = None
+
+    def _getEndpointStats(self, service, endpoint):
+        key = (service, endpoint)
+        if key not in self._endpoints:
+            self._endpoints[key] = {'service': service, 'endpoint': endpoint, 'calls': 0, 'errors': 0,
+                                    'retries': 0, 'seconds': 0.0, 'bytes': 0}
+        return self._endpoints[key]
+
+    def recordCall(self, service, endpoint, seconds, byteCount=0, error=False):
+        """
+        :param service: Name of the external service, e.g., "CanvasAPI"
+        :type service: str
+        :param endpoint: Endpoint or function called, e.g., "/courses/:id/users"
+        :type endpoint: str
+        :param seconds: Duration of the call
+        :type seconds: float
+        :param byteCount: Size of the response body
+        :type byteCount: int
+        :param error: Whether the call failed
+        :type error: bool
+        """
+        with self._lock:
+            endpointStats = self._getEndpointStats(service, endpoint)
+            endpointStats['calls'] += 1
+            endpointStats['errors'] += int(bool(error))
+            endpointStats['seconds'] += seconds
+            endpointStats['bytes'] += byteCount
+
+            if service not in self._services:
+                self._services[service] = {'service': service, 'calls': 0, 'seconds': 0.0,
+                                           'buckets': [0] * len(DURATION_BUCKETS)}
+            serviceStats = self._services[service]
+            serviceStats['calls'] += 1
+            serviceStats['seconds'] += seconds
+            for (bucketIndex, upperBound) in enumerate(DURATION_BUCKETS):
+                if seconds <= upperBound:
+                    serviceStats['buckets'][bucketIndex] += 1
+
+    def recordRequest(self, service, url, seconds, response=None):
+        """
+        Record an HTTP request under its endpoint.  See `endpointForURL()`.
+
+        :param service: Name of the external service, e.g., "CanvasAPI"
+        :type service: str
+        :param url: URL of the request
+        :type url: str
+        :param seconds: Duration of the request
+        :type seconds: float
+        :param response: Response object, or None if the request failed to connect
+        :type response: requests.Response
+        """
+        byteCount = len(response.content or b'') if response is not None else 0
+        error = response is None or not response.ok
+        self.recordCall(service, endpointForURL(url), seconds, byteCount=byteCount, error=error)
+
+    def recordRetry(self, service, url):
+        """
+        :param service: Name of the external service, e.g., "CanvasAPI"
+        :type service: str
+        :param url: URL of the request being retried
+        :type url: str
+        """
+        with self._lock:
+            self._getEndpointStats(service, endpointForURL(url))['retries'] += 1
+
+    def report(self):
+        """
+        End the current phase, and summarize the run so far.
+
+        :return: Dictionary of total seconds, phases in order, endpoint statistics
+            ordered by total seconds, longest first, and the durations of each service's
+            calls, counted in `DURATION_BUCKETS` (cumulatively, like a Prometheus histogram)
+        :rtype: dict
+        """
+        with self._lock:
+            self._endCurrentPhase()
+            endpoints = [dict(endpointStats, seconds=round(endpointStats['seconds'], 3))
+                         for endpointStats in self._endpoints.values()]
+            services = [dict(serviceStats, seconds=round(serviceStats['seconds'], 3),
+                             buckets=list(zip(DURATION_BUCKETS, serviceStats['buckets'])))
+                        for serviceStats in self._services.values()]
+
+        return {
+            'totalSeconds': round(time.time() - self._startTime, 3),
+            'phases': list(self._phases),
+            'endpoints': sorted(endpoints, key=lambda endpointStats: endpointStats['seconds'], reverse=True),
+            'services': services,
+        }
+
+    def writeReport(self, path):
+        """
+        :param path: Path of the JSON report file
+        :type path: str
+        """
+        with open(path, 'w') as reportFile:
+            json.dump(self.report(), reportFile, indent=2)
+        logger.info('Wrote run profile: {}'.format(path))
+
+
+def startProfiling():
+    """
+    Start profiling this run.
+
+    :return: The run's profiler
+    :rtype: RunProfiler
+    """
+    global _activeProfiler
+    _activeProfiler = RunProfiler()
+    return _activeProfiler
+
+
+def getProfiler():
+    """
+    :return: The run's profiler, or None if profiling is off
+    :rtype: RunProfiler or None
+    """
+    return _activeProfiler
+
+
+def startPhase(name):
+    """Start the next phase of the run, if profiling is on.  See `RunProfiler.startPhase()`."""
+    if _activeProfiler is not None:
+        _activeProfiler.startPhase(name)
+
+
+def endpointForURL(url):
+    """
+    Make an endpoint name from a URL, without the query and with IDs replaced,
+    so requests for different courses, etc. are counted together.
+
+    :param url: URL of a request
+    :type url: str
+    :return: Path of the URL, e.g., "/api/v1/courses/:id/users"
+    :rtype: str
+    """
+    return re.sub(r'/\d+(?=/|$)', '/:id', urlsplit(url).path)
+
+
+def profiledCall(service):
+    """
+    Decorate a function calling an external service, so each call is recorded
+    under the function's name, if profiling is on.
+
+    :param service: Name of the external service, e.g., "ArcGIS"
+    :type service: str
+    """
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            profiler = _activeProfiler
+            if profiler is None:
+                return function(*args, **kwargs)
+
+            startTime = time.time()
+            error = True
+            try:
+                result = function(*args, **kwargs)
+                error = False
+                return result
+            finally:
+                profiler.recordCall(service, function.__name__, time.time() - startTime, error=error)
+
+        return wrapper
+
+    return decorator
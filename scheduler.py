@@ -0,0 +1,82 @@
+# Running sync cycles on a schedule in one long-lived process (the --daemon option),
+# until the process is asked to stop.
+
+import logging
+import random
+import signal
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CycleScheduler(object):
+    """
+    Calls a function repeatedly, starting each call intervalSeconds after the
+    start of the one before (or right away, if that one took longer), plus a
+    random jitter of up to jitterSeconds, so instances don't all run at once.
+
+    Stopping (e.g., on SIGTERM) lets the cycle in progress finish, and cuts
+    the wait for the next one short.
+    """
+
+    def __init__(self, intervalSeconds, jitterSeconds=0):
+        """
+        :param intervalSeconds: Seconds from the start of one cycle to the start of the next
+        :type intervalSeconds: int or float
+        :param jitterSeconds: Most seconds randomly added to each wait
+        :type jitterSeconds: int or float
+        """
+        self.intervalSeconds = intervalSeconds
+        self.jitterSeconds = jitterSeconds
+        self.cycleCount = 0
+        self._stopEvent = threading.Event()
+
+    @property
+    def stopping(self):
+        return self._stopEvent.is_set()
+
+    def stop(self, signalNumber=None, frame=None):
+        """Stop after the current cycle.  May be used as a signal handler."""
+        if signalNumber is not None:
+            logger.info('Received signal {}; stopping after the current cycle'.format(signal.Signals(signalNumber).name))
+        self._stopEvent.set()
+
+    def installSignalHandlers(self, signalNumbers=(signal.SIGTERM, signal.SIGINT)):
+        """Have the signals stop the scheduler instead of ending the process.  Only possible from the main thread."""
+        for signalNumber in signalNumbers:
+            signal.signal(signalNumber, self.stop)
+
+    def nextDelay(self, cycleSeconds):
+        """
+        :param cycleSeconds: Duration of the cycle that just ended
+        :type cycleSeconds: float
+        :return: Seconds to wait before the next cycle
+        :rtype: float
+        """
+        return max(0.0, self.intervalSeconds - cycleSeconds) + random.uniform(0, self.jitterSeconds)
+
+    def run(self, cycleFunction):
+        """
+        Call cycleFunction until stopped.  Exceptions from it are logged, and
+        don't stop the scheduler.
+
+        :param cycleFunction: Function taking no arguments
+        :type cycleFunction: callable
+        """
+        while not self.stopping:
+            cycleStartTime = time.monotonic()
+            self.cycleCount += 1
+            try:
+                cycleFunction()
+            except Exception as exception:
+                logger.exception('Cycle {} failed: {}'.format(self.cycleCount, exception))
+
+            if self.stopping:
+                break
+
+            delay = self.nextDelay(time.monotonic() - cycleStartTime)
+            logger.info('Next cycle in {:.0f} seconds'.format(delay))
+            self._stopEvent.wait(delay)
+
+        logger.info('Stopped after {} cycles'.format(self.cycleCount))
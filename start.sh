@@ -2,12 +2,22 @@
 
 # This simple shell script controls whether kartograafr sends logs by email or not when the application
 # is run within a container environment (e.g. OpenShift). If log emails are wanted, SEND_EMAIL
-# should be set using the Deployment Config (.yaml).
+# should be set using the Deployment Config (.yaml). If DAEMON is set to "True", kartograafr keeps
+# running with a sync on a schedule instead of running once.
+
+KART_ARGS=()
 
 if [ "${SEND_EMAIL}" == "True" ]; then
   echo "Running kartograafr WITH email flag"
-  python main.py --email
+  KART_ARGS+=(--email)
 else
   echo "Running kartograafr WITHOUT email flag"
-  python main.py
 fi
+
+if [ "${DAEMON}" == "True" ]; then
+  echo "Running kartograafr as a service"
+  KART_ARGS+=(--daemon)
+fi
+
+# exec, so SIGTERM from the container runtime reaches kartograafr itself.
+exec python main.py "${KART_ARGS[@]}"
@@ -0,0 +1,232 @@
+# A structured record of what each run did to ArcGIS groups, appended to a file
+# as JSON lines (one event per line), for analysing throughput and failures
+# afterwards without parsing the logs.  Run this module to summarize the file:
+#
+#     python syncEvents.py /tmp/log/kartograafr/syncEvents.jsonl --by term
+
+import argparse
+import json
+import sys
+import threading
+import time
+from collections import defaultdict
+
+# Kinds of events, and the fields of each, besides "time", "run" and "event":
+#
+# group_lookup: group, source ("index" or "search"), found, seconds
+# group_create: group, groupID, succeeded, seconds, error
+# users_batch: group, groupID, mode ("add" or "remove"), users, notChanged, seconds, error
+# user_not_changed: group, groupID, mode, username
+# group_sync: group, course, courseName, term, assignment, outcome, seconds, error
+EVENT_TYPES = ('group_lookup', 'group_create', 'users_batch', 'user_not_changed', 'group_sync')
+
+# Fields of group_sync events that summaries can be grouped by
+SUMMARY_KEYS = {
+    'course': ('course', 'courseName'),
+    'term': ('term',),
+    'run': ('run',),
+}
+
+# The event writer of the current run, if events are recorded
+_activeWriter = None
+
+
+class SyncEventWriter(object):
+    """
+    Appends the events of a run to a JSON-lines file.  Events may be recorded
+    from any thread; they're kept in a buffer, and written bufferSize at a time
+    and by flush() or close().
+    """
+
+    def __init__(self, path, runID, bufferSize=500):
+        """
+        :param path: Path of the file, which is created if needed
+        :type path: str
+        :param runID: Identifies the run in each event, e.g., its start time
+        :type runID: str
+        :param bufferSize: Most events kept before they're written
+        :type bufferSize: int
+        """
+        self.path = path
+        self.runID = runID
+        self.bufferSize = bufferSize
+        self.eventCount = 0
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._file = open(path, 'a')
+
+    def record(self, event, **fields):
+        """
+        :param event: Kind of event, from `EVENT_TYPES`
+        :type event: str
+        :param fields: Fields of the event; values that aren't JSON types are written as strings
+        """
+        if event not in EVENT_TYPES:
+            raise ValueError('Unknown event: {}'.format(event))
+
+        line = json.dumps(dict(time=round(time.time(), 3), run=self.runID, event=event, **fields), default=str)
+        with self._lock:
+            self._buffer.append(line)
+            self.eventCount += 1
+            if len(self._buffer) >= self.bufferSize:
+                self._writeBuffer()
+
+    def _writeBuffer(self):
+        if self._buffer:
+            self._file.write('\n'.join(self._buffer) + '\n')
+            self._file.flush()
+            self._buffer = []
+
+    def flush(self):
+        with self._lock:
+            self._writeBuffer()
+
+    def close(self):
+        with self._lock:
+            self._writeBuffer()
+            self._file.close()
+
+
+def startRecording(path, runID, bufferSize=500):
+    """
+    Start recording the events of this run, after finishing any recording of an earlier run.
+
+    :return: The run's event writer
+    :rtype: SyncEventWriter
+    """
+    global _activeWriter
+    stopRecording()
+    _activeWriter = SyncEventWriter(path, runID, bufferSize)
+    return _activeWriter
+
+
+def stopRecording():
+    """Write the events still in the buffer, and stop recording."""
+    global _activeWriter
+    if _activeWriter is not None:
+        _activeWriter.close()
+        _activeWriter = None
+
+
+def getWriter():
+    """
+    :return: The run's event writer, or None if events aren't recorded
+    :rtype: SyncEventWriter or None
+    """
+    return _activeWriter
+
+
+def record(event, **fields):
+    """Record an event of the run, if events are recorded.  See `SyncEventWriter.record()`."""
+    if _activeWriter is not None:
+        _activeWriter.record(event, **fields)
+
+
+def readEvents(path, runIDs=None):
+    """
+    :param path: Path of a JSON-lines file of events
+    :type path: str
+    :param runIDs: (optional) Only read the events of these runs
+    :type runIDs: set of str
+    :return: The events, as dictionaries; lines that aren't JSON (e.g., cut short by a crash) are skipped
+    :rtype: generator of dict
+    """
+    with open(path) as eventFile:
+        for line in eventFile:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if runIDs is None or event.get('run') in runIDs:
+                yield event
+
+
+def summarize(events, by='course'):
+    """
+    Sum up the group syncs and user changes of events by course, term or run.
+    Events of a group are matched to its course and term by the group_sync
+    events of the same run.
+
+    :param events: Events, from `readEvents()`
+    :type events: iterable of dict
+    :param by: "course", "term" or "run"
+    :type by: str
+    :return: Totals for each course, term or run, sorted by it
+    :rtype: list of dict
+    """
+    keyFields = SUMMARY_KEYS[by]
+    groupKeys = {}
+    groupEvents = []
+    for event in events:
+        if event['event'] == 'group_sync':
+            groupKeys[(event['run'], event['group'])] = tuple(event.get(field) for field in keyFields)
+        groupEvents.append(event)
+
+    totals = defaultdict(lambda: defaultdict(float))
+    for event in groupEvents:
+        key = groupKeys.get((event['run'], event.get('group')))
+        if key is None:
+            continue
+        total = totals[key]
+
+        if event['event'] == 'group_sync':
+            total['groups'] += 1
+            total['groups_' + event['outcome']] += 1
+            total['groupSeconds'] += event.get('seconds') or 0
+        elif event['event'] == 'users_batch':
+            total['batches'] += 1
+            total['batchErrors'] += 1 if event.get('error') else 0
+            total['batchSeconds'] += event['seconds']
+            usersTotal = 'usersRemoved' if event['mode'] == 'remove' else 'usersAdded'
+            total[usersTotal] += event['users'] - event['notChanged']
+            total['usersNotChanged'] += event['notChanged']
+
+    summary = []
+    for (key, total) in sorted(totals.items(), key=lambda item: tuple(str(value) for value in item[0])):
+        usersChanged = total['usersAdded'] + total['usersRemoved']
+        row = dict(zip(keyFields, key))
+        row.update({
+            'groups': int(total['groups']),
+            'created': int(total['groups_created']),
+            'updated': int(total['groups_updated']),
+            'failed': int(total['groups_failed']),
+            'deferred': int(total['groups_deferred']),
+            'usersAdded': int(total['usersAdded']),
+            'usersRemoved': int(total['usersRemoved']),
+            'usersNotChanged': int(total['usersNotChanged']),
+            'batches': int(total['batches']),
+            'batchErrors': int(total['batchErrors']),
+            'groupSeconds': round(total['groupSeconds'], 3),
+            'usersPerBatchSecond': round(usersChanged / total['batchSeconds'], 1) if total['batchSeconds'] else None,
+        })
+        summary.append(row)
+    return summary
+
+
+def main():
+    argumentParser = argparse.ArgumentParser(description='Summarize the sync events recorded by kartograafr runs.')
+    argumentParser.add_argument('path', help='JSON-lines file of events (Sync_Events_Path)')
+    argumentParser.add_argument('--by', choices=sorted(SUMMARY_KEYS), default='course',
+                                help='sum up by course, term or run (default: %(default)s)')
+    argumentParser.add_argument('--run', dest='runIDs', action='append',
+                                help='only this run, by its start time, e.g., 20200131140500; may be repeated')
+    argumentParser.add_argument('--json', action='store_true', help='write the summary as JSON lines')
+    options = argumentParser.parse_args()
+
+    summary = summarize(readEvents(options.path, set(options.runIDs) if options.runIDs else None), options.by)
+    if options.json:
+        for row in summary:
+            print(json.dumps(row))
+        return
+    if not summary:
+        print('No events found', file=sys.stderr)
+        return
+
+    columns = list(summary[0])
+    print('\t'.join(columns))
+    for row in summary:
+        print('\t'.join('' if row[column] is None else str(row[column]) for column in columns))
+
+
+if __name__ == '__main__':
+    main()
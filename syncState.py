@@ -0,0 +1,173 @@
+# Persistent state kept between runs, so unchanged work can be skipped.
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def rosterHash(usernames):
+    """
+    Hash a list of usernames, independent of order and duplicates.
+
+    :param usernames: Usernames of a roster
+    :type usernames: list of str
+    :return: Hexadecimal SHA-256 digest
+    :rtype: str
+    """
+    return hashlib.sha256('\n'.join(sorted(set(usernames))).encode()).hexdigest()
+
+
+class SyncStateStore(object):
+    """
+    SQLite store of what was last synced to each ArcGIS group: a hash of the
+    Canvas roster, the resulting group members, and whether any users could
+    not be added or removed.  Also keeps the outcome of each group's last sync,
+    so groups that failed or were deferred can be synced first by the next run.
+    """
+
+    def __init__(self, databasePath, fullSyncInterval=24 * 60 * 60):
+        """
+        :param databasePath: Path of the SQLite database file, created if necessary
+        :type databasePath: str
+        :param fullSyncInterval: Most seconds a group may go without a full sync
+        :type fullSyncInterval: int or float
+        """
+        self.fullSyncInterval = fullSyncInterval
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(databasePath, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS group_snapshots ('
+                'groupID TEXT PRIMARY KEY, groupTitle TEXT, courseID INTEGER, rosterHash TEXT, '
+                'members TEXT, hadFailures INTEGER, syncedAt REAL)'
+            )
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS group_outcomes ('
+                'groupTitle TEXT PRIMARY KEY, outcome TEXT, recordedAt REAL)'
+            )
+
+    def getGroupSnapshot(self, groupID):
+        """
+        :param groupID: ID of the ArcGIS group
+        :type groupID: str
+        :return: The group's last snapshot as a dictionary, or None
+        :rtype: dict or None
+        """
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT groupTitle, courseID, rosterHash, members, hadFailures, syncedAt '
+                'FROM group_snapshots WHERE groupID = ?', (groupID,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        (groupTitle, courseID, groupRosterHash, members, hadFailures, syncedAt) = row
+        return {'groupID': groupID, 'groupTitle': groupTitle, 'courseID': courseID, 'rosterHash': groupRosterHash,
+                'members': json.loads(members), 'hadFailures': bool(hadFailures), 'syncedAt': syncedAt}
+
+    def isGroupUnchanged(self, groupID, groupRosterHash):
+        """
+        Check whether a group can be skipped: its roster is the same as at its last
+        sync, that sync had no failures, and a full sync isn't due yet.
+
+        :param groupID: ID of the ArcGIS group
+        :type groupID: str
+        :param groupRosterHash: Hash of the current Canvas roster, from `rosterHash()`
+        :type groupRosterHash: str
+        :rtype: bool
+        """
+        snapshot = self.getGroupSnapshot(groupID)
+        return snapshot is not None \
+            and snapshot['rosterHash'] == groupRosterHash \
+            and not snapshot['hadFailures'] \
+            and time.time() - snapshot['syncedAt'] < self.fullSyncInterval
+
+    def saveGroupSnapshot(self, groupID, groupTitle, courseID, groupRosterHash, members, hadFailures):
+        """
+        Record a full sync of a group.
+
+        :param groupID: ID of the ArcGIS group
+        :type groupID: str
+        :param groupTitle: Title of the ArcGIS group
+        :type groupTitle: str
+        :param courseID: ID of the Canvas course
+        :type courseID: int
+        :param groupRosterHash: Hash of the Canvas roster synced, from `rosterHash()`
+        :type groupRosterHash: str
+        :param members: Usernames of the group members after the sync
+        :type members: list of str
+        :param hadFailures: Whether any users could not be added or removed
+        :type hadFailures: bool
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO group_snapshots '
+                '(groupID, groupTitle, courseID, rosterHash, members, hadFailures, syncedAt) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (groupID, groupTitle, courseID, groupRosterHash, json.dumps(sorted(set(members))),
+                 int(hadFailures), time.time())
+            )
+
+    def forgetGroup(self, groupID, groupTitle):
+        """
+        Remove the snapshots of a group and of any earlier group with its title,
+        e.g., when the group was just created, so it's never skipped because of
+        the state of a group that no longer exists.
+
+        :param groupID: ID of the ArcGIS group
+        :type groupID: str
+        :param groupTitle: Title of the ArcGIS group
+        :type groupTitle: str
+        """
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM group_snapshots WHERE groupID = ? OR groupTitle = ?',
+                                     (groupID, groupTitle))
+
+    def getGroupSnapshotsByTitle(self):
+        """
+        :return: Dictionary of group titles to the last snapshot of each group, as from `getGroupSnapshot()`
+        :rtype: dict
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT groupID, groupTitle, courseID, rosterHash, members, hadFailures, syncedAt '
+                'FROM group_snapshots ORDER BY syncedAt'
+            ).fetchall()
+
+        return {groupTitle: {'groupID': groupID, 'groupTitle': groupTitle, 'courseID': courseID,
+                             'rosterHash': groupRosterHash, 'members': json.loads(members),
+                             'hadFailures': bool(hadFailures), 'syncedAt': syncedAt}
+                for (groupID, groupTitle, courseID, groupRosterHash, members, hadFailures, syncedAt) in rows}
+
+    def getGroupOutcomes(self):
+        """
+        :return: Dictionary of group titles to the outcome of each group's last sync (e.g., "updated" or "failed")
+        :rtype: dict
+        """
+        with self._lock:
+            rows = self._connection.execute('SELECT groupTitle, outcome FROM group_outcomes').fetchall()
+        return dict(rows)
+
+    def saveGroupOutcomes(self, groupOutcomes):
+        """
+        Record the outcomes of a run's group syncs.
+
+        :param groupOutcomes: Dictionary of group titles to outcomes
+        :type groupOutcomes: dict
+        """
+        recordedAt = time.time()
+        with self._lock, self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO group_outcomes (groupTitle, outcome, recordedAt) VALUES (?, ?, ?)',
+                [(groupTitle, outcome, recordedAt) for (groupTitle, outcome) in groupOutcomes.items()]
+            )
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,53 @@
+import unittest
+
+import arcgisUM
+from benchmarks.fakeArcGIS import FakeGIS
+from courseReport import GroupReport
+
+
+class GroupIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.arcGIS = FakeGIS()
+        self.tagged = self.arcGIS.groups.create('Course_1_Map_2', 'kartograafr,umich')
+        self.untagged = self.arcGIS.groups.create('Course_1_Map_3', [])
+
+    def searches(self):
+        return [query for (name, query) in self.arcGIS.calls if name == 'groups.search']
+
+    def test_index_by_title(self):
+        groupIndex = arcgisUM.getArcGISGroupsByTags(self.arcGIS, ('kartograafr', 'umich'))
+        self.assertEqual(groupIndex, {'Course_1_Map_2': self.tagged})
+        self.assertEqual(self.searches(), ['tags:"kartograafr" AND tags:"umich"'])
+
+    def test_lookup_uses_index_then_searches(self):
+        groupIndex = arcgisUM.getArcGISGroupsByTags(self.arcGIS, ('kartograafr', 'umich'))
+        self.assertIs(arcgisUM.lookForExistingArcGISGroup(self.arcGIS, 'Course_1_Map_2', groupIndex), self.tagged)
+        self.assertEqual(len(self.searches()), 1)
+
+        self.assertIs(arcgisUM.lookForExistingArcGISGroup(self.arcGIS, 'Course_1_Map_3', groupIndex), self.untagged)
+        self.assertIsNone(arcgisUM.lookForExistingArcGISGroup(self.arcGIS, 'Course_1_Map_4', groupIndex))
+
+
+class ModifyUsersInGroupTestCase(unittest.TestCase):
+    def setUp(self):
+        self.savedSettings = (arcgisUM.config.ArcGIS.USER_BATCH_SIZE, arcgisUM.config.ArcGIS.USER_BATCH_RETRIES)
+        arcgisUM.config.ArcGIS.USER_BATCH_SIZE = 2
+        arcgisUM.config.ArcGIS.USER_BATCH_RETRIES = 0
+
+    def tearDown(self):
+        (arcgisUM.config.ArcGIS.USER_BATCH_SIZE, arcgisUM.config.ArcGIS.USER_BATCH_RETRIES) = self.savedSettings
+
+    def test_failed_batch_is_reported_not_lost(self):
+        arcGIS = FakeGIS()
+        group = arcGIS.groups.create('Course_1_Map_2', 'kartograafr,umich')
+        groupReport = GroupReport('Course_1_Map_2')
+        usersNotAdded = arcgisUM.modifyUsersInGroup(group, ['ann', 'noaccount1', 'failing1', 'bob', 'cat'], 'add',
+                                                    groupReport)
+        instructorLog = groupReport.render()
+
+        self.assertEqual(arcGIS.calls.count(('add_users', 'Course_1_Map_2')), 3)
+        self.assertIn('Number of users added to group: [2]', instructorLog)
+        for username in ('noaccount1', 'failing1', 'bob'):
+            self.assertIn('* {}_{}'.format(username, arcgisUM.config.ArcGIS.ORG_NAME), instructorLog)
+        self.assertNotIn('* cat_', instructorLog)
+        self.assertEqual(len(usersNotAdded), 3)
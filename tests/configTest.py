@@ -0,0 +1,21 @@
+import unittest
+
+from configuration.config import parseBool
+
+
+class ParseBoolTestCase(unittest.TestCase):
+    def test_json_booleans_and_strings(self):
+        self.assertIs(parseBool(True), True)
+        self.assertIs(parseBool(False), False)
+        self.assertIs(parseBool('true'), True)
+        self.assertIs(parseBool('False'), False)
+        self.assertIs(parseBool(' FALSE '), False)
+
+    def test_other_values_rejected(self):
+        for value in ('no', '', 0, None):
+            with self.assertRaises(ValueError):
+                parseBool(value)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+from datetime import datetime, timezone
+
+from courseReport import CourseReport, GroupReport
+
+
+class CourseReportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.runTime = datetime(2020, 1, 31, 14, 5, 0, tzinfo=timezone.utc)
+
+    def test_group_report_text(self):
+        groupReport = GroupReport('Course_1_Map_2')
+        groupReport.created = True
+        groupReport.groupNameAndID = '"Course_1_Map_2" (ID: a1)'
+        groupReport.recordChanges('remove', 0, [])
+        groupReport.recordChanges('add', 2, ['noacct_umich'])
+
+        self.assertEqual(groupReport.render(),
+                         'Creating ArcGIS group: "Course_1_Map_2"\n'
+                         'Group: "Course_1_Map_2" (ID: a1) \n\n'
+                         'No users were removed.\n\n'
+                         'Number of users added to group: [2]\n\n'
+                         'Some or all users not added to ArcGIS group '
+                         '(These users likely need ArcGIS accounts set up):\n'
+                         '* noacct_umich\n'
+                         '- - -\n')
+
+    def test_problem_replaces_changes(self):
+        groupReport = GroupReport('Course_1_Map_2')
+        groupReport.recordChanges('add', 2, [])
+        groupReport.recordProblem('Problem syncing group "Course_1_Map_2"')
+        self.assertEqual(groupReport.render(), 'Problem syncing group "Course_1_Map_2"\n')
+
+    def test_course_report(self):
+        report = CourseReport(1, 'Course One', self.runTime)
+        self.assertEqual(report.render(), '')
+
+        for title in ('Course_1_Map_2', 'Course_1_Map_3'):
+            groupReport = GroupReport(title)
+            groupReport.recordChanges('add', 1, [])
+            report.addGroupReport(groupReport)
+
+        text = report.render()
+        self.assertTrue(text.startswith('Running at: '))
+        self.assertEqual(text.count('- - -\n'), 2)
+        self.assertLess(text.index('[1]'), text.rindex('[1]'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,202 @@
+import logging
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import arcgisUM
+import main
+import syncState
+from benchmarks.fakeArcGIS import FakeGIS, groupID
+from CanvasAPI.models import Assignment
+
+
+def makeCourse(courseID, *logins):
+    course = SimpleNamespace(id=courseID, name='Course {}'.format(courseID), enrollment_term_id=1)
+    users = [SimpleNamespace(login_id=login) for login in logins]
+    return course, {None: users, main.ENROLLMENT_TYPE_TEACHER: []}
+
+
+def makeAssignment(assignmentID, courseID):
+    return Assignment(id=assignmentID, name='Map {}'.format(assignmentID), course_id=courseID)
+
+
+class GroupSyncTestCase(unittest.TestCase):
+    def setUp(self):
+        patches = [
+            mock.patch.object(main, 'logger', logging.getLogger('kartograafr.groupSyncTest')),
+            mock.patch.object(main, 'syncStateStore', None),
+            mock.patch.object(main, 'courseReports', {}),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+
+class FetchForCoursesTestCase(GroupSyncTestCase):
+    def test_failed_course_is_logged_and_left_out(self):
+        async def fetchCourse(courseID):
+            if courseID == 2:
+                raise RuntimeError('500 Server Error')
+            return courseID * 10
+
+        with self.assertLogs(main.logger, logging.ERROR) as logs:
+            results = main.fetchForCourses(fetchCourse, [1, 2, 3], 'users')
+
+        self.assertEqual(results, {1: 10, 3: 30})
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('Failed to get users for Course 2', logs.output[0])
+
+    def test_assignments_of_unfetched_course_are_skipped(self):
+        arcGIS = FakeGIS()
+        (course1, course1Users) = makeCourse(1, 'ann', 'bob')
+        (course2, course2Users) = makeCourse(2, 'cat')
+        # The users of course 2 could not be fetched.
+        courseUserIndex = {1: course1Users}
+
+        with self.assertLogs(main.logger, logging.WARNING) as logs:
+            groupOutcomes = main.updateArcGISGroupsForAssignments(
+                arcGIS, [makeAssignment(10, 1), makeAssignment(20, 2)], {1: course1, 2: course2}, courseUserIndex)
+
+        self.assertEqual([(outcome['course'].id, outcome['outcome']) for outcome in groupOutcomes], [(1, 'created')])
+        self.assertTrue(any('Skipping Assignment' in line for line in logs.output))
+        self.assertFalse([call for call in arcGIS.calls if 'Course 2' in call[1]])
+        self.assertEqual(list(arcGIS.groups.groups.values())[0].members, {'ann_' + main.config.ArcGIS.ORG_NAME,
+                                                                         'bob_' + main.config.ArcGIS.ORG_NAME})
+
+
+    def test_created_group_is_filled_despite_stale_state(self):
+        arcGIS = FakeGIS()
+        (course1, course1Users) = makeCourse(1, 'ann', 'bob')
+        store = syncState.SyncStateStore(':memory:')
+        self.addCleanup(store.close)
+        # State of a deleted group, whose ID ArcGIS gives to the new group
+        store.saveGroupSnapshot(groupID(1), 'Course 1_1_Map 10_10', 1, syncState.rosterHash(['ann', 'bob']),
+                                ['ann', 'bob'], False)
+
+        with mock.patch.object(main, 'syncStateStore', store):
+            groupOutcomes = main.updateArcGISGroupsForAssignments(arcGIS, [makeAssignment(10, 1)], {1: course1},
+                                                                  {1: course1Users})
+
+        self.assertEqual(groupOutcomes[0]['outcome'], 'created')
+        self.assertEqual(len(arcGIS.groups.groups[groupID(1)].members), 2)
+
+
+class FakeMailDispatcher(object):
+    def __init__(self):
+        self.messages = []
+
+    def send(self, message, recipients, description=''):
+        self.messages.append(message)
+
+
+class ConcurrentGroupSyncTestCase(GroupSyncTestCase):
+    def setUp(self):
+        super(ConcurrentGroupSyncTestCase, self).setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        patches = [
+            mock.patch.object(main.config.ArcGIS, 'SYNC_WORKERS', 6),
+            mock.patch.object(main.config.Application.Logging, 'COURSE_DIRECTORY', self.directory.name),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_groups_synced_once_each_with_failure_isolated_and_ordered_reports(self):
+        arcGIS = FakeGIS()
+        (course1, course1Users) = makeCourse(1, 'ann', 'bob')
+        (course2, course2Users) = makeCourse(2, 'cat')
+        courseDictionary = {1: course1, 2: course2}
+        courseUserIndex = {1: course1Users, 2: course2Users}
+        assignments = [makeAssignment(assignmentID, courseID)
+                       for (assignmentID, courseID) in ((10, 1), (11, 1), (12, 1), (20, 2), (21, 2), (22, 2))]
+        titles = [main.getGroupTitle(courseDictionary[assignment.course_id], assignment) for assignment in assignments]
+        # Earlier groups take longer, so they finish after later ones.
+        for (index, title) in enumerate(titles):
+            arcGIS.delays[title] = 0.01 * (len(titles) - index)
+        arcGIS.failures[titles[1]] = ValueError('Unexpected response from ArcGIS')
+
+        groupOutcomes = main.updateArcGISGroupsForAssignments(arcGIS, assignments, courseDictionary, courseUserIndex)
+
+        self.assertEqual([outcome['assignment'].id for outcome in groupOutcomes], [10, 11, 12, 20, 21, 22])
+        self.assertEqual([outcome['outcome'] for outcome in groupOutcomes],
+                         ['created', 'failed', 'created', 'created', 'created', 'created'])
+        createdTitles = [title for (name, title) in arcGIS.calls if name == 'groups.create']
+        self.assertCountEqual(createdTitles, titles)
+        for (index, group) in enumerate(sorted(arcGIS.groups.groups.values(), key=lambda group: titles.index(group.title))):
+            self.assertEqual(len(group.members), 0 if index == 1 else 2 if index < 3 else 1)
+
+        # Reports list the groups in the order of the assignments, not the order they finished in.
+        self.assertEqual([groupReport.groupTitle for groupReport in main.courseReports['1'].groupReports], titles[:3])
+        self.assertEqual([groupReport.groupTitle for groupReport in main.courseReports['2'].groupReports], titles[3:])
+
+        mailDispatcher = FakeMailDispatcher()
+        for courseID in (1, 2):
+            main.emailCourseReport(courseID, ['prof@example.edu'], mailDispatcher)
+        self.assertEqual(len(mailDispatcher.messages), 2)
+        for (message, assignmentNames) in zip(mailDispatcher.messages, (('Map 10', 'Map 11', 'Map 12'),
+                                                                        ('Map 20', 'Map 21', 'Map 22'))):
+            content = message.get_content()
+            self.assertEqual([content.index(name) for name in assignmentNames],
+                             sorted(content.index(name) for name in assignmentNames))
+
+
+class FakeCycleScheduler(object):
+    """Runs two cycles, without waiting between them."""
+
+    def __init__(self, intervalSeconds, jitterSeconds):
+        self.intervalSeconds = intervalSeconds
+        self.jitterSeconds = jitterSeconds
+        self.cycleCount = 0
+
+    def installSignalHandlers(self):
+        pass
+
+    def run(self, cycleFunction):
+        for _ in range(2):
+            self.cycleCount += 1
+            cycleFunction()
+
+
+class DaemonTestCase(GroupSyncTestCase):
+    def test_authentication_error_in_group_sync_reconnects_next_cycle(self):
+        (course1, course1Users) = makeCourse(1, 'ann')
+        assignment = makeAssignment(10, 1)
+        connections = []
+        cycleOutcomes = []
+
+        def connect(securityinfo):
+            arcGIS = FakeGIS()
+            if not connections:
+                # The token expires after the group search, while the group is synced.
+                arcGIS.failures[main.getGroupTitle(course1, assignment)] = RuntimeError(
+                    'Invalid token.\n(Error Code: 498)')
+            connections.append(arcGIS)
+            return arcGIS
+
+        def runSync(canvas, arcGIS):
+            groupOutcomes = main.updateArcGISGroupsForAssignments(arcGIS, [assignment], {1: course1},
+                                                                  {1: course1Users})
+            cycleOutcomes.append([groupOutcome['outcome'] for groupOutcome in groupOutcomes])
+            return groupOutcomes
+
+        canvas = SimpleNamespace(profiler=None, throttle=SimpleNamespace(resetRetryBudget=lambda: None))
+        patches = [
+            mock.patch.object(arcgisUM, 'getArcGISConnection', side_effect=connect),
+            mock.patch.object(main.scheduler, 'CycleScheduler', FakeCycleScheduler),
+            mock.patch.object(main, 'runSync', runSync),
+        ] + [mock.patch.object(main, name) for name in ('startRun', 'finishRun', 'renameLogForCourseID',
+                                                         'startMainLog')]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        main.runDaemon(canvas)
+
+        self.assertEqual(cycleOutcomes, [['failed'], ['created']])
+        self.assertEqual(len(connections), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import requests
+
+from RequestsPlus import HTTPCache, RequestsPlus
+
+
+class HTTPCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = HTTPCache(os.path.join(self.directory.name, 'cache.db'),
+                               ttlTable=[(r'/outcomes/\d+$', 3600), (r'/pages/', 0)])
+
+    def tearDown(self):
+        self.cache.close()
+        self.directory.cleanup()
+
+    def makeResponse(self, url):
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.headers['ETag'] = '"abc"'
+        response._content = b'{"id": 1}'
+        return response
+
+    def test_key_ignores_param_order(self):
+        self.assertEqual(HTTPCache.makeKey('https://canvas.test/api/v1/courses/1', {'b': 2, 'a': 1}),
+                         HTTPCache.makeKey('https://canvas.test/api/v1/courses/1', {'a': 1, 'b': 2}))
+
+    def test_ttl_table(self):
+        self.assertEqual(self.cache.getTTL('https://canvas.test/api/v1/outcomes/4353'), 3600)
+        self.assertEqual(self.cache.getTTL('https://canvas.test/api/v1/courses/1/pages/course-ids'), 0)
+        self.assertIsNone(self.cache.getTTL('https://canvas.test/api/v1/courses/1/users'))
+
+    def test_store_and_lookup(self):
+        url = 'https://canvas.test/api/v1/outcomes/4353'
+        key = HTTPCache.makeKey(url)
+        self.assertIsNone(self.cache.lookup(key))
+
+        self.cache.store(key, self.makeResponse(url))
+        entry = self.cache.lookup(key)
+        self.assertTrue(self.cache.isFresh(entry))
+        self.assertEqual(HTTPCache.conditionalHeaders(entry), {'If-None-Match': '"abc"'})
+        self.assertEqual(HTTPCache.makeResponse(entry, None).json(), {'id': 1})
+
+    def test_zero_ttl_is_never_fresh(self):
+        url = 'https://canvas.test/api/v1/courses/1/pages/course-ids'
+        key = HTTPCache.makeKey(url)
+        self.cache.store(key, self.makeResponse(url))
+        self.assertFalse(self.cache.isFresh(self.cache.lookup(key)))
+
+
+class CachedGetTestCase(unittest.TestCase):
+    BASE_URL = 'https://canvas.test/api/v1'
+
+    def setUp(self):
+        self.cache = HTTPCache(':memory:', ttlTable=[(r'/courses/\d+/', 3600)])
+        self.addCleanup(self.cache.close)
+        self.client = RequestsPlus(self.BASE_URL, cache=self.cache)
+
+    def sendResponses(self, *responses):
+        sent = []
+
+        def sendRequest(httpMethod, apiQueryURI, **kwargs):
+            sent.append(apiQueryURI)
+            response = responses[len(sent) - 1]
+            response.url = self.BASE_URL + apiQueryURI
+            return response
+
+        return mock.patch.object(self.client, '_sendRequest', side_effect=sendRequest), sent
+
+    def makeResponse(self, statusCode=200, nextLink=None):
+        response = requests.Response()
+        response.status_code = statusCode
+        response._content = b'[{"id": 1}]'
+        if nextLink is not None:
+            response.headers['Link'] = '<{}{}>; rel="next"'.format(self.BASE_URL, nextLink)
+        return response
+
+    def test_only_single_pages_cached(self):
+        (patch, sent) = self.sendResponses(self.makeResponse(nextLink='/courses/1/assignments?page=2'),
+                                           self.makeResponse(nextLink='/courses/1/assignments?page=2'),
+                                           self.makeResponse(), self.makeResponse())
+        with patch:
+            for apiQueryURI in ('/courses/1/assignments', '/courses/1/assignments',
+                                '/courses/1/pages/ids', '/courses/1/pages/ids'):
+                self.client._getWithCache(apiQueryURI)
+
+        # The list with a following page is requested each time, the single page only once.
+        self.assertEqual(sent, ['/courses/1/assignments', '/courses/1/assignments', '/courses/1/pages/ids'])
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 3))
+
+    def test_failed_requests_counted_as_misses(self):
+        (patch, sent) = self.sendResponses(self.makeResponse(404), self.makeResponse(404))
+        with patch:
+            for _ in range(2):
+                self.assertEqual(self.client._getWithCache('/courses/1/pages/ids').status_code, 404)
+
+        self.assertEqual(len(sent), 2)
+        self.assertEqual(self.cache.stats()['misses'], 2)
@@ -0,0 +1,147 @@
+import io
+import logging
+import threading
+import unittest
+
+from logPipeline import LogPipeline
+
+
+class ListHandler(logging.Handler):
+    def __init__(self, level=logging.NOTSET):
+        super(ListHandler, self).__init__(level)
+        self.messages = []
+        self.closed = False
+
+    def emit(self, record):
+        self.messages.append(self.format(record))
+
+    def close(self):
+        self.closed = True
+        super(ListHandler, self).close()
+
+
+class LogPipelineTestCase(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger('kartograafr.logPipelineTest')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.DEBUG)
+        self.addCleanup(setattr, self.logger, 'propagate', True)
+
+    def startPipeline(self, *handlers):
+        pipeline = LogPipeline(list(handlers), deferredLoggerNames=('kartograafr',))
+        self.logger.addHandler(pipeline.handler)
+        self.addCleanup(self.logger.removeHandler, pipeline.handler)
+        pipeline.start()
+        return pipeline
+
+    def test_records_written_at_handler_levels(self):
+        everything = ListHandler()
+        warnings = ListHandler(logging.WARNING)
+        pipeline = self.startPipeline(everything, warnings)
+
+        self.logger.info('synced %s', 'Course_1_Map_2')
+        self.logger.warning('could not add %d users', 3)
+        pipeline.stop()
+
+        self.assertEqual(everything.messages, ['synced Course_1_Map_2', 'could not add 3 users'])
+        self.assertEqual(warnings.messages, ['could not add 3 users'])
+        self.assertTrue(everything.closed and warnings.closed)
+
+    def test_only_deferred_loggers_formatted_on_writer_thread(self):
+        formattingThreads = {}
+
+        class Argument(object):
+            def __init__(self, name):
+                self.name = name
+
+            def __str__(self):
+                formattingThreads[self.name] = threading.current_thread().name
+                return 'report'
+
+        libraryLogger = logging.getLogger('urllib3.logPipelineTest')
+        libraryLogger.propagate = False
+        libraryLogger.setLevel(logging.DEBUG)
+        self.addCleanup(setattr, libraryLogger, 'propagate', True)
+
+        handler = ListHandler()
+        pipeline = self.startPipeline(handler)
+        libraryLogger.addHandler(pipeline.handler)
+        self.addCleanup(libraryLogger.removeHandler, pipeline.handler)
+
+        self.logger.info('group %s', Argument('group'))
+        try:
+            raise ValueError('group failed')
+        except ValueError:
+            self.logger.exception('sync of %s failed', Argument('exception'))
+        libraryLogger.info('connection %s', Argument('library'))
+        pipeline.stop()
+
+        self.assertEqual(formattingThreads, {'group': 'logPipeline', 'exception': 'logPipeline',
+                                             'library': threading.current_thread().name})
+        self.assertEqual(handler.messages[0], 'group report')
+        self.assertTrue(handler.messages[1].startswith('sync of report failed\nTraceback'))
+        self.assertIn('ValueError: group failed', handler.messages[1])
+        self.assertEqual(handler.messages[2], 'connection report')
+
+    def test_replace_handler_after_queued_records(self):
+        firstRun = ListHandler()
+        pipeline = self.startPipeline(firstRun)
+        for number in range(100):
+            self.logger.info('first run %d', number)
+
+        secondRun = ListHandler()
+        pipeline.replaceHandler(firstRun, secondRun)
+        self.logger.info('second run')
+        pipeline.stop()
+
+        self.assertEqual(len(firstRun.messages), 100)
+        self.assertTrue(firstRun.closed)
+        self.assertEqual(secondRun.messages, ['second run'])
+
+    def test_waiting_records_written_at_once(self):
+        stream = WriteCountingStream()
+        handler = logging.StreamHandler(stream)
+        pipeline = LogPipeline([handler], maxBatchSize=50)
+        self.logger.addHandler(pipeline.handler)
+        self.addCleanup(self.logger.removeHandler, pipeline.handler)
+
+        # Queued before the pipeline starts, so they're all waiting when it does.
+        for number in range(120):
+            self.logger.info('user %d', number)
+        pipeline.start()
+        pipeline.stop()
+
+        self.assertEqual(stream.getvalue().splitlines(), ['user {}'.format(number) for number in range(120)])
+        self.assertEqual(stream.writeCount, 3)
+        self.assertEqual((pipeline.batchCount, pipeline.recordCount), (3, 120))
+
+
+    def test_unformattable_record_reported_and_rest_written(self):
+        stream = io.StringIO()
+        handler = logging.StreamHandler(stream)
+        failedRecords = []
+        handler.handleError = failedRecords.append
+        pipeline = LogPipeline([handler], deferredLoggerNames=('kartograafr',))
+        self.logger.addHandler(pipeline.handler)
+        self.addCleanup(self.logger.removeHandler, pipeline.handler)
+
+        self.logger.info('user %d', 1)
+        self.logger.info('user %d', 'two')
+        self.logger.info('user %d', 3)
+        pipeline.start()
+        pipeline.stop()
+
+        self.assertEqual(stream.getvalue().splitlines(), ['user 1', 'user 3'])
+        self.assertEqual([record.args for record in failedRecords], [('two',)])
+
+
+class WriteCountingStream(io.StringIO):
+    writeCount = 0
+
+    def write(self, text):
+        self.writeCount += 1
+        return super(WriteCountingStream, self).write(text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import smtplib
+import socketserver
+import threading
+import unittest
+from email.message import EmailMessage
+
+from mailer import MailDispatcher
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough of SMTP for smtplib to send messages.  Closes the connection after messagesPerConnection."""
+
+    def reply(self, line):
+        self.wfile.write((line + '\r\n').encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connectionCount += 1
+        messageCount = 0
+
+        self.reply('220 localhost ready')
+        for line in self.rfile:
+            command = line.decode().strip().upper()
+            if command.startswith(('EHLO', 'HELO')):
+                self.reply('250 localhost')
+            elif command.startswith('RCPT'):
+                with server.lock:
+                    server.recipientCount += 1
+                if any(address.upper() in command for address in server.refusedRecipients):
+                    self.reply('550 No such user')
+                else:
+                    self.reply('250 OK')
+            elif command.startswith(('MAIL', 'RSET', 'NOOP')):
+                self.reply('250 OK')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                for dataLine in self.rfile:
+                    if dataLine in (b'.\r\n', b'.\n'):
+                        break
+                with server.lock:
+                    server.messageCount += 1
+                messageCount += 1
+                self.reply('250 OK')
+                if messageCount == server.messagesPerConnection:
+                    return
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Not implemented')
+
+
+class SMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+
+    def __init__(self, messagesPerConnection=None, refusedRecipients=()):
+        super(SMTPServer, self).__init__(('127.0.0.1', 0), SMTPHandler)
+        self.messagesPerConnection = messagesPerConnection
+        self.refusedRecipients = refusedRecipients
+        self.lock = threading.Lock()
+        self.connectionCount = 0
+        self.messageCount = 0
+        self.recipientCount = 0
+
+
+class MailDispatcherTestCase(unittest.TestCase):
+    def startServer(self, messagesPerConnection=None, refusedRecipients=()):
+        server = SMTPServer(messagesPerConnection, refusedRecipients)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def makeMessage(self, number):
+        message = EmailMessage()
+        message['From'] = 'kartograafr@example.edu'
+        message['To'] = 'prof@example.edu'
+        message['Subject'] = 'Logs for course {}'.format(number)
+        message.set_content('Group synced.')
+        return message
+
+    def test_connection_reused_for_all_messages(self):
+        server = self.startServer()
+        with MailDispatcher('127.0.0.1:{}'.format(server.server_address[1]), connectionCount=1) as dispatcher:
+            for number in range(5):
+                dispatcher.send(self.makeMessage(number), ['prof@example.edu'])
+
+        self.assertEqual(server.messageCount, 5)
+        self.assertEqual(server.connectionCount, 1)
+        self.assertEqual(dispatcher.stats()['sent'], 5)
+
+    def test_reconnects_when_server_closes_connection(self):
+        server = self.startServer(messagesPerConnection=2)
+        with MailDispatcher('127.0.0.1:{}'.format(server.server_address[1]), connectionCount=1,
+                            background=True) as dispatcher:
+            futures = [dispatcher.send(self.makeMessage(number), ['prof@example.edu']) for number in range(5)]
+
+        self.assertTrue(all(future.exception() is None for future in futures))
+        self.assertEqual(server.messageCount, 5)
+        self.assertEqual(dispatcher.stats()['reconnects'], 2)
+
+    def test_refused_message_not_sent_again(self):
+        server = self.startServer(refusedRecipients=('gone@example.edu',))
+        with MailDispatcher('127.0.0.1:{}'.format(server.server_address[1]), connectionCount=1) as dispatcher:
+            future = dispatcher.send(self.makeMessage(1), ['gone@example.edu'])
+
+        self.assertIsInstance(future.exception(), smtplib.SMTPRecipientsRefused)
+        self.assertEqual(server.recipientCount, 1)
+        self.assertEqual(server.connectionCount, 1)
+        self.assertEqual(dispatcher.stats()['reconnects'], 0)
+        self.assertEqual(dispatcher.stats()['failed'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,17 @@
+import json
+import logging
 import unittest
 import util
+from datetime import datetime, timezone
 import re
+from unittest import mock
+
+import requests
 
 import main
+from CanvasAPI import CanvasAPI
+from CanvasAPI.models import Assignment, User
+from RequestsPlus import ResponseCollection
 #from cssutils.helper import string
 
 FIVE = ['BACH','DYLAN','BROWN','SIMON','SMALTZ']
@@ -121,5 +130,93 @@ class MembershipTestCase(unittest.TestCase):
         self.assertListUnorderedEqual(r1,[])
         self.assertListUnorderedEqual(r2,[])
         self.assertListUnorderedEqual(r3,['TWO','THREE'])
-        
+
+
+class CourseUserIndexTestCase(unittest.TestCase):
+
+    def test_index_by_enrollment_type(self):
+        teacher = User.fromJSON({'id': 1, 'login_id': 'prof', 'enrollments': [
+            {'type': 'TeacherEnrollment', 'enrollment_state': 'active'}]})
+        student = User.fromJSON({'id': 2, 'login_id': 'stu', 'enrollments': [
+            {'type': 'StudentEnrollment', 'enrollment_state': 'active'},
+            {'type': 'TeacherEnrollment', 'enrollment_state': 'inactive'}]})
+
+        courseUserIndex = main.indexCourseUsersByRole({5: [teacher, student]})
+
+        self.assertEqual(courseUserIndex[5][None], [teacher, student])
+        self.assertEqual(courseUserIndex[5]['TeacherEnrollment'], [teacher])
+        self.assertEqual(courseUserIndex[5]['StudentEnrollment'], [student])
+
+
+class FailingPageCanvas(object):
+    """Canvas whose users of a course are two pages, the second of which fails."""
+
+    URL = 'https://canvas.test/api/v1/courses/5/users'
+    pagePrefetchWorkers = 4
+    getCoursesUsersObjects = CanvasAPI.getCoursesUsersObjects
+    getCoursesUsersObjectsAsync = CanvasAPI.getCoursesUsersObjectsAsync
+
+    def makePage(self, statusCode, body, nextLink=None):
+        response = requests.Response()
+        response.status_code = statusCode
+        response.url = self.URL
+        response._content = json.dumps(body).encode()
+        if nextLink is not None:
+            response.headers['Link'] = '<{}?page={}>; rel="next"'.format(self.URL, nextLink)
+        response.request = requests.Request('GET', self.URL).prepare()
+        return response
+
+    def getCoursesUsers(self, courseID, enrollmentType=None, **kwargs):
+        return self.makePage(200, [{'id': 30, 'name': 'Cat', 'login_id': 'cat', 'enrollments': []}], nextLink=2)
+
+    def responseCollection(self, response):
+        return ResponseCollection(response, sendRequest=lambda request: self.makePage(
+            500, {'errors': [{'message': 'An error occurred.'}]}))
+
+    async def runAsync(self, function, *args, **kwargs):
+        return function(*args, **kwargs)
+
+
+class CoursesUsersTestCase(unittest.TestCase):
+
+    def test_failed_page_leaves_course_out(self):
+        with mock.patch.object(main, 'logger', logging.getLogger('kartograafr.memberTest')), \
+                self.assertLogs(main.logger, logging.ERROR) as logs:
+            coursesUsers = main.getCoursesUsersByID(FailingPageCanvas(), [5])
+
+        # A course left out has its groups skipped, instead of synced with the users of the first page only.
+        self.assertEqual(coursesUsers, {})
+        self.assertIn('500 Server Error', logs.output[0])
+
+
+class GroupSyncPriorityTestCase(unittest.TestCase):
+
+    NOW = datetime(2026, 10, 1, tzinfo=timezone.utc).timestamp()
+
+    def makeAssignment(self, dueAt=None, unlockAt=None):
+        return Assignment.fromJSON({'id': 1, 'name': 'Map', 'course_id': 5, 'due_at': dueAt, 'unlock_at': unlockAt})
+
+    def makeSnapshot(self, members, hadFailures=False):
+        return {'members': members, 'hadFailures': hadFailures}
+
+    def test_priority_order(self):
+        users = ['ann', 'bob', 'cat']
+        priorities = {
+            'unchanged': main.getGroupSyncPriority(self.makeAssignment('2026-10-02T00:00:00Z'), users,
+                                                   self.makeSnapshot(users), now=self.NOW),
+            'failed': main.getGroupSyncPriority(self.makeAssignment(), users, self.makeSnapshot(users),
+                                                lastOutcome='failed', now=self.NOW),
+            'dueSoon': main.getGroupSyncPriority(self.makeAssignment('2026-10-03T00:00:00Z'), users,
+                                                 self.makeSnapshot(['ann']), now=self.NOW),
+            'unlocksSooner': main.getGroupSyncPriority(self.makeAssignment('2026-12-01T00:00:00Z',
+                                                                           '2026-10-02T00:00:00Z'),
+                                                       users, self.makeSnapshot(['ann', 'bob']), now=self.NOW),
+            'dueLater': main.getGroupSyncPriority(self.makeAssignment('2026-12-01T00:00:00Z'), users,
+                                                  self.makeSnapshot(['ann', 'bob']), now=self.NOW),
+            'neverSynced': main.getGroupSyncPriority(self.makeAssignment(), users, now=self.NOW),
+        }
+
+        self.assertEqual(sorted(priorities, key=priorities.get),
+                         ['failed', 'unlocksSooner', 'dueSoon', 'neverSynced', 'dueLater', 'unchanged'])
+
 #end
\ No newline at end of file
@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+
+import metrics
+import profiling
+
+
+class RunMetricsTestCase(unittest.TestCase):
+
+    def test_render_counters_and_gauges(self):
+        runMetrics = metrics.RunMetrics()
+        runMetrics.increment('groups_total', outcome='created')
+        runMetrics.increment('groups_total', 2, outcome='created')
+        runMetrics.setGauge('run_success', 1)
+
+        lines = runMetrics.render().splitlines()
+        self.assertIn('# TYPE kartograafr_groups_total counter', lines)
+        self.assertIn('kartograafr_groups_total{outcome="created"} 3', lines)
+        self.assertIn('kartograafr_run_success 1', lines)
+
+    def test_unknown_metric(self):
+        with self.assertRaises(ValueError):
+            metrics.RunMetrics().increment('no_such_metric')
+
+    def test_run_profile_histogram(self):
+        profiler = profiling.RunProfiler()
+        profiler.startPhase('group sync')
+        profiler.recordCall('ArcGIS', 'getArcGISGroupsByTags', 0.2)
+        profiler.recordCall('ArcGIS', 'getArcGISGroupsByTags', 3.0, error=True)
+
+        runMetrics = metrics.RunMetrics()
+        runMetrics.addRunProfile(profiler.report())
+        lines = runMetrics.render().splitlines()
+
+        self.assertIn('kartograafr_request_errors_total{endpoint="getArcGISGroupsByTags",service="ArcGIS"} 1', lines)
+        self.assertIn('kartograafr_request_duration_seconds_bucket{service="ArcGIS",le="0.25"} 1', lines)
+        self.assertIn('kartograafr_request_duration_seconds_bucket{service="ArcGIS",le="5.0"} 2', lines)
+        self.assertIn('kartograafr_request_duration_seconds_count{service="ArcGIS"} 2', lines)
+
+    def test_write_textfile(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'kartograafr.prom')
+            runMetrics = metrics.RunMetrics()
+            runMetrics.setGauge('run_success', 0)
+            runMetrics.writeTextfile(path)
+
+            with open(path) as metricsFile:
+                self.assertIn('kartograafr_run_success 0', metricsFile.read())
+            self.assertEqual(os.listdir(directory), ['kartograafr.prom'])
+
+
+if __name__ == '__main__':
+    unittest.main()
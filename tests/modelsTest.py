@@ -0,0 +1,35 @@
+import unittest
+
+from CanvasAPI.models import Assignment, OutcomeLink, User
+
+
+class CanvasRecordTestCase(unittest.TestCase):
+
+    def test_keeps_only_record_fields(self):
+        user = User.fromJSON({'id': 7, 'name': 'Ann', 'login_id': 'ann', 'permissions': {'can_update': True}})
+        self.assertEqual(user.login_id, 'ann')
+        self.assertFalse(hasattr(user, '__dict__'))
+        self.assertIsNone(user.permissions)
+
+    def test_missing_field_is_none(self):
+        assignment = Assignment.fromJSON({'id': 1, 'name': 'Map'})
+        self.assertIsNone(assignment.lock_at)
+        self.assertIsNone(assignment.rubric)
+
+    def test_nested_records(self):
+        assignment = Assignment.fromJSON({'id': 1, 'name': 'Map',
+                                          'rubric': [{'id': 'r1', 'outcome_id': 4353, 'points': 5}]})
+        self.assertEqual(assignment.rubric[0].outcome_id, 4353)
+
+        outcomeLink = OutcomeLink.fromJSON({'outcome': {'id': 4353, 'title': 'ArcGIS Group'}})
+        self.assertEqual(outcomeLink.outcome.id, 4353)
+
+    def test_str(self):
+        self.assertEqual(str(Assignment.fromJSON({'id': 1, 'name': 'Map'})), '"Map" (1)')
+        self.assertEqual(str(OutcomeLink.fromJSON({'outcome': {'id': 2, 'title': 'T'}}).outcome), '"T" (2)')
+
+    def test_hashable(self):
+        users = {User.fromJSON({'id': 7, 'login_id': 'ann'}), User.fromJSON({'id': 7, 'login_id': 'ann'}),
+                 User.fromJSON({'id': 8, 'login_id': 'bob'})}
+        self.assertEqual(len(users), 2)
+        self.assertIn(User.fromJSON({'id': 8, 'login_id': 'bob'}), users)
@@ -0,0 +1,50 @@
+import unittest
+
+import requests
+
+import profiling
+
+
+class RunProfilerTestCase(unittest.TestCase):
+
+    def tearDown(self):
+        profiling._activeProfiler = None
+
+    def test_endpoint_for_url(self):
+        self.assertEqual(profiling.endpointForURL('https://canvas.test/api/v1/courses/12/users?page=2'),
+                         '/api/v1/courses/:id/users')
+
+    def test_requests_grouped_by_endpoint(self):
+        profiler = profiling.RunProfiler()
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'[{"id": 1}]'
+
+        profiler.recordRequest('CanvasAPI', 'https://canvas.test/api/v1/courses/1/users', 0.5, response)
+        profiler.recordRequest('CanvasAPI', 'https://canvas.test/api/v1/courses/2/users', 0.25, None)
+        profiler.recordRetry('CanvasAPI', 'https://canvas.test/api/v1/courses/2/users')
+
+        (endpointStats,) = profiler.report()['endpoints']
+        self.assertEqual((endpointStats['calls'], endpointStats['errors'], endpointStats['retries']), (2, 1, 1))
+        self.assertEqual((endpointStats['seconds'], endpointStats['bytes']), (0.75, 11))
+
+    def test_phases_and_profiled_calls(self):
+        @profiling.profiledCall('ArcGIS')
+        def searchGroups():
+            return 'groups'
+
+        self.assertEqual(searchGroups(), 'groups')  # Not recorded, profiling is off
+
+        profiler = profiling.startProfiling()
+        profiling.startPhase('group sync')
+        searchGroups()
+        profiling.startPhase('email')
+
+        report = profiler.report()
+        self.assertEqual([phase['name'] for phase in report['phases']], ['group sync', 'email'])
+        self.assertEqual([(endpointStats['endpoint'], endpointStats['calls']) for endpointStats in report['endpoints']],
+                         [('searchGroups', 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
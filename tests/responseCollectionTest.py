@@ -0,0 +1,139 @@
+import asyncio
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+from RequestsPlus import RequestsTransport, ResponseCollection
+
+
+def makeResponse(linkHeader):
+    response = requests.Response()
+    response.status_code = 200
+    response.headers['Link'] = linkHeader
+    return response
+
+
+class RemainingPageURIsTestCase(unittest.TestCase):
+
+    def test_numeric_pages(self):
+        response = makeResponse(
+            '<https://canvas.test/api/v1/courses/1/users?page=2&per_page=10>; rel="next", '
+            '<https://canvas.test/api/v1/courses/1/users?page=4&per_page=10>; rel="last"')
+        uris = ResponseCollection(response).getRemainingPageURIs()
+        self.assertEqual(uris, [
+            'https://canvas.test/api/v1/courses/1/users?page=2&per_page=10',
+            'https://canvas.test/api/v1/courses/1/users?page=3&per_page=10',
+            'https://canvas.test/api/v1/courses/1/users?page=4&per_page=10',
+        ])
+
+    def test_bookmark_pages(self):
+        response = makeResponse(
+            '<https://canvas.test/api/v1/courses/1/users?page=bookmark:WzEwXQ&per_page=10>; rel="next"')
+        self.assertIsNone(ResponseCollection(response).getRemainingPageURIs())
+
+    def test_no_next_page(self):
+        response = makeResponse(
+            '<https://canvas.test/api/v1/courses/1/users?page=1&per_page=10>; rel="last"')
+        self.assertIsNone(ResponseCollection(response).getRemainingPageURIs())
+
+
+class AsyncPaginationTestCase(unittest.TestCase):
+    BASE_URL = 'https://canvas.test/api/v1/courses/1/users'
+
+    def makePage(self, page, lastPage=3):
+        links = ['<{}?page={}>; rel="last"'.format(self.BASE_URL, lastPage)]
+        if page < lastPage:
+            links.append('<{}?page={}>; rel="next"'.format(self.BASE_URL, page + 1))
+        response = makeResponse(', '.join(links))
+        response._content = json.dumps([{'id': page}]).encode()
+        response.request = requests.Request('GET', '{}?page={}'.format(self.BASE_URL, page)).prepare()
+        return response
+
+    def makeCollection(self):
+        self.sentURLs = []
+
+        async def sendRequestAsync(preparedRequest):
+            self.sentURLs.append(preparedRequest.url)
+            return self.makePage(int(preparedRequest.url.rsplit('=', 1)[1]))
+
+        return ResponseCollection(self.makePage(1), sendRequestAsync=sendRequestAsync)
+
+    def test_aiter_json_records(self):
+        async def collectIDs():
+            return [record['id'] async for record in self.makeCollection().aiterJsonRecords(dict)]
+
+        self.assertEqual(asyncio.run(collectIDs()), [1, 2, 3])
+
+    def test_failed_following_page_raises(self):
+        def failPage(preparedRequest):
+            response = requests.Response()
+            response.status_code = 500
+            response._content = b'{"errors": [{"message": "An error occurred."}]}'
+            return response
+
+        collection = ResponseCollection(self.makePage(1), sendRequest=failPage)
+        with self.assertRaises(requests.HTTPError):
+            list(collection.iterJson())
+        with self.assertRaises(requests.HTTPError):
+            ResponseCollection(self.makePage(1), sendRequest=failPage).collectAllResponsePages().json()
+
+    def test_collect_all_pages_with_prefetch(self):
+        collection = asyncio.run(self.makeCollection().collectAllResponsePagesAsync(prefetchPages=True))
+        self.assertEqual([item['id'] for item in collection.json()], [1, 2, 3])
+        self.assertEqual(len(self.sentURLs), 2)
+
+    def test_prefetch_bounded_by_max_workers(self):
+        inFlight = []
+        mostInFlight = []
+
+        async def sendRequestAsync(preparedRequest):
+            inFlight.append(preparedRequest.url)
+            mostInFlight.append(len(inFlight))
+            await asyncio.sleep(0.01)
+            inFlight.remove(preparedRequest.url)
+            return self.makePage(int(preparedRequest.url.rsplit('=', 1)[1]), lastPage=9)
+
+        collection = ResponseCollection(self.makePage(1, lastPage=9), sendRequestAsync=sendRequestAsync)
+        collection = asyncio.run(collection.collectAllResponsePagesAsync(prefetchPages=True, maxWorkers=3))
+
+        self.assertEqual([item['id'] for item in collection.json()], list(range(1, 10)))
+        self.assertEqual(max(mostInFlight), 3)
+
+
+class PagesHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep connections alive
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        page = int(parse_qs(urlsplit(self.path).query)['page'][-1])
+        body = json.dumps([{'id': page}]).encode()
+        self.send_response(200)
+        if page < 3:
+            self.send_header('Link', '<http://{}:{}/items?page={}>; rel="next"'.format(
+                *self.server.server_address, page + 1))
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ConnectionReuseTestCase(unittest.TestCase):
+
+    def test_pages_share_pooled_connections(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), PagesHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        transport = RequestsTransport(poolMaxSize=2)
+        response = transport.request('get', 'http://127.0.0.1:{}/items?page=1'.format(server.server_port))
+        collection = ResponseCollection(response, session=transport.session, sendRequest=transport.send) \
+            .collectAllResponsePages()
+
+        self.assertEqual([item['id'] for item in collection.json()], [1, 2, 3])
+        self.assertEqual(transport.connectionStats(), {'opened': 1, 'reused': 2, 'requests': 3})
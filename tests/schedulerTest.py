@@ -0,0 +1,60 @@
+import unittest
+from unittest import mock
+
+from arcgisUM import ArcGISConnectionKeeper, isAuthenticationError
+from scheduler import CycleScheduler
+
+
+class CycleSchedulerTestCase(unittest.TestCase):
+    def test_next_delay_counts_from_cycle_start(self):
+        cycleScheduler = CycleScheduler(intervalSeconds=60, jitterSeconds=0)
+        self.assertEqual(cycleScheduler.nextDelay(15), 45)
+        self.assertEqual(cycleScheduler.nextDelay(90), 0)
+
+    def test_next_delay_adds_jitter(self):
+        cycleScheduler = CycleScheduler(intervalSeconds=60, jitterSeconds=10)
+        for _ in range(100):
+            self.assertTrue(50 <= cycleScheduler.nextDelay(10) <= 60)
+
+    def test_runs_until_stopped_despite_errors(self):
+        cycleScheduler = CycleScheduler(intervalSeconds=0)
+        calls = []
+
+        def cycle():
+            calls.append(cycleScheduler.cycleCount)
+            if len(calls) == 1:
+                raise RuntimeError('first cycle fails')
+            if len(calls) == 3:
+                cycleScheduler.stop()
+
+        cycleScheduler.run(cycle)
+        self.assertEqual(calls, [1, 2, 3])
+
+    def test_stop_cuts_wait_short(self):
+        cycleScheduler = CycleScheduler(intervalSeconds=3600)
+        cycleScheduler.run(cycleScheduler.stop)
+        self.assertEqual(cycleScheduler.cycleCount, 1)
+
+
+class ArcGISConnectionKeeperTestCase(unittest.TestCase):
+    def test_connection_reused_until_invalidated_or_old(self):
+        with mock.patch('arcgisUM.getArcGISConnection', side_effect=lambda securityinfo: object()):
+            keeper = ArcGISConnectionKeeper({}, maxAgeSeconds=3600)
+            connection = keeper.get()
+            self.assertIs(keeper.get(), connection)
+
+            keeper.invalidate()
+            self.assertIsNot(keeper.get(), connection)
+
+            keeper.maxAgeSeconds = 0
+            keeper.get()
+            self.assertEqual(keeper.connectCount, 3)
+
+    def test_authentication_errors(self):
+        self.assertTrue(isAuthenticationError(Exception('Invalid token.\n(Error Code: 498)')))
+        self.assertTrue(isAuthenticationError(Exception('Token Required')))
+        self.assertFalse(isAuthenticationError(RuntimeError('Group not found')))
+
+
+if __name__ == '__main__':
+    unittest.main()
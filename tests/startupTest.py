@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+import main
+import syncState
+from CanvasAPI import CanvasAPI
+from RequestsPlus import HTTPCache
+
+REPOSITORY_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Packages only imported when they're first used, because they're slow to import
+LAZY_IMPORTS = ('arcgis', 'bs4', 'dateutil.parser', 'smtplib')
+
+
+class StartupTestCase(unittest.TestCase):
+    def test_heavy_packages_not_imported_with_main(self):
+        # A new process, since other tests may have imported them already
+        completedProcess = subprocess.run(
+            [sys.executable, '-c', 'import sys, main; print(" ".join(sorted(set(sys.argv[1:]) & set(sys.modules))))']
+            + list(LAZY_IMPORTS),
+            cwd=REPOSITORY_DIRECTORY, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True,
+        )
+        self.assertEqual(completedProcess.returncode, 0, completedProcess.stderr)
+        self.assertEqual(completedProcess.stdout.strip(), '')
+
+
+class ShutdownTestCase(unittest.TestCase):
+    def test_connections_closed(self):
+        canvas = CanvasAPI('https://canvas.test/api/v1', cache=HTTPCache(':memory:'))
+        store = syncState.SyncStateStore(':memory:')
+        closers = [canvas.cache, canvas.transport, canvas.asyncTransport, store]
+        closes = [mock.patch.object(closer, 'close', wraps=closer.close) for closer in closers]
+        for patch in closes + [mock.patch.object(main, 'syncStateStore', store)]:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        main.closeConnections(canvas)
+
+        for closer in closers:
+            closer.close.assert_called_once_with()
+        # Shutting down the request threads' executor is what closing the async transport is for.
+        with self.assertRaises(RuntimeError):
+            canvas.asyncTransport._executor.submit(print)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+
+import syncEvents
+from syncEvents import SyncEventWriter, readEvents, summarize
+
+
+class SyncEventsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'events.jsonl')
+
+    def tearDown(self):
+        syncEvents.stopRecording()
+        self.directory.cleanup()
+
+    def test_events_buffered_until_full_or_closed(self):
+        writer = SyncEventWriter(self.path, 'run1', bufferSize=2)
+        writer.record('group_lookup', group='Course_1_Map_2', source='index', found=True, seconds=0.0)
+        self.assertEqual(os.path.getsize(self.path), 0)
+
+        writer.record('group_lookup', group='Course_1_Map_3', source='search', found=False, seconds=0.1)
+        self.assertEqual(len(list(readEvents(self.path))), 2)
+
+        writer.record('group_create', group='Course_1_Map_3', groupID='a1', succeeded=True, seconds=0.2,
+                      error=None)
+        writer.close()
+        events = list(readEvents(self.path))
+        self.assertEqual([event['event'] for event in events], ['group_lookup', 'group_lookup', 'group_create'])
+        self.assertEqual(events[2]['run'], 'run1')
+
+        with self.assertRaises(ValueError):
+            writer.record('group_deleted', group='Course_1_Map_3')
+
+    def test_record_only_while_recording(self):
+        syncEvents.record('group_lookup', group='Course_1_Map_2', source='index', found=True, seconds=0.0)
+        syncEvents.startRecording(self.path, 'run1')
+        syncEvents.record('group_lookup', group='Course_1_Map_2', source='index', found=True, seconds=0.0)
+        syncEvents.stopRecording()
+        syncEvents.record('group_lookup', group='Course_1_Map_2', source='index', found=True, seconds=0.0)
+
+        self.assertEqual(len(list(readEvents(self.path))), 1)
+
+    def test_summarize_by_course_and_term(self):
+        writer = SyncEventWriter(self.path, 'run1')
+        for (courseID, term, group, outcome) in ((1, 10, 'Course_1_Map_2', 'created'),
+                                                 (1, 10, 'Course_1_Map_3', 'failed'),
+                                                 (2, 10, 'Course_2_Map_4', 'updated')):
+            writer.record('users_batch', group=group, groupID=group, mode='add', users=4, notChanged=1, seconds=0.5,
+                          error=None)
+            writer.record('group_sync', group=group, course=courseID, courseName='Course {}'.format(courseID),
+                          term=term, assignment=2, outcome=outcome, seconds=1.0, error=None)
+        writer.close()
+        with open(self.path, 'a') as eventFile:
+            eventFile.write('{"time": 1, "run": "run1", "eve')
+
+        byCourse = summarize(readEvents(self.path), by='course')
+        self.assertEqual([(row['course'], row['groups'], row['failed'], row['usersAdded']) for row in byCourse],
+                         [(1, 2, 1, 6), (2, 1, 0, 3)])
+        self.assertEqual(byCourse[0]['usersPerBatchSecond'], 6.0)
+
+        (byTerm,) = summarize(readEvents(self.path), by='term')
+        self.assertEqual((byTerm['term'], byTerm['groups'], byTerm['usersNotChanged']), (10, 3, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
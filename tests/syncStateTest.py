@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+
+from syncState import SyncStateStore, rosterHash
+
+
+class SyncStateStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = SyncStateStore(os.path.join(self.directory.name, 'state.db'), fullSyncInterval=3600)
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_roster_hash_ignores_order_and_duplicates(self):
+        self.assertEqual(rosterHash(['b', 'a', 'a']), rosterHash(['a', 'b']))
+        self.assertNotEqual(rosterHash(['a', 'b']), rosterHash(['a', 'c']))
+
+    def test_unknown_group_is_changed(self):
+        self.assertIsNone(self.store.getGroupSnapshot('g1'))
+        self.assertFalse(self.store.isGroupUnchanged('g1', rosterHash(['a'])))
+
+    def test_saved_group_is_unchanged(self):
+        self.store.saveGroupSnapshot('g1', 'Course_1_Assignment_2', 1, rosterHash(['a', 'b']), ['b', 'a'], False)
+        self.assertTrue(self.store.isGroupUnchanged('g1', rosterHash(['a', 'b'])))
+        self.assertFalse(self.store.isGroupUnchanged('g1', rosterHash(['a'])))
+        self.assertEqual(self.store.getGroupSnapshot('g1')['members'], ['a', 'b'])
+
+    def test_failures_and_expiry_force_sync(self):
+        self.store.saveGroupSnapshot('g1', 'title', 1, rosterHash(['a']), ['a'], True)
+        self.assertFalse(self.store.isGroupUnchanged('g1', rosterHash(['a'])))
+
+        self.store.saveGroupSnapshot('g1', 'title', 1, rosterHash(['a']), ['a'], False)
+        self.store.fullSyncInterval = 0
+        self.assertFalse(self.store.isGroupUnchanged('g1', rosterHash(['a'])))
+
+    def test_group_outcomes_and_snapshots_by_title(self):
+        self.assertEqual(self.store.getGroupOutcomes(), {})
+        self.store.saveGroupOutcomes({'Course_1_Assignment_2': 'failed', 'Course_1_Assignment_3': 'updated'})
+        self.store.saveGroupOutcomes({'Course_1_Assignment_2': 'updated'})
+        self.assertEqual(self.store.getGroupOutcomes(),
+                         {'Course_1_Assignment_2': 'updated', 'Course_1_Assignment_3': 'updated'})
+
+        self.store.saveGroupSnapshot('g1', 'Course_1_Assignment_2', 1, rosterHash(['a']), ['a'], False)
+        self.assertEqual(self.store.getGroupSnapshotsByTitle()['Course_1_Assignment_2']['groupID'], 'g1')
+
+    def test_forget_group(self):
+        self.store.saveGroupSnapshot('g1', 'Course_1_Assignment_2', 1, rosterHash(['a']), ['a'], False)
+        self.store.saveGroupSnapshot('g2', 'Course_1_Assignment_3', 1, rosterHash(['a']), ['a'], False)
+        self.store.forgetGroup('g9', 'Course_1_Assignment_2')
+        self.assertIsNone(self.store.getGroupSnapshot('g1'))
+        self.assertIsNotNone(self.store.getGroupSnapshot('g2'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+
+import requests
+
+from RequestsPlus import AdaptiveThrottle, RequestsPlus
+
+
+def makeResponse(statusCode=200, text='', remaining=None):
+    response = requests.Response()
+    response.status_code = statusCode
+    response._content = text.encode()
+    if remaining is not None:
+        response.headers['X-Rate-Limit-Remaining'] = str(remaining)
+    return response
+
+
+class AdaptiveThrottleTestCase(unittest.TestCase):
+
+    def test_retryable_responses(self):
+        throttle = AdaptiveThrottle()
+        self.assertTrue(throttle.isRetryable(makeResponse(403, '403 Forbidden (Rate Limit Exceeded)')))
+        self.assertTrue(throttle.isRetryable(makeResponse(503)))
+        self.assertFalse(throttle.isRetryable(makeResponse(403, 'user not authorized')))
+        self.assertFalse(throttle.isRetryable(makeResponse(404)))
+
+    def test_low_quota_reduces_concurrency(self):
+        throttle = AdaptiveThrottle(maxConcurrency=8, lowWatermark=100, recoveryRate=1000)
+        throttle.acquire()
+        throttle.release(makeResponse(remaining=50))
+        self.assertEqual(throttle.stats()['concurrency'], 4)
+
+        throttle.acquire()
+        throttle.release(makeResponse(remaining=600))
+        self.assertEqual(throttle.stats()['concurrency'], 5)
+        self.assertEqual(throttle.stats()['lowestRateLimitRemaining'], 50)
+
+    def test_retry_budget(self):
+        throttle = AdaptiveThrottle(maxRetries=5, retryBudget=2)
+        self.assertTrue(throttle.takeRetry(0))
+        self.assertTrue(throttle.takeRetry(0))
+        self.assertFalse(throttle.takeRetry(0))
+        self.assertFalse(AdaptiveThrottle(maxRetries=1).takeRetry(1))
+
+    def test_backoff_is_bounded(self):
+        throttle = AdaptiveThrottle(backoffBase=1.0, backoffMax=5.0)
+        for attempt in range(10):
+            self.assertTrue(0 <= throttle.backoffDelay(attempt) <= min(5.0, 2 ** attempt))
+
+
+class RetryTestCase(unittest.TestCase):
+    def sendAll(self, httpMethod, responses):
+        client = RequestsPlus('https://canvas.example.edu/api/v1', throttle=AdaptiveThrottle(backoffBase=0))
+        sent = []
+
+        def send():
+            sent.append(httpMethod)
+            return responses[len(sent) - 1]
+
+        return client._sendWithRetry(send, 'https://canvas.example.edu/api/v1/courses', httpMethod), sent
+
+    def test_server_errors_retried_for_get_only(self):
+        (response, sent) = self.sendAll('GET', [makeResponse(503), makeResponse(200)])
+        self.assertEqual((response.status_code, len(sent)), (200, 2))
+
+        (response, sent) = self.sendAll('post', [makeResponse(503), makeResponse(200)])
+        self.assertEqual((response.status_code, len(sent)), (503, 1))
+
+    def test_rate_limited_post_retried(self):
+        (response, sent) = self.sendAll('POST', [makeResponse(403, '403 Forbidden (Rate Limit Exceeded)'),
+                                                 makeResponse(200)])
+        self.assertEqual((response.status_code, len(sent)), (200, 2))
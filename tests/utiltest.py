@@ -28,3 +28,25 @@ class WidgetTestCase(unittest.TestCase):
     def test_darn_long_string(self):
         answer = util.elideString("Return version of string with the middle removed.  This allows identifying")
         self.assertEqual(answer,"Ret...ing")
+
+
+class MapConcurrentlyTestCase(unittest.TestCase):
+
+    def test_results_keep_item_order(self):
+        results, exceptions = util.mapConcurrently(lambda x: x * 2, [3, 1, 2], maxWorkers=3)
+        self.assertEqual(list(results.items()), [(3, 6), (1, 2), (2, 4)])
+        self.assertEqual(exceptions, {})
+
+    def test_failure_is_isolated(self):
+        def failOnTwo(x):
+            if x == 2:
+                raise RuntimeError('two')
+            return x
+
+        results, exceptions = util.mapConcurrently(failOnTwo, [1, 2, 3])
+        self.assertEqual(results, {1: 1, 3: 3})
+        self.assertEqual(list(exceptions.keys()), [2])
+        self.assertIsInstance(exceptions[2], RuntimeError)
+
+    def test_no_items(self):
+        self.assertEqual(util.mapConcurrently(str, []), ({}, {}))
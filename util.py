@@ -4,6 +4,7 @@
 
 import datetime
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 logger = logging.getLogger(__name__)
 
@@ -58,6 +59,40 @@ def splitListIntoSublists(origList: list, sublistLength: int=10):
     return sublists
 
 
+def mapConcurrently(function, items, maxWorkers=8):
+    """
+    Call function once for each item, using a pool of at most maxWorkers threads.
+    An exception raised for one item does not stop the others.
+
+    :param function: Function taking a single item as its argument
+    :type function: callable
+    :param items: Items to be passed to function, one per call
+    :type items: Any iterable
+    :param maxWorkers: Maximum number of calls to run at the same time
+    :type maxWorkers: int
+    :return: Dictionary of results and dictionary of exceptions, each keyed by item,
+        with keys in the same order as items
+    :rtype: (dict, dict)
+    """
+    items = list(items)
+    results = {}
+    exceptions = {}
+
+    if not items:
+        return results, exceptions
+
+    with ThreadPoolExecutor(max_workers=max(1, min(maxWorkers, len(items)))) as executor:
+        futures = [(item, executor.submit(function, item)) for item in items]
+
+        for (item, future) in futures:
+            try:
+                results[item] = future.result()
+            except Exception as exception:
+                exceptions[item] = exception
+
+    return results, exceptions
+
+
 class Iso8601UTCTimeFormatter(logging.Formatter):
     """
     A logging Formatter class giving timestamps in a more common ISO 8601 format.